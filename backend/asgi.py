@@ -0,0 +1,328 @@
+"""
+ASGI entry point serving /api/events from the asyncio scraping engine.
+
+Scrapes run as coroutines on one event loop instead of holding a worker
+thread each, so a single process can keep thousands of searches in
+flight. All other routes are delegated to the Flask app.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 10000
+
+or with several worker processes sharing one result cache:
+    WEB_CONCURRENCY=4 python event_fetch_backend.py
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from urllib.parse import parse_qsl
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from asgiref.wsgi import WsgiToAsgi
+
+import event_fetch_backend as backend
+import http_cache
+import metrics
+from async_scraper import AsyncEventScraper, close_async_session
+from parse_pool import default_parse_pool
+from sources import EventbriteSource
+
+logger = logging.getLogger('event_scraper')
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type'),
+]
+
+flask_app = WsgiToAsgi(backend.app)
+
+# Scrapes currently running on the event loop, keyed like the result cache
+in_flight: Dict[Tuple, asyncio.Task] = {}
+
+
+def finish_scrape(key: Tuple, task: asyncio.Task) -> None:
+    """
+    Forget a finished scrape task and log its failure: a refresh behind a
+    stale answer has no request waiting to see the exception.
+
+    Args:
+        key (Tuple): Result cache key of the scrape
+        task (asyncio.Task): Finished scrape task
+    """
+    if in_flight.get(key) is task:
+        del in_flight[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error scraping {key}: {task.exception()}")
+
+
+async def scrape_city(city: str, max_events: int, start_after: Optional[datetime] = None,
+                      start_before: Optional[datetime] = None) -> List[Dict[str, str]]:
+    """
+    Get events for a city from the shared result cache, running at most one
+    scrape per (city, max events, window) at a time and serving stale entries
+    while they are refreshed.
+
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        start_after (Optional[datetime]): Only keep events starting at or after this time
+        start_before (Optional[datetime]): Only keep events starting before this time
+
+    Returns:
+        List[Dict[str, str]]: List of event dictionaries
+    """
+    key = backend.events_key(city, max_events, start_after, start_before)
+    # A shared cache reads SQLite, which must not block the event loop
+    events = await asyncio.to_thread(backend.events_cache.get, key)
+    if events is not None:
+        metrics.count_cache('events', 'hit')
+        return events
+
+    stale = await asyncio.to_thread(backend.events_cache.get, key, True)
+    task = in_flight.get(key)
+    if task is None:
+        metrics.count_cache('events', 'stale' if stale is not None else 'miss')
+        task = asyncio.ensure_future(run_scrape(city, max_events, start_after, start_before))
+        in_flight[key] = task
+        task.add_done_callback(lambda done: finish_scrape(key, done))
+    elif stale is None:
+        metrics.count_cache('events', 'coalesced')
+
+    if stale is not None:
+        return stale
+    return await asyncio.shield(task)
+
+
+async def iter_source_events(city: str, max_events: int, **options: Any) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yield a city's events from the configured sources.
+
+    A lone Eventbrite source is scraped on the event loop; several sources
+    are fanned out on threads and their merged events yielded at the end.
+
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        **options: EventScraper keyword arguments
+
+    Yields:
+        Dict[str, str]: Cleaned event dictionaries
+    """
+    sources = backend.event_sources
+    source = sources.sources[0]
+    if sources.fans_out or sources.deadline is not None or not isinstance(source, EventbriteSource):
+        for event in await asyncio.to_thread(sources.scrape, city, max_events, **options):
+            yield event
+        return
+
+    progress = options.pop('progress', None)
+    scraper = AsyncEventScraper(city, max_events, base_url=source.base_url, event_store=source.event_store,
+                                on_progress=source.reporter(progress), **options)
+    async for event in scraper.iter_events():
+        yield dict(event, source=source.name)
+
+
+async def run_scrape(city: str, max_events: int, start_after: Optional[datetime] = None,
+                     start_before: Optional[datetime] = None) -> List[Dict[str, str]]:
+    """Scrape a city into the result cache, or wait for another worker's scrape of it."""
+    key = backend.events_key(city, max_events, start_after, start_before)
+
+    async def scrape() -> List[Dict[str, str]]:
+        with backend.tracked_scrape(key, max_events) as progress:
+            return [event async for event in iter_source_events(city, max_events, start_after=start_after,
+                                                                start_before=start_before, progress=progress)]
+
+    return await backend.events_cache.compute_async(key, scrape)
+
+
+async def scrape_city_within(city: str, max_events: int, deadline: float, start_after: Optional[datetime] = None,
+                             start_before: Optional[datetime] = None) -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Async counterpart of backend.scrape_city_within: the scrape task is
+    shielded, so it keeps filling the cache after the deadline passes.
+    """
+    try:
+        return await asyncio.wait_for(scrape_city(city, max_events, start_after, start_before), deadline), False
+    except asyncio.TimeoutError:
+        metrics.count_cache('events', 'partial')
+        return backend.partial_events(backend.events_key(city, max_events, start_after, start_before)), True
+
+
+async def read_body(receive: Callable[[], Awaitable[Dict[str, Any]]]) -> bytes:
+    """Read the full request body."""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def send_json(send: Callable, status: int, data: Any) -> None:
+    """Send a complete JSON response."""
+    body = json.dumps(data).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())] + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_events(scope: Dict[str, Any], send: Callable, events: List[Dict[str, str]], key: Tuple,
+                      ndjson: bool = False) -> None:
+    """Send events compressed with an ETag, or 304 if the client has them (see backend.events_response)."""
+    request_headers = dict(scope.get('headers', []))
+    cache_control = backend.events_cache_control(key) if scope['method'] == 'GET' else None
+    if ndjson:
+        body, content_type = http_cache.ndjson_body(events), 'application/x-ndjson'
+    else:
+        body, content_type = http_cache.json_body(events), 'application/json'
+    status, headers, body = http_cache.cached_response(
+        body, content_type, request_headers.get(b'accept-encoding', b'').decode('latin-1'),
+        request_headers.get(b'if-none-match', b'').decode('latin-1'), cache_control)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+                   + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def stream_events(scope: Dict[str, Any], send: Callable, city: str, max_events: int,
+                        start_after: Optional[datetime] = None, start_before: Optional[datetime] = None) -> None:
+    """Send events as newline-delimited JSON while they are scraped, or a cached result whole with validators."""
+    key = backend.events_key(city, max_events, start_after, start_before)
+    cached = await asyncio.to_thread(backend.events_cache.get, key, True)
+    if cached is not None:
+        backend.record_demand(city, max_events, cached)
+        await send_events(scope, send, cached, key, ndjson=True)
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson')] + CORS_HEADERS
+    })
+    events = []
+    try:
+        async for event in iter_source_events(city, max_events, start_after=start_after, start_before=start_before):
+            events.append(event)
+            await send({'type': 'http.response.body', 'body': (json.dumps(event) + '\n').encode('utf-8'),
+                        'more_body': True})
+    except Exception as e:
+        logger.error(f'Error streaming events: {str(e)}')
+        await send({'type': 'http.response.body',
+                    'body': (json.dumps({'error': 'Failed to fetch events'}) + '\n').encode('utf-8')})
+        return
+
+    if events:
+        await asyncio.to_thread(backend.events_cache.put, key, events)
+    backend.record_demand(city, max_events, events)
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def fetch_events(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+    """Async counterpart of the Flask /api/events route."""
+    if scope['method'] == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    if scope['method'] == 'GET':
+        # The parameters come from the query string, so results can be cached by URL
+        params = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    else:
+        try:
+            params = json.loads(await read_body(receive) or b'null')
+        except ValueError:
+            params = None
+    if not isinstance(params, dict) or 'city' not in params or 'maxEvents' not in params:
+        await send_json(send, 400, {'error': 'Missing required parameters'})
+        return
+
+    try:
+        city = backend.normalize_city(params['city'])
+        max_events = min(max(1, int(params['maxEvents'])), backend.MAX_EVENTS)
+
+        try:
+            start_after, start_before = backend.parse_window(params)
+            sort = params.get('sort')
+            backend.sort_events([], sort)
+        except (TypeError, ValueError):
+            await send_json(send, 400, {'error': 'Invalid startAfter, startBefore or sort'})
+            return
+        try:
+            stream = backend.parse_flag(params.get('stream'))
+        except ValueError:
+            await send_json(send, 400, {'error': 'Invalid stream'})
+            return
+
+        if 'deadlineMs' in params:
+            if 'since' in params or stream:
+                await send_json(send, 400, {'error': 'deadlineMs cannot be combined with since or stream'})
+                return
+            try:
+                deadline = backend.parse_deadline(params['deadlineMs'])
+            except (TypeError, ValueError):
+                await send_json(send, 400, {'error': 'Invalid deadlineMs'})
+                return
+            events, partial = await scrape_city_within(city, max_events, deadline, start_after, start_before)
+            backend.record_demand(city, max_events, events)
+            await send_json(send, 200, {'events': backend.sort_events(events, sort), 'partial': partial})
+            return
+
+        if 'since' in params:
+            if start_after or start_before:
+                await send_json(send, 400, {'error': 'since cannot be combined with startAfter or startBefore'})
+                return
+            try:
+                since = backend.parse_since(params['since'])
+            except (TypeError, ValueError):
+                await send_json(send, 400, {'error': 'Invalid since token'})
+                return
+            events = await scrape_city(city, max_events)
+            backend.record_demand(city, max_events, events)
+            await send_json(send, 200, await asyncio.to_thread(backend.events_delta, city, max_events, events, since))
+            return
+
+        accept = dict(scope.get('headers', [])).get(b'accept', b'').decode('latin-1')
+        if stream or 'application/x-ndjson' in accept:
+            await stream_events(scope, send, city, max_events, start_after, start_before)
+            return
+
+        events = await scrape_city(city, max_events, start_after, start_before)
+        backend.record_demand(city, max_events, events)
+        await send_events(scope, send, backend.sort_events(events, sort),
+                          backend.events_key(city, max_events, start_after, start_before))
+    except Exception as e:
+        logger.error(f'Error fetching events: {str(e)}')
+        await send_json(send, 500, {'error': 'Failed to fetch events'})
+
+
+async def lifespan(receive: Callable, send: Callable) -> None:
+    """Handle ASGI startup and shutdown."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            backend.prewarm_scheduler.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_session()
+            default_parse_pool.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+    """ASGI application: async /api/events, everything else via Flask."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/api/events' and scope['method'] in ('GET', 'POST', 'OPTIONS'):
+        await fetch_events(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
@@ -0,0 +1,421 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+import metrics
+from event_record import EventRecord
+from scraper import EventScraper
+from fetch_policy import RETRYABLE_STATUSES, THROTTLE_STATUSES
+from http_session import (ACCEPT_ENCODING, MAX_BODY_BYTES, READ_CHUNK_SIZE, ResponseTooLarge, cached_body,
+                          check_content_length, decode_body, validator_cache)
+from parse_pool import default_parse_pool, event_page_task, listing_page_task
+
+logger = logging.getLogger('event_scraper')
+
+ASYNC_POOL_SIZE = int(os.environ.get('SCRAPER_ASYNC_POOL_SIZE', 100))
+ASYNC_POOL_SIZE_PER_HOST = int(os.environ.get('SCRAPER_ASYNC_POOL_SIZE_PER_HOST', 20))
+
+# One client session (and connection pool) per event loop
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """Get the shared aiohttp session for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=ASYNC_POOL_SIZE, limit_per_host=ASYNC_POOL_SIZE_PER_HOST,
+                                         ttl_dns_cache=300)
+        session = aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": ACCEPT_ENCODING})
+        _sessions[loop] = session
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the shared session of the running event loop."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def read_body_async(response: aiohttp.ClientResponse, max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Async counterpart of http_session.read_body.
+
+    Args:
+        response (aiohttp.ClientResponse): Response whose body has not been read
+        max_bytes (int): Maximum body size after decompression
+
+    Returns:
+        str: Decoded body
+
+    Raises:
+        ResponseTooLarge: If the body exceeds `max_bytes`
+    """
+    check_content_length(str(response.url), response.headers, max_bytes)
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f"Response from {response.url} is over the {max_bytes} byte limit")
+    # get_encoding() would need the body read through read() to guess a missing charset
+    return decode_body(body, response.charset)
+
+
+async def conditional_get_async(url: str, headers: Dict[str, str], timeout: float = 10,
+                                max_bytes: int = MAX_BODY_BYTES) -> Tuple[int, str, Mapping[str, str]]:
+    """
+    Async counterpart of http_session.conditional_get sharing the same validator cache.
+
+    Args:
+        url (str): URL to request
+        headers (Dict[str, str]): Extra request headers
+        timeout (float): Request timeout in seconds
+        max_bytes (int): Maximum body size after decompression
+
+    Returns:
+        Tuple[int, str, Mapping[str, str]]: HTTP status code, response body and response headers
+
+    Raises:
+        ResponseTooLarge: If the body exceeds `max_bytes`
+    """
+    request_headers = dict(headers)
+    cached = validator_cache.get(url)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            request_headers['If-None-Match'] = etag
+        if last_modified:
+            request_headers['If-Modified-Since'] = last_modified
+
+    async with get_async_session().get(url, headers=request_headers,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status == 304 and cached:
+            metrics.count_cache('http_validators', 'revalidated')
+            return 200, cached[2], response.headers
+        text = await read_body_async(response, max_bytes)
+        if response.status == 200:
+            validator_cache.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), text)
+        return response.status, text, response.headers
+
+
+class AsyncEventScraper(EventScraper):
+    """
+    An asyncio version of EventScraper.
+
+    Extraction and cleaning are inherited unchanged so results have the same
+    shape; the methods that do I/O are coroutines here and use a shared,
+    non-blocking connection pool, so one event loop can run many scrapes.
+    """
+
+    async def fetch_page(self, url: str) -> Optional[str]:
+        """
+        Make a non-blocking HTTP request and return the page text, retrying
+        according to the fetch policy (see EventScraper.fetch_page).
+
+        Args:
+            url (str): URL to request
+
+        Returns:
+            Optional[str]: Page HTML or None if request failed
+        """
+        if not self.fetch_policy.allow(url):
+            return cached_body(url)
+
+        try:
+            for attempt in range(self.fetch_policy.max_retries + 1):
+                status_code, text, headers = None, None, None
+                try:
+                    await self.rate_limiter.acquire_async(url)
+                    with metrics.timer('fetch'):
+                        status_code, text, headers = await conditional_get_async(url, self.get_headers(), timeout=10)
+                except ResponseTooLarge as e:
+                    # Fetching it again would only hit the same limit
+                    logger.error(f"Skipping {url}: {e}")
+                    metrics.count_error('fetch_too_large')
+                    self.fetch_policy.release(url)
+                    return None
+                except Exception as e:
+                    logger.error(f"Error making request to {url}: {e}")
+
+                if status_code == 200:
+                    self.fetch_policy.after_attempt(url, attempt, status_code)
+                    self.rate_limiter.adapt(url, throttled=False)
+                    metrics.count_bytes('fetch', len(text))
+                    return text
+
+                if status_code is not None:
+                    logger.error(f"Failed to retrieve page. Status code: {status_code} for URL: {url}")
+                    metrics.count_error('fetch')
+                    if status_code in THROTTLE_STATUSES:
+                        self.rate_limiter.adapt(url, throttled=True, pause=self.fetch_policy.retry_pause(headers))
+
+                wait = self.fetch_policy.after_attempt(url, attempt, status_code, headers)
+                if wait is None:
+                    break
+                logger.info(f"Retrying {url} in {wait:.1f}s")
+                await asyncio.sleep(wait)
+        except BaseException:
+            # A cancelled or interrupted fetch must not keep the host's circuit waiting on its trial
+            self.fetch_policy.release(url)
+            raise
+
+        if status_code is None or status_code in RETRYABLE_STATUSES:
+            # Upstream is struggling; fall back to the last good copy if we have one
+            return cached_body(url)
+        return None
+
+    async def make_request(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Make a non-blocking HTTP request and return BeautifulSoup object.
+
+        Args:
+            url (str): URL to request
+
+        Returns:
+            Optional[BeautifulSoup]: BeautifulSoup object or None if request failed
+        """
+        html = await self.fetch_page(url)
+        if html is None:
+            return None
+        return self.parse_html(html)
+
+    async def scrape_individual_event_page(self, url: str) -> Dict[str, str]:
+        """
+        Scrape details from an individual event page.
+
+        Args:
+            url (str): Event URL
+
+        Returns:
+            Dict[str, str]: Event details
+        """
+        logger.info(f"Scraping individual page: {url}")
+        html = await self.fetch_page(url)
+
+        if not html:
+            return {}
+
+        return await default_parse_pool.run_async(event_page_task, (html, url, self.base_url),
+                                                  lambda: self.extract_event_page(html, url))
+
+    async def scrape_individual_event_page_safe(self, url: str) -> Dict[str, str]:
+        """
+        Scrape an individual event page, returning an empty dict on any error.
+
+        Args:
+            url (str): Event URL
+
+        Returns:
+            Dict[str, str]: Event details or an empty dict
+        """
+        try:
+            return await self.scrape_individual_event_page(url)
+        except Exception as e:
+            logger.error(f"Error scraping event page {url}: {e}")
+            return {}
+
+    async def iter_event_pages(self, urls: List[str],
+                               fingerprints: Optional[Dict[str, str]] = None) -> AsyncIterator[Dict[str, str]]:
+        """
+        Yield details for several event pages in input order, serving stored
+        pages from the event store and fetching the rest concurrently
+        (at most `max_workers` at a time).
+
+        Args:
+            urls (List[str]): Event URLs
+            fingerprints (Optional[Dict[str, str]]): Listing entry fingerprints by URL; events
+                whose entry is unchanged reuse their stored page whatever its age
+
+        Yields:
+            Dict[str, str]: Event details (an empty dict where scraping failed)
+        """
+        stored = {}
+        if self.event_store:
+            stored = await asyncio.to_thread(self.lookup_event_pages, urls, fingerprints)
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch(url: str) -> Dict[str, str]:
+            async with semaphore:
+                return await self.scrape_individual_event_page_safe(url)
+
+        tasks = {url: asyncio.ensure_future(fetch(url)) for url in urls if url not in stored}
+        fetched = {}
+        try:
+            for url in urls:
+                if url in stored:
+                    yield stored[url]
+                else:
+                    fetched[url] = await tasks[url]
+                    yield fetched[url]
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            if self.event_store and (fetched or fingerprints):
+                await asyncio.to_thread(self.save_event_pages, fetched, stored, fingerprints)
+
+    async def scrape_event_pages(self, urls: List[str]) -> List[Dict[str, str]]:
+        """
+        Get details for several event pages (see iter_event_pages).
+
+        Args:
+            urls (List[str]): Event URLs
+
+        Returns:
+            List[Dict[str, str]]: Event details in the same order as `urls`
+        """
+        return [details async for details in self.iter_event_pages(urls)]
+
+    async def iter_listing_pages(self) -> AsyncIterator[str]:
+        """
+        Fetch listing pages in order, yielding each page's HTML.
+
+        Page 1 is fetched alone; later pages are fetched `max_workers` at a time
+        and only once the consumer asks for them.
+
+        Yields:
+            str: Listing page HTML
+        """
+        url = self.get_listing_url(1)
+        logger.info(f"Fetching events from {url}")
+        html = await self.fetch_page(url)
+        if not html:
+            return
+        yield html
+
+        page = 2
+        while page <= self.max_pages:
+            batch = [self.get_listing_url(n) for n in range(page, min(page + self.max_workers, self.max_pages + 1))]
+            page += len(batch)
+            logger.info(f"Fetching {len(batch)} more listing pages from {batch[0]}")
+            for html in await asyncio.gather(*(self.fetch_page(url) for url in batch)):
+                if not html:
+                    return
+                yield html
+
+    async def extract_listing_page(self, html: str, seen: set, limit: int,
+                                   warn_if_empty: bool = True) -> Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]:
+        """
+        Parse one listing page without blocking the event loop when the parse
+        pool is enabled (see EventScraper.extract_listing_page).
+
+        Args:
+            html (str): Listing page HTML
+            seen (set): Canonical URLs of events already produced; updated in place
+            limit (int): Maximum number of events to take from this page
+            warn_if_empty (bool): Whether to log a warning if the page has no event elements
+
+        Returns:
+            Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]: Cleaned JSON-LD events
+                and (card details, event URL) pairs
+        """
+        events, card_links = await default_parse_pool.run_async(
+            listing_page_task, (html, self.base_url, seen, limit, warn_if_empty),
+            lambda: self.parse_listing_page(html, seen, limit, warn_if_empty))
+        self.mark_seen(seen, events, card_links)
+        return events, card_links
+
+    async def iter_listing_events(self, html: str, scrape_individual: bool, seen: set, limit: int,
+                                  warn_if_empty: bool = True) -> AsyncIterator[Dict[str, str]]:
+        """
+        Extract events from one listing page, skipping any already in `seen`
+        (see EventScraper.iter_listing_events).
+
+        Args:
+            html (str): Listing page HTML
+            scrape_individual (bool): Whether to scrape individual event pages
+            seen (set): Canonical URLs of events already produced; updated in place
+            limit (int): Maximum number of events to produce from this page
+            warn_if_empty (bool): Whether to log a warning if the page has no event elements
+
+        Yields:
+            Dict[str, str]: Cleaned event dictionaries
+        """
+        json_ld_events, card_links = await self.extract_listing_page(html, seen, limit, warn_if_empty)
+        # Don't keep the page text alive while the detail pages are fetched
+        del html
+        for event in json_ld_events:
+            if self.in_window(event):
+                yield event
+
+        # Skip detail pages of events the card already places outside the window
+        card_links = [link for link in card_links if self.may_be_in_window(link[0])]
+        if not (scrape_individual and card_links):
+            for card_details, event_url in card_links:
+                event = self.finish_card_event(card_details, event_url, {})
+                if event and self.card_event_in_window(event, {}):
+                    yield event
+            return
+
+        self.report_pending(card_links)
+        page_details = self.iter_event_pages([event_url for _, event_url in card_links],
+                                             self.card_fingerprints(card_links))
+        try:
+            index = 0
+            async for event_details in page_details:
+                card_details, event_url = card_links[index]
+                index += 1
+                event = self.finish_card_event(card_details, event_url, event_details)
+                if event and self.card_event_in_window(event, event_details):
+                    yield event
+        finally:
+            await page_details.aclose()
+
+    async def iter_events(self, scrape_individual: bool = True) -> AsyncIterator[Dict[str, str]]:
+        """
+        Scrape events from Eventbrite, yielding each cleaned event as soon as it is ready.
+
+        Args:
+            scrape_individual (bool): Whether to scrape individual event pages
+
+        Yields:
+            Dict[str, str]: Cleaned event dictionaries
+        """
+        seen = set()
+        count = 0
+
+        pages = self.iter_listing_pages()
+        try:
+            page_number = 0
+            async for html in pages:
+                page_number += 1
+                page_count = 0
+                seen_before = len(seen)
+                page_events = self.iter_listing_events(html, scrape_individual, seen, self.page_limit(count),
+                                                       warn_if_empty=page_number == 1)
+                del html
+                try:
+                    async for event in page_events:
+                        if self.on_progress:
+                            self.on_progress([event], True)
+                        yield event
+                        count += 1
+                        page_count += 1
+                        if count >= self.max_events:
+                            return
+                finally:
+                    await page_events.aclose()
+
+                # A page with nothing new means we've run past the end of the listing
+                if not page_count and len(seen) == seen_before:
+                    return
+        finally:
+            await pages.aclose()
+
+    async def scrape_events(self, scrape_individual: bool = True) -> List[Dict[str, str]]:
+        """
+        Scrape events from Eventbrite.
+
+        Args:
+            scrape_individual (bool): Whether to scrape individual event pages
+
+        Returns:
+            List[Dict[str, str]]: List of event dictionaries
+        """
+        with metrics.timer('scrape_events'):
+            return [event async for event in self.iter_events(scrape_individual)]
@@ -0,0 +1,235 @@
+"""
+Check the single-pass card extractor against the selector-based extraction
+it replaced, and compare their speed.
+
+Usage:
+    python benchmarks/card_extract.py [page.html ...] [--repeat N]
+
+With no files, the listing and detail fixtures plus a set of edge-case
+cards are used. Exits with status 1 if any extracted event differs.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from card_extractor import CARD_PLAN, PAGE_PLAN  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+CARD_SELECTOR = ('[data-testid="event-card"], div[data-event-id], article[data-event-id], '
+                 'div.event-card, div.eds-event-card-content, article.eds-l-pad-all-4, '
+                 'div.search-event-card-square-image')
+
+# Cards exercising the precedence rules: empty headings, short titles, long
+# locations, preferred vs generic location elements, images without src
+EDGE_CASE_CARDS = [
+    '<div class="event-card"><h3> </h3><span class="card-title">Short</span><b>Bold title here</b></div>',
+    '<div class="event-card"><strong>Tiny</strong><p class="event-name">A longer name</p></div>',
+    '<div class="event-card"><p class="time-slot"></p><span datetime="x">Sat 7pm</span><time>Sun</time></div>',
+    '<div class="event-card"><p aria-label="location"></p><p class="venue">Generic venue</p></div>',
+    '<div class="event-card"><p class="venue">' + 'x' * 120 + '</p><p class="place">Short place</p></div>',
+    '<div class="event-card"><p data-automation="venue">Preferred</p><p class="location">Generic</p></div>',
+    '<div class="event-card"><p class="location">Before</p><p class="address-line">Preferred after</p></div>',
+    '<div class="event-card"><img alt="no src"><img src="/second.jpg"><div class="about"> About </div></div>',
+    '<div class="event-card"><h2>Heading</h2><div class="desc"></div><div class="summary">Summary</div></div>',
+    '<div class="event-card"></div>',
+]
+
+EDGE_CASE_PAGES = [
+    '<html><head><meta property="event:location" content=""><meta property="event:location" content="Second">'
+    '</head><body><h1> </h1><div class="place">Line one\nLine two</div><p class="venue">Hall</p></body></html>',
+    '<html><head><meta property="event:location" content="Meta venue"></head>'
+    '<body><h1>Title</h1><div class="venue-name">' + 'v' * 160 + '</div></body></html>',
+    '<html><head><meta property="og:description" content="OG text"></head>'
+    '<body><div class="event-desc">Body text</div></body></html>',
+    '<html><body><div class="event-desc">Body text</div><span aria-label="venue">Venue</span></body></html>',
+    '<html><body></body></html>',
+]
+
+
+def legacy_card_details(card: BeautifulSoup, event_url: str) -> Dict[str, str]:
+    """Card extraction as it was done with one CSS select per field."""
+    title = None
+    for heading in card.select('h1, h2, h3, h4, h5'):
+        if heading.text.strip():
+            title = heading.text.strip()
+            break
+    if not title:
+        for candidate in card.select('[class*="title"], [class*="name"], strong, b'):
+            if candidate.text.strip() and len(candidate.text.strip()) > 5:
+                title = candidate.text.strip()
+                break
+
+    date_str = None
+    for date_elem in card.select('time, [class*="date"], [class*="time"], [datetime]'):
+        if date_elem.text.strip():
+            date_str = date_elem.text.strip()
+            break
+
+    location = None
+    location_candidates = card.select('[aria-label*="location"], [data-automation="venue"], [class*="address-line"]')
+    if not location_candidates:
+        location_candidates = card.select('[class*="location"], [class*="venue"], [class*="address"], [class*="place"]')
+    for loc_elem in location_candidates:
+        loc_text = loc_elem.text.strip()
+        if loc_text and len(loc_text) < 100:
+            location = loc_text
+            break
+
+    description = "No description available"
+    for desc_elem in card.select('[class*="desc"], [class*="summary"], [class*="about"]'):
+        if desc_elem.text.strip():
+            description = desc_elem.text.strip()
+            break
+
+    image = ""
+    img_tag = card.find('img')
+    if img_tag and img_tag.get('src'):
+        image = img_tag.get('src')
+
+    return {
+        'name': title or "Untitled Event",
+        'date_time': date_str or "Date not available",
+        'location': location or "Location not available",
+        'link': event_url,
+        'description': description,
+        'image': image
+    }
+
+
+def legacy_page_details(soup: BeautifulSoup, url: str) -> Dict[str, str]:
+    """Event page extraction (no JSON-LD) as it was done with one CSS select per field."""
+    event_details = {
+        'name': 'Untitled Event',
+        'date_time': 'Date not available',
+        'location': 'Location not available',
+        'link': url,
+        'description': 'No description available',
+        'image': ''
+    }
+
+    title_element = soup.find('h1')
+    if title_element:
+        event_details['name'] = title_element.text.strip()
+
+    for elem in soup.select('[class*="date"], [class*="time"], time, [datetime]'):
+        if elem.text.strip():
+            event_details['date_time'] = elem.text.strip()
+            break
+
+    location_found = False
+    for elem in soup.select('[aria-label*="venue"], [aria-label*="location"], [class*="venue-name"], [class*="address-line"]'):
+        loc_text = elem.text.strip()
+        if loc_text and len(loc_text) < 150:
+            event_details['location'] = loc_text
+            location_found = True
+            break
+    if not location_found:
+        meta_location = soup.find('meta', {'property': 'event:location'})
+        if meta_location and meta_location.get('content'):
+            event_details['location'] = meta_location.get('content')
+            location_found = True
+    if not location_found:
+        for elem in soup.select('[class*="location"], [class*="venue"], [class*="address"], [class*="place"]'):
+            loc_text = elem.text.strip()
+            if loc_text and len(loc_text) < 100 and '\n' not in loc_text:
+                event_details['location'] = loc_text
+                break
+
+    for elem in soup.select('[class*="desc"], [class*="summary"], [class*="about"], [property="og:description"]'):
+        if hasattr(elem, 'content'):
+            event_details['description'] = elem.get('content', '')
+            break
+        elif elem.text.strip():
+            event_details['description'] = elem.text.strip()
+            break
+
+    meta_image = soup.find('meta', {'property': 'og:image'})
+    if meta_image and meta_image.get('content'):
+        event_details['image'] = meta_image.get('content')
+
+    return event_details
+
+
+def plan_card_details(card: BeautifulSoup, event_url: str) -> Dict[str, str]:
+    """Card extraction with the compiled plan, shaped like the legacy output."""
+    fields = CARD_PLAN.extract(card)
+    return {'name': fields['name'], 'date_time': fields['date_time'], 'location': fields['location'],
+            'link': event_url, 'description': fields['description'], 'image': fields['image']}
+
+
+def plan_page_details(soup: BeautifulSoup, url: str) -> Dict[str, str]:
+    """Event page extraction with the compiled plan, shaped like the legacy output."""
+    fields = PAGE_PLAN.extract(soup)
+    return {'name': fields['name'], 'date_time': fields['date_time'], 'location': fields['location'],
+            'link': url, 'description': fields['description'], 'image': fields['image']}
+
+
+def load_documents(paths: List[str]) -> List[Tuple[str, str]]:
+    """Load (name, html) pairs from files, or the fixtures and edge cases."""
+    if paths:
+        return [(os.path.basename(path), open(path, encoding='utf-8').read()) for path in paths]
+    documents = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+                documents.append((name, f.read()))
+    documents.append(('edge-case cards', '<html><body>' + ''.join(EDGE_CASE_CARDS) + '</body></html>'))
+    documents.extend((f'edge-case page {i + 1}', html) for i, html in enumerate(EDGE_CASE_PAGES))
+    return documents
+
+
+def time_it(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Run fn `repeat` times and return the wall times in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='HTML files to check')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per variant')
+    args = parser.parse_args()
+
+    mismatches = 0
+    for name, html in load_documents(args.pages):
+        soup = BeautifulSoup(html, 'html.parser')
+        cards = soup.select(CARD_SELECTOR)
+        if cards:
+            label, targets = f'{len(cards)} cards', cards
+            variants = {'legacy selects': legacy_card_details, 'single pass': plan_card_details}
+        else:
+            label, targets = 'page', [soup]
+            variants = {'legacy selects': legacy_page_details, 'single pass': plan_page_details}
+
+        expected = [variants['legacy selects'](target, 'url') for target in targets]
+        found = [variants['single pass'](target, 'url') for target in targets]
+        for index, (old, new) in enumerate(zip(expected, found)):
+            if old != new:
+                mismatches += 1
+                print(f"MISMATCH in {name} #{index}:\n  legacy      {old}\n  single pass {new}")
+
+        print(f"{name} ({label})")
+        for variant, extract in variants.items():
+            times = time_it(lambda: [extract(target, 'url') for target in targets], args.repeat)
+            print(f"  {variant:<16} median {statistics.median(times):8.2f} ms  min {min(times):8.2f} ms")
+
+    if mismatches:
+        print(f"{mismatches} mismatches")
+        sys.exit(1)
+    print("All extracted events match")
+
+
+if __name__ == '__main__':
+    main()
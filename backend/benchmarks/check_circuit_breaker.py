@@ -0,0 +1,108 @@
+"""
+Check that a half-open circuit gets its trial request back however the
+trial fetch ends.
+
+Opens a host's circuit, waits for it to turn half-open and then lets the
+trial fetch end without a verdict on the host's health: with a response
+over the body size limit (sync and async) and by cancelling it mid-request
+(async). Afterwards another trial must be allowed. Exits with status 1 if
+the circuit stays stuck.
+
+Usage:
+    python benchmarks/check_circuit_breaker.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_scraper import AsyncEventScraper, close_async_session  # noqa: E402
+from fetch_policy import FetchPolicy  # noqa: E402
+from http_session import MAX_BODY_BYTES  # noqa: E402
+from scraper import EventScraper  # noqa: E402
+
+RESET_TIMEOUT = 0.2
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if self.path.startswith('/large'):
+            # Announced size alone is enough to refuse the body
+            self.send_header('Content-Length', str(MAX_BODY_BYTES + 1))
+            self.end_headers()
+            return
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def half_open_policy(url: str) -> FetchPolicy:
+    """A policy whose circuit for the URL's host is half-open."""
+    policy = FetchPolicy(max_retries=0, failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    policy.breaker(url).record_failure()
+    time.sleep(RESET_TIMEOUT)
+    return policy
+
+
+def check(name: str, policy: FetchPolicy, url: str) -> bool:
+    """Report whether the host's circuit lets a new trial through."""
+    ok = policy.breaker(url).allow()
+    print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    return ok
+
+
+async def cancel_trial(url: str) -> FetchPolicy:
+    """Start an async trial fetch and cancel it while the request is in flight."""
+    policy = half_open_policy(url)
+    scraper = AsyncEventScraper('check', delay=0, fetch_policy=policy)
+    task = asyncio.create_task(scraper.fetch_page(url))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return policy
+
+
+async def too_large_trial(url: str) -> FetchPolicy:
+    """Run an async trial fetch of a page over the size limit."""
+    policy = half_open_policy(url)
+    await AsyncEventScraper('check', delay=0, fetch_policy=policy).fetch_page(url)
+    return policy
+
+
+async def run_async(base: str) -> bool:
+    ok = check('async, response too large', await too_large_trial(f'{base}/large?async'), base)
+    ok &= check('async, cancelled', await cancel_trial(f'{base}/slow?async'), base)
+    await close_async_session()
+    return ok
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    policy = half_open_policy(base)
+    EventScraper('check', delay=0, fetch_policy=policy).fetch_page(f'{base}/large?sync')
+    ok = check('sync, response too large', policy, base)
+    ok &= asyncio.run(run_async(base))
+
+    server.shutdown()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Check that the sync and async fetchers decode bodies alike, whatever
+charset (if any) a server declares.
+
+Serves one page with non-ASCII text under several Content-Type headers
+and fetches it with http_session.conditional_get and
+async_scraper.conditional_get_async. Exits with status 1 if a fetch fails
+or its text differs from the page.
+
+Usage:
+    python benchmarks/check_encodings.py
+"""
+import asyncio
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_scraper import close_async_session, conditional_get_async  # noqa: E402
+from http_session import conditional_get  # noqa: E402
+
+PAGE = '<html><body><h1>Café Müller – São Paulo</h1></body></html>'
+
+# Path -> (Content-Type header, body encoding)
+CASES: Dict[str, Tuple[str, str]] = {
+    '/utf8': ('text/html; charset=utf-8', 'utf-8'),
+    '/no-charset': ('text/html', 'utf-8'),
+    '/latin1': ('text/html; charset=iso-8859-1', 'latin-1'),
+    '/unknown-charset': ('text/html; charset=x-unknown', 'utf-8'),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content_type, encoding = CASES[self.path.split('?')[0]]
+        # "–" has no latin-1 form; leave it out of that page
+        data = (PAGE if encoding == 'utf-8' else PAGE.replace(' – ', ' - ')).encode(encoding)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def fetch(url: str) -> Tuple[Optional[int], str]:
+    """Fetch a URL with the sync fetcher; an error gives status None."""
+    try:
+        return conditional_get(url, {})[:2]
+    except Exception as e:
+        return None, repr(e)
+
+
+async def fetch_async(urls: List[str]) -> List[Tuple[Optional[int], str]]:
+    """Fetch URLs with the async fetcher; an error gives status None."""
+    results = []
+    for url in urls:
+        try:
+            results.append((await conditional_get_async(url, {}))[:2])
+        except Exception as e:
+            results.append((None, repr(e)))
+    await close_async_session()
+    return results
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    failures = 0
+    # Distinct query strings keep the two fetchers from sharing validator cache entries
+    sync_results = [fetch(f'{base}{path}?sync') for path in CASES]
+    async_results = asyncio.run(fetch_async([f'{base}{path}?async' for path in CASES]))
+    for path, sync_result, async_result in zip(CASES, sync_results, async_results):
+        expected = PAGE if CASES[path][1] == 'utf-8' else PAGE.replace(' – ', ' - ')
+        for name, (status, text) in (('sync', sync_result), ('async', async_result)):
+            ok = status == 200 and text == expected
+            failures += not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {name:<6} {CASES[path][0]:<32} {status} {text[:40]!r}")
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
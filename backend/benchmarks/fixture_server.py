@@ -0,0 +1,163 @@
+"""
+A local stand-in for eventbrite.com that serves recorded pages from
+benchmarks/fixtures with configurable latency and error injection.
+
+Routes:
+    /d/<city>/all-events/[?page=N]  -> fixtures/listing_page<N>.html
+                                      (the last page is repeated past the end)
+    /e/<slug>                       -> fixtures/detail_<slug>.html if recorded,
+                                      otherwise the detail_*.html templates in turn
+
+"{{base}}", "{{slug}}" and "{{name}}" in fixtures are replaced with the
+server URL, the requested slug and a title derived from it.
+
+Usage:
+    python benchmarks/fixture_server.py --port 8765 --latency 80 --jitter 30 --error-rate 0.02
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class FixtureServer:
+    """
+    Serve fixture pages on a background thread.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, fixtures_dir: str = FIXTURES_DIR):
+        """
+        Initialize the FixtureServer.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            latency (float): Added delay per response, in seconds
+            jitter (float): Maximum random extra delay per response, in seconds
+            error_rate (float): Fraction of responses replaced by a 503
+            fixtures_dir (str): Directory holding the fixture pages
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.listing_pages = self._load_sorted(fixtures_dir, 'listing_page*.html')
+        self.detail_templates = self._load_sorted(fixtures_dir, 'detail_*.html')
+        self.recorded_details = {
+            os.path.basename(path)[len('detail_'):-len('.html')]: open(path, encoding='utf-8').read()
+            for path in glob.glob(os.path.join(fixtures_dir, 'detail_*.html'))
+        }
+        self.requests_served = 0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _load_sorted(fixtures_dir: str, pattern: str) -> List[str]:
+        """Load fixture files matching a pattern, in natural order."""
+        paths = glob.glob(os.path.join(fixtures_dir, pattern))
+        paths.sort(key=lambda path: [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)])
+        return [open(path, encoding='utf-8').read() for path in paths]
+
+    def start(self) -> 'FixtureServer':
+        """Start serving on a daemon thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def render(self, template: str, slug: str = '') -> str:
+        """Fill in the placeholders of a fixture page."""
+        name = ' '.join(part.capitalize() for part in slug.split('-') if part and part != 'tickets')
+        return (template.replace('{{base}}', self.url)
+                .replace('{{slug}}', slug)
+                .replace('{{name}}', name or 'Fixture Event'))
+
+    def route(self, path: str) -> Optional[str]:
+        """Get the body for a request path, or None for a 404."""
+        parts = urlsplit(path)
+        if parts.path.startswith('/d/') and self.listing_pages:
+            page = parse_qs(parts.query).get('page', ['1'])[0]
+            index = min(max(int(page) if page.isdigit() else 1, 1), len(self.listing_pages)) - 1
+            return self.render(self.listing_pages[index])
+        if parts.path.startswith('/e/') and self.detail_templates:
+            slug = parts.path[len('/e/'):].strip('/')
+            if slug in self.recorded_details:
+                return self.render(self.recorded_details[slug], slug)
+            number = re.search(r'\d+', slug)
+            template = self.detail_templates[int(number.group()) % len(self.detail_templates) if number else 0]
+            return self.render(template, slug)
+        return None
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        """Answer one request with optional delay and injected errors."""
+        with self.lock:
+            self.requests_served += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.error_rate and random.random() < self.error_rate:
+            status, body = 503, 'Service Unavailable'
+        else:
+            body = self.route(handler.path)
+            status = 200 if body is not None else 404
+            body = body if body is not None else 'Not Found'
+
+        data = body.encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def stats(self) -> Dict[str, int]:
+        """Get request counters."""
+        return {'requests_served': self.requests_served}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='Added delay per response in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='Maximum random extra delay in ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of responses answered with 503')
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.latency / 1000, args.jitter / 1000, args.error_rate)
+    print(f"Serving fixtures on {server.url} (EVENTBRITE_BASE_URL={server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
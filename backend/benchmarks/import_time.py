@@ -0,0 +1,88 @@
+"""
+Measure cold start: how long a fresh interpreter takes to import a module.
+
+Usage:
+    python benchmarks/import_time.py [module ...] [--repeat N]
+
+Each run starts a new Python process, so nothing is cached in sys.modules.
+Reports the wall time of `python -c "import <module>"` (minus a bare
+interpreter start) and the cumulative import time reported by
+`-X importtime`, plus which heavy dependencies each module loads. By
+default compares the web server module with the batch CLI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Set, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['flask', 'sqlalchemy', 'requests', 'bs4', 'uvicorn', 'pandas', 'dateutil']
+
+
+def run_import(module: str, env: dict) -> Tuple[float, float, Set[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module (str): Module name, or '' for a bare interpreter start
+        env (dict): Environment of the child process
+
+    Returns:
+        Tuple[float, float, Set[str]]: Wall time (ms), cumulative import time of
+            the module (ms) and the top-level packages it imported
+    """
+    code = f"import {module}" if module else "pass"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - start) * 1000
+
+    cumulative = 0.0
+    packages = set()
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        packages.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+    return wall, cumulative, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=['event_fetch_backend', 'cli'], help='Modules to import')
+    parser.add_argument('--repeat', type=int, default=7, help='Runs per module (median is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the server module from touching the real event store or starting background work
+        env = dict(os.environ, EVENT_STORE_URL=f"sqlite:///{os.path.join(tmp, 'events.db')}",
+                   PREWARM_INTERVAL='0', SHARED_CACHE_URL='')
+        env.pop('PYTHONSTARTUP', None)
+
+        baseline = statistics.median(run_import('', env)[0] for _ in range(args.repeat))
+        print(f"Bare interpreter start: {baseline:.0f} ms (subtracted from wall times)\n")
+        print(f"{'module':<22} {'wall':>9} {'imports':>9}  heavy dependencies loaded")
+
+        medians: List[float] = []
+        for module in args.modules:
+            runs = [run_import(module, env) for _ in range(args.repeat)]
+            wall = statistics.median(run[0] for run in runs) - baseline
+            cumulative = statistics.median(run[1] for run in runs)
+            heavy = [name for name in HEAVY_MODULES if name in runs[0][2]]
+            medians.append(cumulative)
+            print(f"{module:<22} {wall:7.0f}ms {cumulative:7.0f}ms  {', '.join(heavy) or '-'}")
+
+    if len(medians) == 2 and medians[1]:
+        print(f"\n{args.modules[0]} takes {medians[0] / medians[1]:.1f}x as long to import as {args.modules[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark JSON-LD extraction with and without building a full DOM.
+
+Usage:
+    python benchmarks/json_ld_parse.py [page.html ...] [--repeat N]
+
+With no files, a synthetic listing page (JSON-LD block plus a few hundred
+KB of card markup) is used.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup, SoupStrainer  # noqa: E402
+
+from scraper import EventScraper  # noqa: E402
+
+
+def synthetic_page(num_events: int = 40) -> str:
+    """Build a listing page that resembles an Eventbrite city page."""
+    events = [{
+        "@type": "Event",
+        "name": f"Event {i}",
+        "startDate": "2025-05-23T19:00:00Z",
+        "location": {"name": f"Venue {i}", "address": {"addressLocality": "Bangalore"}},
+        "url": f"https://www.eventbrite.com/e/event-{i}",
+        "description": "An evening of music and talks. " * 10,
+        "image": f"https://img.evbuc.com/{i}.jpg"
+    } for i in range(num_events)]
+    cards = "".join(
+        f'<div data-testid="event-card" class="event-card"><a href="/e/event-{i}">'
+        f'<h3>Event {i}</h3></a><p class="event-card-date">Fri, May 23</p>'
+        f'<p class="event-card-location">Venue {i}</p>'
+        f'<div class="card-desc">{"Lorem ipsum dolor sit amet. " * 20}</div>'
+        f'<img src="https://img.evbuc.com/{i}.jpg"></div>'
+        for i in range(num_events * 5)
+    )
+    return (
+        '<html><head><title>Events</title>'
+        f'<script type="application/ld+json">{json.dumps(events)}</script>'
+        f'</head><body><div class="results">{cards}</div></body></html>'
+    )
+
+
+def time_it(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Run fn `repeat` times and return the wall times in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='HTML files to benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per variant')
+    args = parser.parse_args()
+
+    pages = [open(path, encoding='utf-8').read() for path in args.pages] or [synthetic_page()]
+    scraper = EventScraper('benchmark')
+    strainer = SoupStrainer('script', attrs={'type': 'application/ld+json'})
+
+    variants = {
+        'full DOM (html.parser)': lambda html: scraper.extract_json_ld_events(BeautifulSoup(html, 'html.parser')),
+        'SoupStrainer (lxml)': lambda html: scraper.extract_json_ld_events(BeautifulSoup(html, 'lxml', parse_only=strainer)),
+        'fast path (regex)': scraper.extract_json_ld_events_from_html,
+    }
+
+    for index, html in enumerate(pages):
+        print(f"Page {index + 1}: {len(html) / 1024:.0f} KB")
+        expected = None
+        for name, extract in variants.items():
+            try:
+                found = extract(html)
+            except Exception as e:
+                print(f"  {name:<24} skipped ({e})")
+                continue
+            if expected is None:
+                expected = found
+            elif found != expected:
+                print(f"  {name:<24} WARNING: result differs from full DOM")
+            times = time_it(lambda: extract(html), args.repeat)
+            print(f"  {name:<24} median {statistics.median(times):8.2f} ms  "
+                  f"min {min(times):8.2f} ms  ({len(found)} events)")
+
+
+if __name__ == '__main__':
+    main()
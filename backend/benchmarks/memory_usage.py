@@ -0,0 +1,170 @@
+"""
+Measure peak memory of concurrent city scrapes.
+
+Serves the recorded fixtures, padded with extra markup to the size of
+real Eventbrite pages, and runs N city scrapes at once in a fresh process
+per N, reporting how far the process's peak RSS rises above its level
+after a warm-up scrape (the peak is reset after the warm-up on Linux).
+Pass --baseline-tree with another checkout of backend/ (e.g. from
+`git worktree add`) to measure it side by side.
+
+Usage:
+    python benchmarks/memory_usage.py --concurrency 1,4,8 --padding-kb 400
+    python benchmarks/memory_usage.py --baseline-tree /tmp/before/backend
+"""
+import argparse
+import gc
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixture_server import FIXTURES_DIR, FixtureServer  # noqa: E402
+
+
+def padded_fixtures(target_dir: str, padding_kb: int) -> None:
+    """
+    Copy the fixtures, adding page furniture (navigation, promos, scripts)
+    to every page so the pages are about as heavy as real ones.
+
+    Args:
+        target_dir (str): Directory to write the padded fixtures to
+        padding_kb (int): Approximate extra markup per page in KB
+    """
+    block = ('<div class="promo-tile"><a href="/promo"><img src="/p.jpg" alt="promo"></a>'
+             '<p class="promo-text">Discover more things to do near you this weekend</p></div>\n')
+    padding = block * (padding_kb * 1024 // len(block))
+    for path in glob.glob(os.path.join(FIXTURES_DIR, '*.html')):
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        with open(os.path.join(target_dir, os.path.basename(path)), 'w', encoding='utf-8') as f:
+            f.write(page.replace('</body>', padding + '</body>', 1))
+
+
+def reset_peak_rss() -> None:
+    """Start a new peak RSS measurement (Linux only; elsewhere the peak includes the warm-up)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes since the last reset."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure(concurrency: int, max_events: int) -> Dict[str, float]:
+    """
+    Run in the child process: warm up, then scrape `concurrency` cities at once.
+
+    Returns:
+        Dict[str, float]: Peak RSS growth in bytes, the number of events scraped and
+            the wall time in seconds
+    """
+    try:
+        from scraper import EventScraper
+        from rate_limit import HostRateLimiter
+    except ImportError:
+        # Checkouts from before the scraper was split out of the web module
+        from event_fetch_backend import EventScraper, HostRateLimiter
+
+    # Load every lazily imported module and warm the allocator before the baseline
+    EventScraper('warmup', max_events, delay=0).scrape_events()
+    gc.collect()
+    reset_peak_rss()
+    before = peak_rss()
+
+    rate_limiter = HostRateLimiter(0)
+    fetch_slots = threading.BoundedSemaphore(max(4, concurrency))
+
+    def scrape(index: int) -> int:
+        scraper = EventScraper(f'city-{index}', max_events, delay=0, rate_limiter=rate_limiter,
+                               fetch_slots=fetch_slots)
+        return len(scraper.scrape_events())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        events = sum(executor.map(scrape, range(concurrency)))
+    return {'growth': peak_rss() - before, 'events': events, 'seconds': time.perf_counter() - start}
+
+
+def run_child(tree: str, concurrency: int, max_events: int, base_url: str) -> Dict[str, float]:
+    """Measure one concurrency level in a fresh interpreter using the backend in `tree`."""
+    env = dict(os.environ, EVENTBRITE_BASE_URL=base_url, SCRAPER_DELAY='0', EVENT_STORE_URL='',
+               PREWARM_INTERVAL='0', PYTHONPATH=tree)
+    env.pop('PARSE_WORKERS', None)
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(concurrency),
+                             '--max-events', str(max_events)],
+                            cwd=tree, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma-separated numbers of concurrent scrapes')
+    parser.add_argument('--max-events', type=int, default=40, help='maxEvents per scrape')
+    parser.add_argument('--padding-kb', type=int, default=400, help='Extra markup added to every page')
+    parser.add_argument('--baseline-tree', help='Another backend/ directory to measure for comparison')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(measure(args.child, args.max_events)))
+        return
+
+    trees = {'current': BACKEND_DIR}
+    if args.baseline_tree:
+        trees = {'baseline': os.path.abspath(args.baseline_tree), **trees}
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    fixtures_dir = tempfile.mkdtemp()
+    try:
+        padded_fixtures(fixtures_dir, args.padding_kb)
+        server = FixtureServer(fixtures_dir=fixtures_dir).start()
+        print(f"Pages padded by {args.padding_kb} KB, {args.max_events} events per scrape\n")
+        print(f"{'tree':<10} {'scrapes':>8} {'events':>7} {'time':>7} {'peak RSS growth':>16} {'per scrape':>11}")
+        results: Dict[str, List[Optional[float]]] = {}
+        for name, tree in trees.items():
+            for level in levels:
+                result = run_child(tree, level, args.max_events, server.url)
+                per_scrape = result['growth'] / level / 2 ** 20
+                results.setdefault(name, []).append(per_scrape)
+                print(f"{name:<10} {level:>8} {result['events']:>7} {result['seconds']:>6.1f}s "
+                      f"{result['growth'] / 2 ** 20:>13.1f} MB {per_scrape:>8.1f} MB")
+        server.stop()
+    finally:
+        shutil.rmtree(fixtures_dir, ignore_errors=True)
+
+    if 'baseline' in results:
+        print()
+        for level, before, after in zip(levels, results['baseline'], results['current']):
+            if before:
+                print(f"{level} concurrent: {(after - before) / before * 100:+.0f}% peak RSS per scrape")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Record live Eventbrite pages into benchmarks/fixtures for offline benchmarks.
+
+Listing pages are saved as listing_page<N>.html and the first few event
+pages they link to as detail_<slug>.html, with the site URL replaced by
+"{{base}}" so the fixture server can serve them under its own address.
+
+Usage:
+    python benchmarks/record_fixtures.py bangalore --pages 3 --details 10
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from scraper import EventScraper  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def save(name: str, html: str, base_url: str) -> None:
+    """Write a page to the fixtures directory with the site URL templated out."""
+    with open(os.path.join(FIXTURES_DIR, name), 'w', encoding='utf-8') as f:
+        f.write(html.replace(base_url, '{{base}}'))
+    print(f"Saved {name} ({len(html) / 1024:.0f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('city')
+    parser.add_argument('--pages', type=int, default=2, help='Listing pages to record')
+    parser.add_argument('--details', type=int, default=10, help='Event pages to record')
+    args = parser.parse_args()
+
+    scraper = EventScraper(args.city)
+    detail_urls = []
+    for page in range(1, args.pages + 1):
+        html = scraper.fetch_page(scraper.get_listing_url(page))
+        if not html:
+            break
+        save(f"listing_page{page}.html", html, scraper.base_url)
+        for card in BeautifulSoup(html, 'html.parser').select('a[href*="/e/"]'):
+            url = scraper.extract_event_link(card.parent)
+            if url and url not in detail_urls:
+                detail_urls.append(url)
+
+    for url in detail_urls[:args.details]:
+        html = scraper.fetch_page(url)
+        if html:
+            slug = url.split('/e/')[1].split('?')[0].strip('/')
+            save(f"detail_{slug}.html", html, scraper.base_url)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Offline benchmark suite for the event scraper.
+
+Starts the fixture server (a local stand-in for eventbrite.com), points
+the scraper at it and reports throughput and p50/p95/p99 latency for:
+
+    make_request                  fetch + parse of one event page
+    extract_json_ld_events        JSON-LD extraction from a parsed listing page
+    extract_html_event_details    field extraction from one event card
+    scrape_events                 a full city scrape, end to end
+    api_events                    POST /api/events under concurrent load (cold cache)
+    api_events_cached             POST /api/events under concurrent load (warm cache)
+
+Results are written to benchmarks/results/<timestamp>.json; pass
+--compare with an earlier file to print the change per benchmark.
+
+Usage:
+    python benchmarks/run_benchmarks.py --latency 50 --jitter 20 --error-rate 0.01
+    python benchmarks/run_benchmarks.py --only scrape_events,api_events --compare benchmarks/results/<file>.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+def run_benchmark(fn: Callable[[int], Any], iterations: int, concurrency: int = 1) -> Dict[str, float]:
+    """
+    Call fn(i) for i in range(iterations) on `concurrency` threads and summarize the timings.
+
+    A call counts as an error if it raises or returns None.
+
+    Returns:
+        Dict[str, float]: count, errors, throughput (ops/s), mean/p50/p95/p99 latency in ms
+    """
+    samples = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(i: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = fn(i) is not None
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(elapsed)
+            if not ok:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, range(iterations)))
+    else:
+        for i in range(iterations):
+            timed(i)
+    wall = time.perf_counter() - wall_start
+
+    samples.sort()
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'throughput': len(samples) / wall if wall else 0.0,
+        'mean_ms': sum(samples) / len(samples) if samples else 0.0,
+        'p50_ms': percentile(samples, 50),
+        'p95_ms': percentile(samples, 95),
+        'p99_ms': percentile(samples, 99)
+    }
+
+
+def build_benchmarks(args: argparse.Namespace, base_url: str) -> Dict[str, Callable[[], Dict[str, float]]]:
+    """Create the benchmark callables (imports the scraper after the environment is set)."""
+    import requests
+    from werkzeug.serving import make_server
+
+    import event_fetch_backend as backend
+
+    scraper = backend.EventScraper('bench', max_events=args.max_events, delay=0)
+    listing = scraper.parse_html(scraper.fetch_page(scraper.get_listing_url(1)))
+    cards = listing.select('[data-testid="event-card"]')
+    card_urls = [scraper.extract_event_link(card) for card in cards]
+
+    def scrape(i: int) -> List[Dict[str, str]]:
+        return backend.EventScraper(f"bench-city-{i}", max_events=args.max_events, delay=0).scrape_events()
+
+    def api_benchmark(cached: bool) -> Dict[str, float]:
+        server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}/api/events"
+        local = threading.local()
+
+        def post(i: int) -> Any:
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            city = 'bench-cached' if cached else f"bench-api-{time.time_ns()}-{i}"
+            response = local.session.post(url, json={'city': city, 'maxEvents': args.max_events}, timeout=120)
+            return response.json() if response.status_code == 200 else None
+
+        try:
+            if cached:
+                post(0)
+            return run_benchmark(post, args.api_requests, args.concurrency)
+        finally:
+            server.shutdown()
+
+    return {
+        'make_request': lambda: run_benchmark(
+            lambda i: scraper.make_request(f"{base_url}/e/bench-event-{i}-tickets"),
+            args.iterations, args.concurrency),
+        'extract_json_ld_events': lambda: run_benchmark(
+            lambda i: scraper.extract_json_ld_events(listing), args.iterations),
+        'extract_html_event_details': lambda: run_benchmark(
+            lambda i: scraper.extract_html_event_details(cards[i % len(cards)], card_urls[i % len(cards)]),
+            args.iterations),
+        'scrape_events': lambda: run_benchmark(scrape, args.scrapes, args.concurrency),
+        'api_events': lambda: api_benchmark(cached=False),
+        'api_events_cached': lambda: api_benchmark(cached=True)
+    }
+
+
+def print_results(results: Dict[str, Dict[str, float]], previous: Dict[str, Dict[str, float]]) -> None:
+    """Print a results table, with the change against a previous run when given."""
+    print(f"\n{'benchmark':<28}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>8}")
+        before = previous.get(name)
+        if before:
+            changes = []
+            for key in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms'):
+                if before[key]:
+                    changes.append(f"{key} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+            print(f"{'':<28}vs previous: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=50, help='Fixture server delay per response in ms')
+    parser.add_argument('--jitter', type=float, default=20, help='Maximum random extra delay in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of responses answered with 503')
+    parser.add_argument('--iterations', type=int, default=200, help='Calls per micro-benchmark')
+    parser.add_argument('--scrapes', type=int, default=10, help='City scrapes for scrape_events')
+    parser.add_argument('--api-requests', type=int, default=40, help='Requests for the api_events benchmarks')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent callers for I/O benchmarks')
+    parser.add_argument('--max-events', type=int, default=20, help='maxEvents per scrape')
+    parser.add_argument('--only', default='', help='Comma-separated benchmark names to run')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--output', help='Where to save results (default: benchmarks/results/<timestamp>.json)')
+    args = parser.parse_args()
+
+    server = FixtureServer(latency=args.latency / 1000, jitter=args.jitter / 1000,
+                           error_rate=args.error_rate).start()
+    # Point the scraper at the stand-in and keep it free of politeness delays,
+    # persistent state and background work so runs are comparable
+    os.environ['EVENTBRITE_BASE_URL'] = server.url
+    os.environ['SCRAPER_DELAY'] = '0'
+    os.environ['EVENT_STORE_URL'] = ''
+    os.environ['PREWARM_INTERVAL'] = '0'
+
+    import logging
+    logging.getLogger('event_scraper').setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    benchmarks = build_benchmarks(args, server.url)
+    selected = [name.strip() for name in args.only.split(',') if name.strip()] or list(benchmarks)
+
+    results = {}
+    for name in selected:
+        print(f"Running {name}...", flush=True)
+        results[name] = benchmarks[name]()
+    server.stop()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)['results']
+    print_results(results, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'config': vars(args), 'fixture_requests': server.stats(), 'results': results}, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
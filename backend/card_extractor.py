@@ -0,0 +1,322 @@
+"""
+Single-pass extraction of event fields from HTML.
+
+The field rules used to be a series of CSS selects such as
+`[class*="date"], time, [datetime]`, each re-walking the card or page. Here
+they are compiled into plain predicates once, and every node is classified
+for all fields in one traversal. The precedence rules are unchanged: within
+a field, tiers are tried in order and the first accepted node in document
+order wins.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import Tag
+
+# Value of a node for a field, or None to skip the node
+ValueFn = Callable[[Tag], Optional[str]]
+# Whether a node (given its joined class attribute) is considered by a tier
+MatchFn = Callable[[Tag, str], bool]
+
+
+class Match:
+    """
+    A compiled selector list: a node matches if any of the alternatives does.
+
+    Only the forms the extraction rules use are supported: tag names, a
+    substring of the class attribute, a substring or exact value of another
+    attribute, and attribute presence.
+    """
+
+    def __init__(self, tags: Sequence[str] = (), class_contains: Sequence[str] = (),
+                 attr_contains: Sequence[Tuple[str, str]] = (), attr_equals: Sequence[Tuple[str, str]] = (),
+                 has_attrs: Sequence[str] = ()):
+        """
+        Initialize the Match.
+
+        Args:
+            tags (Sequence[str]): Tag names, e.g. ('time',) for `time`
+            class_contains (Sequence[str]): Class substrings, e.g. ('date',) for `[class*="date"]`
+            attr_contains (Sequence[Tuple[str, str]]): (attribute, substring) pairs for `[attr*="..."]`
+            attr_equals (Sequence[Tuple[str, str]]): (attribute, value) pairs for `[attr="..."]`
+            has_attrs (Sequence[str]): Attribute names for `[attr]`
+        """
+        self.tags = frozenset(tags)
+        self.class_contains = tuple(class_contains)
+        self.attr_contains = tuple(attr_contains)
+        self.attr_equals = tuple(attr_equals)
+        self.has_attrs = tuple(has_attrs)
+
+    def __call__(self, tag: Tag, classes: str) -> bool:
+        """
+        Check a node.
+
+        Args:
+            tag (Tag): Element to check
+            classes (str): The element's class attribute joined with spaces
+
+        Returns:
+            bool: Whether the node matches
+        """
+        if tag.name in self.tags:
+            return True
+        if classes and any(part in classes for part in self.class_contains):
+            return True
+        attrs = tag.attrs
+        for name, part in self.attr_contains:
+            value = attrs.get(name)
+            if value is not None and part in attr_text(value):
+                return True
+        for name, expected in self.attr_equals:
+            value = attrs.get(name)
+            if value is not None and attr_text(value) == expected:
+                return True
+        return any(name in attrs for name in self.has_attrs)
+
+
+class Tier:
+    """One level of precedence within a field."""
+
+    def __init__(self, match: MatchFn, value: ValueFn, first_only: bool = False, exclusive: bool = False):
+        """
+        Initialize the Tier.
+
+        Args:
+            match (MatchFn): Nodes considered by this tier, usually a Match
+            value (ValueFn): Value of a matching node, or None to try the next one
+            first_only (bool): Only consider the first matching node (like `find`)
+            exclusive (bool): Skip later tiers whenever this tier matched any node,
+                even if none was accepted
+        """
+        self.match = match
+        self.value = value
+        self.first_only = first_only
+        self.exclusive = exclusive
+
+
+class Field:
+    """An output field with its tiers and default value."""
+
+    def __init__(self, name: str, tiers: List[Tier], default: str):
+        """
+        Initialize the Field.
+
+        Args:
+            name (str): Output key
+            tiers (List[Tier]): Tiers in order of precedence
+            default (str): Value used when no tier produces one
+        """
+        self.name = name
+        self.tiers = tiers
+        self.default = default
+
+
+class ExtractionPlan:
+    """
+    A set of fields extracted together in one traversal of an element's descendants.
+    """
+
+    def __init__(self, fields: List[Field]):
+        """
+        Initialize the ExtractionPlan.
+
+        Args:
+            fields (List[Field]): Fields to extract
+        """
+        self.fields = fields
+        self.tiers = [tier for field in fields for tier in field.tiers]
+        self.first_tiers = []
+        position = 0
+        for field in fields:
+            self.first_tiers.append(position)
+            position += len(field.tiers)
+
+    def extract(self, root: Tag) -> Dict[str, str]:
+        """
+        Extract all fields from the descendants of an element.
+
+        Args:
+            root (Tag): Card or document to extract from
+
+        Returns:
+            Dict[str, str]: Field values, or their defaults
+        """
+        # Per tier: whether any node matched, and the accepted value
+        matched = [False] * len(self.tiers)
+        values: List[Optional[str]] = [None] * len(self.tiers)
+        done = [False] * len(self.tiers)
+
+        for node in root.descendants:
+            if not isinstance(node, Tag):
+                continue
+            classes = attr_text(node.get('class', ''))
+            for position, tier in enumerate(self.tiers):
+                if done[position] or not tier.match(node, classes):
+                    continue
+                matched[position] = True
+                value = tier.value(node)
+                if value is not None:
+                    values[position] = value
+                    done[position] = True
+                elif tier.first_only:
+                    done[position] = True
+            # A value from a field's first tier cannot be overridden; stop once all fields have one
+            if all(values[position] is not None for position in self.first_tiers):
+                break
+
+        result = {}
+        position = 0
+        for field in self.fields:
+            value = None
+            for tier in field.tiers:
+                if value is None:
+                    value = values[position]
+                    if value is None and tier.exclusive and matched[position]:
+                        value = field.default
+                position += 1
+            result[field.name] = field.default if value is None else value
+        return result
+
+
+class SelectorChain:
+    """
+    Ordered fallback selectors that remember which one matched last.
+
+    Pages from one site share a layout, so the selector that found the event
+    cards on the previous page is tried first on the next one.
+    """
+
+    def __init__(self, selectors: Iterable[str]):
+        """
+        Initialize the SelectorChain.
+
+        Args:
+            selectors (Iterable[str]): CSS selectors in order of preference
+        """
+        self.selectors = list(selectors)
+        self.patterns = [soupsieve.compile(selector) for selector in self.selectors]
+        self.last = 0
+
+    def select(self, root: Any) -> List[Tag]:
+        """
+        Return the matches of the first selector that matches anything,
+        starting with the one that matched last time.
+
+        Args:
+            root (Any): BeautifulSoup document or element
+
+        Returns:
+            List[Tag]: Matching elements (empty if no selector matches)
+        """
+        last = self.last
+        order = [last] + [index for index in range(len(self.patterns)) if index != last]
+        for index in order:
+            found = self.patterns[index].select(root)
+            if found:
+                self.last = index
+                return found
+        return []
+
+
+def attr_text(value: Any) -> str:
+    """Join a multi-valued attribute (e.g. class) the way CSS attribute selectors see it."""
+    if isinstance(value, (list, tuple)):
+        return ' '.join(value)
+    return value
+
+
+def text_value(min_length: int = 1, max_length: Optional[int] = None, single_line: bool = False) -> ValueFn:
+    """
+    Accept a node's stripped text when it fits the given limits.
+
+    Args:
+        min_length (int): Shortest accepted text
+        max_length (Optional[int]): Texts of this length or longer are rejected
+        single_line (bool): Reject texts containing a newline
+
+    Returns:
+        ValueFn: Value function for a Tier
+    """
+    def value(tag: Tag) -> Optional[str]:
+        text = tag.text.strip()
+        if len(text) < min_length or (max_length is not None and len(text) >= max_length):
+            return None
+        if single_line and '\n' in text:
+            return None
+        return text
+    return value
+
+
+def attr_value(name: str, required: bool = True) -> ValueFn:
+    """
+    Take a node's attribute.
+
+    Args:
+        name (str): Attribute name
+        required (bool): Reject the node when the attribute is missing or empty;
+            otherwise use an empty string
+
+    Returns:
+        ValueFn: Value function for a Tier
+    """
+    def value(tag: Tag) -> Optional[str]:
+        found = tag.get(name) or ''
+        if not found and required:
+            return None
+        return found
+    return value
+
+
+HEADINGS = Match(tags=('h1', 'h2', 'h3', 'h4', 'h5'))
+DATES = Match(tags=('time',), class_contains=('date', 'time'), has_attrs=('datetime',))
+GENERIC_LOCATIONS = Match(class_contains=('location', 'venue', 'address', 'place'))
+
+# Fields of an event card on a listing page
+CARD_PLAN = ExtractionPlan([
+    Field('name', [
+        Tier(HEADINGS, text_value()),
+        Tier(Match(tags=('strong', 'b'), class_contains=('title', 'name')), text_value(min_length=6)),
+    ], 'Untitled Event'),
+    Field('date_time', [Tier(DATES, text_value())], 'Date not available'),
+    Field('location', [
+        # Looking for elements that are more likely to contain just the location
+        Tier(Match(class_contains=('address-line',), attr_contains=(('aria-label', 'location'),),
+                   attr_equals=(('data-automation', 'venue'),)),
+             text_value(max_length=100), exclusive=True),
+        Tier(GENERIC_LOCATIONS, text_value(max_length=100)),
+    ], 'Location not available'),
+    Field('description', [Tier(Match(class_contains=('desc', 'summary', 'about')), text_value())],
+          'No description available'),
+    Field('image', [Tier(Match(tags=('img',)), attr_value('src'), first_only=True)], ''),
+])
+
+# Fields of an individual event page without JSON-LD
+PAGE_PLAN = ExtractionPlan([
+    Field('name', [Tier(Match(tags=('h1',)), lambda tag: tag.text.strip(), first_only=True)], 'Untitled Event'),
+    Field('date_time', [Tier(DATES, text_value())], 'Date not available'),
+    Field('location', [
+        # Structured location data first, then schema markup, then generic classes
+        Tier(Match(class_contains=('venue-name', 'address-line'),
+                   attr_contains=(('aria-label', 'venue'), ('aria-label', 'location'))),
+             text_value(max_length=150)),
+        Tier(lambda tag, classes: tag.name == 'meta' and tag.get('property') == 'event:location',
+             attr_value('content'), first_only=True),
+        Tier(GENERIC_LOCATIONS, text_value(max_length=100, single_line=True)),
+    ], 'Location not available'),
+    # The first candidate wins even if it has no content attribute, as before
+    Field('description', [
+        Tier(Match(class_contains=('desc', 'summary', 'about'), attr_equals=(('property', 'og:description'),)),
+             attr_value('content', required=False), first_only=True),
+    ], 'No description available'),
+    Field('image', [Tier(lambda tag, classes: tag.name == 'meta' and tag.get('property') == 'og:image',
+                         attr_value('content'), first_only=True)], ''),
+])
+
+# Selectors for event cards on listing pages, in order of preference; the one
+# that matched last is tried first on later pages
+EVENT_CARD_SELECTORS = SelectorChain([
+    '[data-testid="event-card"]',
+    'div[data-event-id], article[data-event-id]',
+    'div.event-card, div.eds-event-card-content, article.eds-l-pad-all-4',
+    'div.search-event-card-square-image'
+])
@@ -0,0 +1,271 @@
+"""
+Command-line event scraper.
+
+Batch mode reads cities from a file (or stdin), scrapes them in parallel
+under one rate limit and writes the events as JSON lines or CSV:
+
+    python cli.py cities.txt -o events.jsonl
+    echo "london:20" | python cli.py - --format csv > events.csv
+
+Each input line is a city, optionally followed by ":<max events>"; blank
+lines and lines starting with "#" are skipped. Run without arguments in a
+terminal for the interactive prompt.
+
+Only the scraping core is imported; Flask, the web server's caches and,
+unless --store is given, SQLAlchemy are never loaded.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from rate_limit import HostRateLimiter
+from result_cache import ResultCache
+from scraper import DEFAULT_DELAY, MAX_EVENTS, normalize_city
+from sources import FanOut
+
+logger = logging.getLogger('event_scraper')
+
+CSV_FIELDS = ['city', 'name', 'date_time', 'start', 'location', 'link', 'description', 'image', 'source']
+
+
+def read_cities(lines: Iterable[str], max_events: int) -> List[Tuple[str, int]]:
+    """
+    Parse a city list.
+
+    Args:
+        lines (Iterable[str]): Lines such as "bangalore" or "new-york:20"
+        max_events (int): Max events for cities that don't give one
+
+    Returns:
+        List[Tuple[str, int]]: (normalized city, max events) pairs, without duplicates
+    """
+    cities = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        city, _, count = line.partition(':')
+        count = int(count) if count.strip().isdigit() else max_events
+        cities[normalize_city(city)] = min(max(1, count), MAX_EVENTS)
+    return list(cities.items())
+
+
+class EventWriter:
+    """
+    Writes events of several cities to one JSONL or CSV stream, one city at a time.
+    """
+
+    def __init__(self, stream: TextIO, output_format: str):
+        """
+        Initialize the EventWriter.
+
+        Args:
+            stream (TextIO): Output stream
+            output_format (str): "jsonl" or "csv"
+        """
+        self.stream = stream
+        self.output_format = output_format
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            self.csv_writer.writeheader()
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def write(self, city: str, events: List[Dict[str, Any]]) -> None:
+        """Write one city's events."""
+        with self.lock:
+            for event in events:
+                row = dict(event, city=city)
+                if self.csv_writer:
+                    self.csv_writer.writerow(row)
+                else:
+                    self.stream.write(json.dumps(row) + '\n')
+            self.stream.flush()
+            self.count += len(events)
+
+
+def open_store(db_url: Optional[str]) -> Any:
+    """Open the event store if a database URL is given (importing SQLAlchemy only then)."""
+    if not db_url:
+        return None
+    from event_store import EventStore
+    return EventStore(db_url, float(os.environ.get('EVENT_STORE_MAX_AGE', 86400)))
+
+
+def run_batch(cities: List[Tuple[str, int]], writer: EventWriter, concurrency: int = 8,
+              delay: float = DEFAULT_DELAY, scrape_individual: bool = True, event_store: Any = None) -> int:
+    """
+    Scrape cities in parallel under one per-host rate limit and write their events.
+
+    Args:
+        cities (List[Tuple[str, int]]): (city, max events) pairs
+        writer (EventWriter): Output for each city's events, written as the city finishes
+        concurrency (int): Maximum number of cities scraped and requests in flight at once
+        delay (float): Average delay between requests to the same host
+        scrape_individual (bool): Whether to fetch each event's detail page
+        event_store (Any): EventStore consulted before fetching event pages
+
+    Returns:
+        int: Number of cities that failed
+    """
+    concurrency = max(1, concurrency)
+    sources = FanOut.from_env(event_store)
+    options = dict(delay=delay, rate_limiter=HostRateLimiter(delay),
+                   fetch_slots=threading.BoundedSemaphore(concurrency),
+                   page_cache=ResultCache(max_entries=max(1, sum(n for _, n in cities)), name='batch_pages'),
+                   scrape_individual=scrape_individual)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(cities)) or 1) as executor:
+        futures = {executor.submit(sources.scrape, city, max_events, **options): city for city, max_events in cities}
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                events = future.result()
+            except Exception as e:
+                logger.error(f"Error scraping {city}: {e}")
+                failed += 1
+                continue
+            writer.write(city, events)
+            logger.info(f"{city}: {len(events)} events")
+    return failed
+
+
+def display_events(events: List[Dict[str, str]], include_description: bool = False) -> None:
+    """
+    Display events in a clean, formatted way.
+
+    Args:
+        events (List[Dict[str, str]]): List of event dictionaries
+        include_description (bool): Whether to include event descriptions
+    """
+    if not events:
+        print("\n📅 No events found.")
+        print("Suggestions:")
+        print("1. Try a different city format (e.g., 'new-york' instead of 'new york')")
+        print("2. Try a major city like 'san-francisco' or 'london'")
+        return
+
+    print(f"\n📅 Found {len(events)} upcoming events:\n")
+
+    for i, event in enumerate(events, 1):
+        print(f"🎟️ EVENT #{i}: {event['name']}")
+        print(f"   📅 When: {event['date_time']}")
+
+        # Keep location formatting simple and brief
+        location = event['location']
+        print(f"   📍 Where: {location}")
+
+        if include_description and event['description'] != 'No description available':
+            # Limit description length
+            desc = event['description']
+            if len(desc) > 150:
+                desc = desc[:147] + "..."
+            print(f"   ℹ️  Info: {desc}")
+
+        print(f"   🔗 Link: {event['link']}")
+        print()
+
+
+def interactive(event_store: Any = None) -> None:
+    """Prompt for one city and print its events."""
+    print("=== 🎭 Event Finder 🎭 ===")
+
+    while True:
+        city = input("Enter city name (e.g., bangalore, san-francisco, new-york): ").strip()
+        if not city:
+            print("City name cannot be empty. Please try again.")
+            continue
+        break
+
+    print(f"🔍 Searching for events in {city.title()}...")
+
+    try:
+        # Get number of events
+        max_events_input = input("Number of events to fetch (default: 5): ").strip()
+        max_events = 5
+        if max_events_input and max_events_input.isdigit():
+            max_events = int(max_events_input)
+            max_events = min(max(1, max_events), MAX_EVENTS)  # Limit between 1 and MAX_EVENTS
+
+        # Ask if user wants descriptions
+        show_descriptions = input("Show event descriptions? (y/n, default: n): ").strip().lower() == 'y'
+
+        events = FanOut.from_env(event_store).scrape(city, max_events)
+        display_events(events, include_description=show_descriptions)
+
+    except KeyboardInterrupt:
+        print("\n\nSearch cancelled by user.")
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        print(f"\n❌ An error occurred: {e}")
+        print("Please try again with a different city or check your internet connection.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command-line scraper: the interactive prompt when stdin is a
+    terminal and no cities file is given, otherwise a batch run.
+
+    Args:
+        argv (Optional[List[str]]): Command-line arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Exit status; 1 if any city failed in batch mode
+    """
+    parser =argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cities', nargs='?', default='-', help='File with one city per line, or - for stdin')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Output format (default: from the output file extension, else jsonl)')
+    parser.add_argument('--max-events', type=int, default=10, help='Events per city without ":<n>"')
+    parser.add_argument('--concurrency', type=int, default=8, help='Cities and requests in flight at once')
+    parser.add_argument('--delay', type=float, default=DEFAULT_DELAY, help='Seconds between requests to a host')
+    parser.add_argument('--no-details', action='store_true', help="Don't fetch event detail pages")
+    parser.add_argument('--store', default=os.environ.get('EVENT_STORE_URL'),
+                        help='Event store database URL (default: EVENT_STORE_URL, else none)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log progress to stderr')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    event_store = open_store(args.store)
+
+    if args.cities == '-' and sys.stdin.isatty():
+        interactive(event_store)
+        return 0
+
+    if args.cities == '-':
+        cities = read_cities(sys.stdin, args.max_events)
+    else:
+        with open(args.cities, encoding='utf-8') as f:
+            cities = read_cities(f, args.max_events)
+    if not cities:
+        parser.error('no cities given')
+
+    output_format = args.format or ('csv' if (args.output or '').endswith('.csv') else 'jsonl')
+    start = time.perf_counter()
+    stream = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        writer = EventWriter(stream, output_format)
+        failed = run_batch(cities, writer, concurrency=args.concurrency, delay=args.delay,
+                           scrape_individual=not args.no_details, event_store=event_store)
+    finally:
+        if args.output:
+            stream.close()
+
+    print(f"Wrote {writer.count} events for {len(cities) - failed} of {len(cities)} cities "
+          f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
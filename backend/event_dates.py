@@ -0,0 +1,346 @@
+"""
+Normalize event date text into UTC timestamps.
+
+JSON-LD dates are ISO 8601; card and event page dates are display text
+such as "Fri, Jun 1 · 5:30 PM" or "Saturday, June 14 · 7 - 10pm IST". Texts
+are cleaned up, then tried against a list of known formats (the one that
+matched last is tried first). What is left is parsed in one vectorized
+pandas call when pandas is installed, or with dateutil, if available.
+
+Times without a zone are taken as UTC, which can be off by the event's
+offset (see `has_zone`); dates without a year are taken to be upcoming.
+Relative dates ("Tomorrow at 7:00 PM", "Thursday at 5:30 PM") are resolved
+against the current date and never cached.
+"""
+import importlib
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+
+# Offsets of zone abbreviations Eventbrite shows next to times, in minutes
+ZONE_OFFSETS = {
+    'UTC': 0, 'GMT': 0, 'BST': 60, 'CET': 60, 'CEST': 120, 'EET': 120, 'EEST': 180,
+    'IST': 330, 'SGT': 480, 'JST': 540, 'AEST': 600, 'AEDT': 660,
+    'EST': -300, 'EDT': -240, 'CST': -360, 'CDT': -300, 'MST': -420, 'MDT': -360, 'PST': -480, 'PDT': -420,
+}
+
+SEPARATOR_RE = re.compile(r'\s*(?:·|•|\||\bat\b|@)\s*', re.IGNORECASE)
+TIME_RANGE_RE = re.compile(r'(\d{1,2}(?::\d{2})?)\s*(am|pm)?\s*[-–]\s*\d{1,2}(?::\d{2})?\s*(am|pm)?', re.IGNORECASE)
+HOUR_ONLY_RE = re.compile(r'(?<![:\d])(\d{1,2})\s*(am|pm)\b', re.IGNORECASE)
+GLUED_MERIDIEM_RE = re.compile(r'(\d)(am|pm)\b', re.IGNORECASE)
+ZONE_RE = re.compile(r'\s*\b(' + '|'.join(ZONE_OFFSETS) + r')\b\s*$')
+YEAR_RE = re.compile(r'\b\d{4}\b')
+# "+ 2 more" after the first date of a recurring event
+MORE_DATES_RE = re.compile(r'\s*\+\s*\d+\s*more\b.*$', re.IGNORECASE)
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+# A day named relative to today, followed by a time or nothing (not by a month)
+RELATIVE_DAY_RE = re.compile(r'^(today|tomorrow|' + '|'.join(day[:3] + '(?:' + day[3:] + ')?' for day in WEEKDAYS)
+                             + r')\b,?\s*(?=\d|$)', re.IGNORECASE)
+# The day of month after a month name, where a missing year goes (never a time's hour)
+MONTH_DAY_RE = re.compile(r'^((?:\w+,?\s+)?(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2})'
+                          r'(?![\d:]),?', re.IGNORECASE)
+
+
+def _build_formats() -> List[str]:
+    """All combinations of the date layouts seen on listing and event pages (with a year)."""
+    formats = ['%A, %B %d, %Y %I:%M %p']  # cleaned JSON-LD dates, after the " at " is removed
+    for weekday in ('%a, ', '%A, ', ''):
+        for month in ('%b', '%B'):
+            for year in (', %Y', ' %Y'):
+                for time_format in (' %I:%M %p', ' %H:%M', ''):
+                    formats.append(f'{weekday}{month} %d{year}{time_format}')
+    return formats
+
+
+KNOWN_FORMATS = _build_formats()
+
+
+@lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[Any]:
+    """
+    Import an optional dependency the first time it is needed.
+
+    pandas alone takes longer to import than the rest of the scraper, and
+    most texts are parsed without it.
+
+    Args:
+        name (str): Module name, e.g. "dateutil.parser"
+
+    Returns:
+        Optional[Any]: Module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def to_utc_iso(value: datetime) -> str:
+    """
+    Format a datetime as an ISO 8601 UTC timestamp.
+
+    Args:
+        value (datetime): Aware or naive (taken as UTC) datetime
+
+    Returns:
+        str: Timestamp such as "2025-05-23T19:00:00Z"
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO 8601 date or timestamp given by a client, e.g. `startAfter`.
+
+    Args:
+        value (str): "2025-05-23", "2025-05-23T19:00:00Z", ...
+
+    Returns:
+        datetime: Aware UTC datetime
+
+    Raises:
+        ValueError: If the value is not ISO 8601
+    """
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def split_relative_day(text: str) -> Tuple[Optional[str], str]:
+    """
+    Split a leading Today/Tomorrow/weekday from a date text.
+
+    Args:
+        text (str): Date text, e.g. "Tomorrow at 7:00 PM"
+
+    Returns:
+        Tuple[Optional[str], str]: The lowercased day word (None for absolute dates) and the rest
+    """
+    text = SEPARATOR_RE.sub(' ', MORE_DATES_RE.sub('', text.strip())).strip()
+    match = RELATIVE_DAY_RE.match(text)
+    if not match:
+        return None, text
+    return match.group(1).lower(), text[match.end():]
+
+
+def resolve_relative_day(day: str, today: date) -> date:
+    """
+    Get the date a relative day word refers to.
+
+    Listings say "Today" and "Tomorrow" for those days, so a weekday
+    means its next occurrence after today.
+
+    Args:
+        day (str): "today", "tomorrow", or a (possibly abbreviated) weekday name
+        today (date): Current date
+
+    Returns:
+        date: Date of the day
+    """
+    if day == 'today':
+        return today
+    if day == 'tomorrow':
+        return today + timedelta(days=1)
+    weekday = next(index for index, name in enumerate(WEEKDAYS) if name.startswith(day))
+    return today + timedelta(days=(weekday - today.weekday() - 1) % 7 + 1)
+
+
+def has_zone(text: str) -> bool:
+    """
+    Check whether a display date names its time zone.
+
+    Without one the time is local to the event, so its parsed UTC start may
+    be off by up to 14 hours either way.
+
+    Args:
+        text (str): Date text, e.g. "Saturday, June 14 · 7 - 10pm IST"
+
+    Returns:
+        bool: Whether the parsed start is exact
+    """
+    return bool(ZONE_RE.search(split_relative_day(text)[1]))
+
+
+def normalize_text(text: str, today: date) -> Tuple[str, Optional[int], bool]:
+    """
+    Clean a display date so it can be matched against KNOWN_FORMATS.
+
+    Args:
+        text (str): Date text
+        today (date): Current date, for relative days and texts without a year
+
+    Returns:
+        Tuple[str, Optional[int], bool]: Cleaned text (always with a year), zone offset
+            in minutes if a zone was named, and whether the text had its own year
+            (relative days count as having one)
+    """
+    day, text = split_relative_day(text)
+    if day:
+        text = f"{resolve_relative_day(day, today).strftime('%B %d %Y')} {text}"
+    # Keep the start of a time range, borrowing the end's am/pm if needed
+    text = TIME_RANGE_RE.sub(lambda m: m.group(1) + ' ' + (m.group(2) or m.group(3) or ''), text)
+
+    offset = None
+    zone = ZONE_RE.search(text)
+    if zone:
+        offset = ZONE_OFFSETS[zone.group(1)]
+        text = text[:zone.start()]
+
+    text = GLUED_MERIDIEM_RE.sub(r'\1 \2', text)
+    text = HOUR_ONLY_RE.sub(r'\1:00 \2', text)
+    text = ' '.join(text.split())
+
+    has_year = bool(YEAR_RE.search(text))
+    if not has_year:
+        # Insert the year after the day so the layouts with a year match
+        text = MONTH_DAY_RE.sub(rf'\1 {today.year}', text, count=1)
+    return text, offset, has_year
+
+
+class DateParser:
+    """
+    A batched, caching parser from event date text to UTC timestamps.
+    """
+
+    def __init__(self, max_cached: int = 10000):
+        """
+        Initialize the DateParser.
+
+        Args:
+            max_cached (int): Maximum number of parsed texts kept
+        """
+        self.max_cached = max_cached
+        self.cache: Dict[str, Optional[str]] = {}
+        self.last_format = 0
+        self.lock = threading.Lock()
+
+    def parse_one(self, text: str) -> Optional[str]:
+        """
+        Parse one date text.
+
+        Args:
+            text (str): Date text
+
+        Returns:
+            Optional[str]: ISO 8601 UTC timestamp, or None if not recognized
+        """
+        return self.parse_many([text])[0]
+
+    def parse_many(self, texts: Iterable[str], today: Optional[date] = None) -> List[Optional[str]]:
+        """
+        Parse several date texts at once.
+
+        Args:
+            texts (Iterable[str]): Date texts
+            today (Optional[date]): Reference date for texts without a year
+
+        Returns:
+            List[Optional[str]]: ISO 8601 UTC timestamps (None where not recognized), in input order
+        """
+        texts = list(texts)
+        # Another call may clear the cache meanwhile, so keep this call's values at hand
+        with self.lock:
+            found = {text: self.cache[text] for text in texts if text in self.cache}
+        pending = {text for text in texts if text and text not in found}
+        if pending:
+            with metrics.timer('date_parse'):
+                found.update(self._parse_pending(pending, today or datetime.now(timezone.utc).date()))
+        return [found.get(text) if text else None for text in texts]
+
+    def _parse_pending(self, texts: Iterable[str], today: date) -> Dict[str, Optional[str]]:
+        """Parse uncached texts into the cache, vectorizing whatever the known formats miss."""
+        parsed: Dict[str, Optional[str]] = {}
+        leftovers: Dict[str, Tuple[str, Optional[int], bool]] = {}
+
+        for text in texts:
+            try:
+                parsed[text] = to_utc_iso(datetime.fromisoformat(text.strip().replace('Z', '+00:00')))
+                continue
+            except ValueError:
+                pass
+
+            if not any(char.isdigit() for char in text) and split_relative_day(text)[0] is None:
+                # "Date not available" and the like
+                parsed[text] = None
+                continue
+
+            cleaned, offset, has_year = normalize_text(text, today)
+            value = self._match_known(cleaned)
+            if value is None:
+                leftovers[text] = (cleaned, offset, has_year)
+            else:
+                parsed[text] = self._finish(value, offset, has_year, today)
+
+        for text, value in self._parse_leftovers(leftovers).items():
+            cleaned, offset, has_year = leftovers[text]
+            parsed[text] = self._finish(value, offset, has_year, today) if value else None
+
+        # What a relative date refers to changes from day to day
+        cacheable = {text: value for text, value in parsed.items() if split_relative_day(text)[0] is None}
+        with self.lock:
+            if len(self.cache) + len(cacheable) > self.max_cached:
+                self.cache.clear()
+            self.cache.update(cacheable)
+        return parsed
+
+    def _match_known(self, cleaned: str) -> Optional[datetime]:
+        """Try the known formats, starting with the one that matched last."""
+        last = self.last_format
+        for index in [last] + [i for i in range(len(KNOWN_FORMATS)) if i != last]:
+            try:
+                value = datetime.strptime(cleaned, KNOWN_FORMATS[index])
+            except ValueError:
+                continue
+            self.last_format = index
+            return value
+        return None
+
+    def _parse_leftovers(self, leftovers: Dict[str, Tuple[str, Optional[int], bool]]) -> Dict[str, Optional[datetime]]:
+        """Parse texts no known format matched, in one pandas call if possible."""
+        if not leftovers:
+            return {}
+        texts = list(leftovers)
+        cleaned = [leftovers[text][0] for text in texts]
+
+        pd = optional_module('pandas')
+        if pd is not None:
+            try:
+                values = pd.to_datetime(pd.Series(cleaned), errors='coerce', format='mixed')
+                return {text: (None if pd.isna(value) else value.to_pydatetime())
+                        for text, value in zip(texts, values)}
+            except (ValueError, TypeError):
+                # e.g. a mix of zone-aware and naive values; parse one by one instead
+                pass
+
+        dateutil_parser = optional_module('dateutil.parser')
+        found = {}
+        for text, value in zip(texts, cleaned):
+            found[text] = None
+            if dateutil_parser is not None:
+                try:
+                    found[text] = dateutil_parser.parse(value, fuzzy=True)
+                except (ValueError, OverflowError):
+                    pass
+        return found
+
+    def _finish(self, value: datetime, offset: Optional[int], has_year: bool, today: date) -> str:
+        """Apply the named zone and year inference, and format as UTC."""
+        if value.tzinfo is None and offset is not None:
+            value = value.replace(tzinfo=timezone(timedelta(minutes=offset)))
+        if not has_year and (today - value.date()).days > 183:
+            # Listings only show upcoming events, so an early month means next year
+            try:
+                value = value.replace(year=value.year + 1)
+            except ValueError:
+                pass
+        return to_utc_iso(value)
+
+
+date_parser = DateParser()
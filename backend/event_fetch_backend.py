@@ -1,17 +1,29 @@
-
-import requests
-from bs4 import BeautifulSoup
 import json
 import time
-import random
 import logging
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional, Any
-from flask import Flask, request, jsonify
+from datetime import date, datetime
+from typing import List, Dict, Tuple, Optional, Any, Iterator
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 
-import subprocess
+from rate_limit import rate_limiter_for
+from result_cache import ResultCache
+from shared_cache import DEFAULT_SHARED_CACHE_URL, SharedResultCache
+from event_store import EventStore
+import http_cache
+import metrics
+from scheduler import JobQueue, PrewarmScheduler
+from search_index import SearchIndex
+from sources import FanOut, ScrapeProgress
+from event_dates import parse_timestamp, to_utc_iso
+# The scraping core lives in scraper.py (shared with the batch CLI); its
+# names are re-exported here for existing imports
+from scraper import (BASE_URL, DEFAULT_DELAY, LISTING_PAGE_SIZE, MAX_EVENTS, MAX_LISTING_PAGES,  # noqa: F401
+                     EventScraper, normalize_city)
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
@@ -23,588 +35,574 @@ logging.basicConfig(
 )
 logger = logging.getLogger('event_scraper')
 
-# User agents to rotate for avoiding rate limiting
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
-]
+# Durable store of scraped event pages shared by all scrapers in the process
+event_store = EventStore.from_env()
 
-class EventScraper:
-    """
-    A class to scrape event details from Eventbrite.
+# Sites events are scraped from (EVENT_SOURCES), queried concurrently and merged
+event_sources = FanOut.from_env(event_store)
+
+# Keyword index over scraped events, fed by every result stored in events_cache
+search_index = SearchIndex(max_keys=int(os.environ.get('SEARCH_INDEX_SIZE', 256)))
+
+# Cache of /api/events results keyed by normalized (city, maxEvents), shared
+# between worker processes through SQLite when SHARED_CACHE_URL is set
+events_cache_options = dict(
+    ttl=float(os.environ.get('EVENTS_CACHE_TTL', 300)),
+    max_entries=int(os.environ.get('EVENTS_CACHE_SIZE', 256)),
+    stale_ttl=float(os.environ.get('EVENTS_CACHE_STALE_TTL', 600)),
+    name='events',
+    on_store=search_index.update
+)
+if os.environ.get('SHARED_CACHE_URL'):
+    # Several server processes share results, and scrape each city one at a time
+    events_cache = SharedResultCache(os.environ['SHARED_CACHE_URL'],
+                                     lease_ttl=float(os.environ.get('SHARED_CACHE_LEASE_TTL', 120)),
+                                     **events_cache_options)
+else:
+    events_cache = ResultCache(**events_cache_options)
+
+# Upper bound on the number of cities in one batch request
+MAX_BATCH_CITIES = 100
+# Upper bound on a batch request's maxConcurrency (threads and requests in flight)
+MAX_BATCH_CONCURRENCY = int(os.environ.get('MAX_BATCH_CONCURRENCY', 16))
+
+# Events found so far by the scrapes running in this process, by cache key,
+# answered to requests whose deadline passes before the scrape finishes
+scrape_progress: Dict[Tuple, ScrapeProgress] = {}
+scrape_progress_lock = threading.Lock()
+
+# Scrapes that keep filling the cache after a deadline request has been answered
+background_scrapes = ThreadPoolExecutor(max_workers=int(os.environ.get('BACKGROUND_SCRAPE_WORKERS', 8)),
+                                        thread_name_prefix='background-scrape')
+
+def events_key(city: str, max_events: int, start_after: Optional[datetime] = None,
+               start_before: Optional[datetime] = None) -> Tuple:
     """
+    Build the result cache key of a scrape.
     
-    def __init__(self, city: str, max_events: int = 10, delay: float = 1.0):
-        """
-        Initialize the EventScraper.
-        
-        Args:
-            city (str): City name to search for events
-            max_events (int): Maximum number of events to scrape
-            delay (float): Delay between requests to avoid rate limiting
-        """
-        self.city = city.lower().replace(' ', '-')
-        self.max_events = max_events
-        self.delay = delay
-        self.base_url = "https://www.eventbrite.com"
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        start_after (Optional[datetime]): Start of the time window, if any
+        start_before (Optional[datetime]): End of the time window, if any
         
-    def get_headers(self) -> Dict[str, str]:
-        """Get request headers with a random user agent."""
-        return {
-            "User-Agent": random.choice(USER_AGENTS),
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-        }
+    Returns:
+        Tuple: (city, max events), followed by the window bounds if a window is set
+    """
+    if start_after is None and start_before is None:
+        return (city, max_events)
+    return (city, max_events, start_after and to_utc_iso(start_after), start_before and to_utc_iso(start_before))
+
+def stream_events(city: str, max_events: int, start_after: Optional[datetime] = None,
+                  start_before: Optional[datetime] = None) -> Iterator[str]:
+    """
+    Stream events for a city as newline-delimited JSON while they are scraped.
     
-    def make_request(self, url: str) -> Optional[BeautifulSoup]:
-        """
-        Make an HTTP request and return BeautifulSoup object.
-        
-        Args:
-            url (str): URL to request
-            
-        Returns:
-            Optional[BeautifulSoup]: BeautifulSoup object or None if request failed
-        """
-        try:
-            response = requests.get(url, headers=self.get_headers(), timeout=10)
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to retrieve page. Status code: {response.status_code} for URL: {url}")
-                return None
-                
-            return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            logger.error(f"Error making request to {url}: {e}")
-            return None
+    Each event is flushed as soon as the scraper produces it, and the full
+    list is cached at the end. Cached results are sent whole by the route,
+    with validators (see events_response).
     
-    def extract_json_ld_events(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
-        """
-        Extract event data from JSON-LD script tags.
-        
-        Args:
-            soup (BeautifulSoup): BeautifulSoup object of the page
-            
-        Returns:
-            List[Dict[str, Any]]: List of event data dictionaries
-        """
-        json_events = []
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        start_after (Optional[datetime]): Only stream events starting at or after this time
+        start_before (Optional[datetime]): Only stream events starting before this time
         
-        script_tags = soup.find_all('script', {'type': 'application/ld+json'})
-        for script in script_tags:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, list):
-                    for item in data:
-                        if item.get('@type') == 'Event':
-                            json_events.append(item)
-                elif isinstance(data, dict) and data.get('@type') == 'Event':
-                    json_events.append(data)
-            except Exception as e:
-                logger.debug(f"Error parsing JSON-LD: {e}")
-                continue
-                
-        return json_events
+    Yields:
+        str: One JSON-encoded event per line
+    """
+    key = events_key(city, max_events, start_after, start_before)
+    events = []
+    try:
+        for event in event_sources.iter_events(city, max_events, start_after=start_after, start_before=start_before):
+            events.append(event)
+            yield json.dumps(event) + '\n'
+    except Exception as e:
+        logger.error(f'Error streaming events: {str(e)}')
+        yield json.dumps({'error': 'Failed to fetch events'}) + '\n'
+        return
+
+    if events:
+        events_cache.put(key, events)
+    record_demand(city, max_events, events)
+
+@contextmanager
+def tracked_scrape(key: Tuple, max_events: int) -> Iterator[ScrapeProgress]:
+    """
+    Publish the progress of a scrape under its cache key while it runs.
     
-    def extract_json_ld_event_details(self, event_data: Dict[str, Any]) -> Dict[str, str]:
-        """
-        Extract event details from JSON-LD data.
-        
-        Args:
-            event_data (Dict[str, Any]): JSON-LD event data
-            
-        Returns:
-            Dict[str, str]: Extracted event details
-        """
-        name = event_data.get('name', 'No Title')
-        
-        # Handle date/time
-        start_date = event_data.get('startDate', 'No Date')
-        try:
-            if isinstance(start_date, str) and start_date != 'No Date':
-                # Try to parse and format the date
-                dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                start_date = dt.strftime('%A, %B %d, %Y at %I:%M %p')
-        except Exception:
-            # Keep the original string if parsing fails
-            pass
-        
-        # Handle location - extract just the essential location info
-        location = 'No Location'
-        location_data = event_data.get('location', {})
-        if isinstance(location_data, dict):
-            # First try just the venue name if available
-            if location_data.get('name'):
-                location = location_data.get('name')
-            # If no name, try to construct a clean address
-            elif location_data.get('address'):
-                addr = location_data.get('address')
-                if isinstance(addr, dict):
-                    # Only include key address components
-                    # Prefer street address + locality format
-                    if addr.get('streetAddress') and addr.get('addressLocality'):
-                        location = f"{addr.get('streetAddress')}, {addr.get('addressLocality')}"
-                        if addr.get('addressRegion'):
-                            location += f", {addr.get('addressRegion')}"
-                    # Fallback to just locality + region
-                    elif addr.get('addressLocality'):
-                        location = addr.get('addressLocality')
-                        if addr.get('addressRegion'):
-                            location += f", {addr.get('addressRegion')}"
-        
-        # Get URL
-        url = event_data.get('url', '')
-        
-        # Get description - limit length to avoid overly long descriptions
-        description = event_data.get('description', 'No description available')
-        if description and len(description) > 300:
-            description = description[:297] + "..."
-        
-        # Get image
-        image = event_data.get('image', '')
-        if isinstance(image, list) and image:
-            image = image[0]
+    Args:
+        key (Tuple): Result cache key of the scrape
+        max_events (int): Maximum number of events
         
-        return {
-            'name': name,
-            'date_time': start_date,
-            'location': location,
-            'link': url,
-            'description': description,
-            'image': image
-        }
+    Yields:
+        ScrapeProgress: Progress for the scrape to report its events to
+    """
+    progress = ScrapeProgress(max_events)
+    with scrape_progress_lock:
+        scrape_progress[key] = progress
+    try:
+        yield progress
+    finally:
+        with scrape_progress_lock:
+            if scrape_progress.get(key) is progress:
+                del scrape_progress[key]
+
+def partial_events(key: Tuple) -> List[Dict[str, str]]:
+    """Events found so far by the running scrape of a cache key (none if it runs in another process)."""
+    with scrape_progress_lock:
+        progress = scrape_progress.get(key)
+    return progress.snapshot() if progress else []
+
+def scrape_city(city: str, max_events: int, refresh: bool = False, start_after: Optional[datetime] = None,
+                start_before: Optional[datetime] = None) -> List[Dict[str, str]]:
+    """
+    Scrape a city into the result cache.
     
-    def extract_html_event_details(self, card: BeautifulSoup, event_url: str) -> Dict[str, str]:
-        """
-        Extract event details from HTML.
-        
-        Args:
-            card (BeautifulSoup): Event card element
-            event_url (str): Event URL
-            
-        Returns:
-            Dict[str, str]: Extracted event details
-        """
-        # Extract title
-        title = None
-        for heading in card.select('h1, h2, h3, h4, h5'):
-            if heading.text.strip():
-                title = heading.text.strip()
-                break
-        
-        if not title:
-            title_candidates = card.select('[class*="title"], [class*="name"], strong, b')
-            for candidate in title_candidates:
-                if candidate.text.strip() and len(candidate.text.strip()) > 5:
-                    title = candidate.text.strip()
-                    break
-        
-        if not title:
-            title = "Untitled Event"
-        
-        # Extract date
-        date_str = None
-        date_candidates = card.select('time, [class*="date"], [class*="time"], [datetime]')
-        for date_elem in date_candidates:
-            if date_elem.text.strip():
-                date_str = date_elem.text.strip()
-                break
-        
-        if not date_str:
-            date_str = "Date not available"
-        
-        # Extract location
-        location = None
-        # Better location extraction - looking for elements that are more likely to contain just the location
-        location_candidates = card.select('[aria-label*="location"], [data-automation="venue"], [class*="address-line"]')
-        if not location_candidates:
-            location_candidates = card.select('[class*="location"], [class*="venue"], [class*="address"], [class*="place"]')
-        
-        for loc_elem in location_candidates:
-            loc_text = loc_elem.text.strip()
-            # Filter out long text that's likely not just a location
-            if loc_text and len(loc_text) < 100:
-                location = loc_text
-                break
-        
-        if not location:
-            location = "Location not available"
-        
-        # Extract description (if available)
-        description = "No description available"
-        desc_candidates = card.select('[class*="desc"], [class*="summary"], [class*="about"]')
-        for desc_elem in desc_candidates:
-            if desc_elem.text.strip():
-                description = desc_elem.text.strip()
-                break
-        
-        # Try to find image
-        image = ""
-        img_tag = card.find('img')
-        if img_tag and img_tag.get('src'):
-            image = img_tag.get('src')
-        
-        return {
-            'name': title,
-            'date_time': date_str,
-            'location': location,
-            'link': event_url,
-            'description': description,
-            'image': image
-        }
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        refresh (bool): Whether to scrape even if a fresh cached result exists
+        start_after (Optional[datetime]): Only keep events starting at or after this time
+        start_before (Optional[datetime]): Only keep events starting before this time
+        
+    Returns:
+        List[Dict[str, str]]: List of event dictionaries
+    """
+    key = events_key(city, max_events, start_after, start_before)
     
-    def scrape_individual_event_page(self, url: str) -> Dict[str, str]:
-        """
-        Scrape details from an individual event page.
-        
-        Args:
-            url (str): Event URL
-            
-        Returns:
-            Dict[str, str]: Event details
-        """
-        logger.info(f"Scraping individual page: {url}")
-        soup = self.make_request(url)
-        
-        if not soup:
-            return {}
-        
-        # Try to extract from JSON-LD (most reliable)
-        json_events = self.extract_json_ld_events(soup)
-        
-        if json_events:
-            return self.extract_json_ld_event_details(json_events[0])
-        
-        # Fall back to HTML parsing
-        event_details = {
-            'name': 'Untitled Event',
-            'date_time': 'Date not available',
-            'location': 'Location not available',
-            'link': url,
-            'description': 'No description available',
-            'image': ''
-        }
-        
-        # Extract title
-        title_element = soup.find('h1')
-        if title_element:
-            event_details['name'] = title_element.text.strip()
-        
-        # Extract date
-        date_elements = soup.select('[class*="date"], [class*="time"], time, [datetime]')
-        for elem in date_elements:
-            if elem.text.strip():
-                event_details['date_time'] = elem.text.strip()
-                break
-        
-        # Extract location - improved to find concise location data
-        # First try elements that typically have structured location data
-        location_found = False
-        venue_elements = soup.select('[aria-label*="venue"], [aria-label*="location"], [class*="venue-name"], [class*="address-line"]')
-        for elem in venue_elements:
-            loc_text = elem.text.strip()
-            if loc_text and len(loc_text) < 150:  # Reasonable location length
-                event_details['location'] = loc_text
-                location_found = True
-                break
-        
-        # If no structured element found, try schema markup
-        if not location_found:
-            meta_location = soup.find('meta', {'property': 'event:location'})
-            if meta_location and meta_location.get('content'):
-                event_details['location'] = meta_location.get('content')
-                location_found = True
-        
-        # Last resort, try generic location classes
-        if not location_found:
-            location_elements = soup.select('[class*="location"], [class*="venue"], [class*="address"], [class*="place"]')
-            for elem in location_elements:
-                loc_text = elem.text.strip()
-                # Avoid large text blocks by limiting length and removing multi-line content
-                if loc_text and len(loc_text) < 100 and '\n' not in loc_text:
-                    event_details['location'] = loc_text
-                    break
-        
-        # Extract description
-        desc_elements = soup.select('[class*="desc"], [class*="summary"], [class*="about"], [property="og:description"]')
-        for elem in desc_elements:
-            if hasattr(elem, 'content'):
-                event_details['description'] = elem.get('content', '')
-                break
-            elif elem.text.strip():
-                event_details['description'] = elem.text.strip()
-                break
-        
-        # Extract image
-        meta_image = soup.find('meta', {'property': 'og:image'})
-        if meta_image and meta_image.get('content'):
-            event_details['image'] = meta_image.get('content')
-        
-        return event_details
+    def scrape() -> List[Dict[str, str]]:
+        with tracked_scrape(key, max_events) as progress:
+            return event_sources.scrape(city, max_events, start_after=start_after, start_before=start_before,
+                                        progress=progress)
     
-    def clean_text(self, text: str) -> str:
-        """
-        Clean text by removing extra whitespace and newlines.
-        
-        Args:
-            text (str): Text to clean
-            
-        Returns:
-            str: Cleaned text
-        """
-        if not text:
-            return ""
-        return " ".join(text.split())
+    if not refresh:
+        return events_cache.get_or_compute(key, scrape)
+    return events_cache.refresh(key, scrape)
+
+def scrape_city_within(city: str, max_events: int, deadline: float, start_after: Optional[datetime] = None,
+                       start_before: Optional[datetime] = None) -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Get events for a city, answering with the events found so far if the
+    scrape takes longer than the deadline.
     
-    def extract_event_link(self, card: BeautifulSoup) -> Optional[str]:
-        """
-        Extract event link from card.
-        
-        Args:
-            card (BeautifulSoup): Event card element
-            
-        Returns:
-            Optional[str]: Event URL or None if not found
-        """
-        # Find any link that looks like an Eventbrite event link
-        link_element = card.find('a', href=lambda href: href and ('/e/' in href or 'eventbrite.com/e/' in href))
+    The scrape keeps running in the background and stores its full result
+    in the cache, so a later request gets every event.
+    
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        deadline (float): Seconds to wait for the scrape
+        start_after (Optional[datetime]): Only keep events starting at or after this time
+        start_before (Optional[datetime]): Only keep events starting before this time
+        
+    Returns:
+        Tuple[List[Dict[str, str]], bool]: Events, and whether they are partial. Partial
+            results include card-level details of events whose pages are still being fetched.
+    """
+    future = background_scrapes.submit(scrape_city, city, max_events, start_after=start_after,
+                                       start_before=start_before)
+    done, _ = wait([future], timeout=deadline)
+    if done:
+        return future.result(), False
+    
+    metrics.count_cache('events', 'partial')
+    return partial_events(events_key(city, max_events, start_after, start_before)), True
+
+def events_delta(city: str, max_events: int, events: List[Dict[str, str]], since: int) -> Dict[str, Any]:
+    """
+    Record a city's current events and describe what changed after a client's token.
+    
+    Args:
+        city (str): Normalized city name
+        max_events (int): Maximum number of events
+        events (List[Dict[str, str]]): Current events
+        since (int): Token from the client's previous response; 0 for the full list
+        
+    Returns:
+        Dict[str, Any]: 'token' for the next request, 'full' (whether 'added' is the
+            complete list) and the 'added', 'changed' and 'removed' events
+    """
+    if not event_store:
+        # Without the store there is no history to diff against
+        return {'token': None, 'full': True, 'added': events, 'changed': [], 'removed': []}
+    
+    # A failed scrape returns nothing; don't report every event as removed
+    if events:
+        event_store.record_snapshot(city, max_events, events)
+    return event_store.changes_since(city, max_events, since)
+
+def parse_flag(value: Any) -> bool:
+    """
+    Parse a boolean parameter of an /api/events request.
+    
+    Args:
+        value (Any): JSON value, or a query string value such as "1", "true" or "false"
         
-        if not link_element:
-            # Try any link
-            link_element = card.find('a')
-            
-        if not link_element or not link_element.get('href'):
-            return None
-            
-        event_url = link_element.get('href')
+    Returns:
+        bool: Whether the flag is set (False if not given)
         
-        # Check if URL is valid
-        if not (event_url.startswith('http') or event_url.startswith('/')):
-            return None
-            
-        # Add base URL if needed
-        if not event_url.startswith('http'):
-            event_url = f"{self.base_url}{event_url}"
-            
-        return event_url
+    Raises:
+        ValueError: If the value is not a boolean
+    """
+    if value is None or isinstance(value, (bool, int)):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('', '0', 'false', 'no', 'off'):
+        return False
+    if isinstance(value, str) and value.strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    raise ValueError(f"Invalid flag: {value}")
+
+def parse_since(value: Any) -> int:
+    """
+    Parse the `since` token of an /api/events request.
     
-    def scrape_events(self, scrape_individual: bool = True) -> List[Dict[str, str]]:
-        """
-        Scrape events from Eventbrite.
+    Args:
+        value (Any): Token from the request (None or empty for the full list)
         
-        Args:
-            scrape_individual (bool): Whether to scrape individual event pages
-            
-        Returns:
-            List[Dict[str, str]]: List of event dictionaries
-        """
-        url = f"{self.base_url}/d/{self.city}/all-events/"
-        logger.info(f"Fetching events from {url}")
+    Returns:
+        int: Version the client has
+        
+    Raises:
+        ValueError: If the token is not one this server issued
+    """
+    if value in (None, ''):
+        return 0
+    since = int(value)
+    if since < 0:
+        raise ValueError(f"Invalid since token: {value}")
+    return since
+
+def parse_deadline(value: Any) -> float:
+    """
+    Parse the `deadlineMs` parameter of an /api/events request.
+    
+    Args:
+        value (Any): Milliseconds the client is willing to wait
         
-        soup = self.make_request(url)
-        if not soup:
-            return []
+    Returns:
+        float: Deadline in seconds
         
-        events = []
+    Raises:
+        ValueError: If the value is not a positive number
+    """
+    deadline = float(value)
+    if not deadline > 0 or deadline == float('inf'):
+        raise ValueError(f"Invalid deadlineMs: {value}")
+    return deadline / 1000
+
+def parse_window(params: Dict[str, Any]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Parse the `startAfter` and `startBefore` parameters of an /api/events request.
+    
+    Args:
+        params (Dict[str, Any]): Request parameters
         
-        # Try to extract from JSON-LD first
-        json_events = self.extract_json_ld_events(soup)
-        logger.info(f"Found {len(json_events)} events in JSON-LD data")
+    Returns:
+        Tuple[Optional[datetime], Optional[datetime]]: Window bounds in UTC (None if not given)
         
-        for event_data in json_events:
-            event_details = self.extract_json_ld_event_details(event_data)
-            events.append(self.clean_event_details(event_details))
-            
-            if len(events) >= self.max_events:
-                return events
+    Raises:
+        ValueError: If a bound is not an ISO 8601 date or timestamp
+    """
+    start_after, start_before = params.get('startAfter'), params.get('startBefore')
+    return (parse_timestamp(start_after) if start_after else None,
+            parse_timestamp(start_before) if start_before else None)
+
+def sort_events(events: List[Dict[str, str]], sort: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Order events as requested by the `sort` parameter of an /api/events request.
+    
+    Args:
+        events (List[Dict[str, str]]): Events in listing order
+        sort (Optional[str]): "start" for soonest first (events without a known
+            start last); None or "listing" keeps the listing order
         
-        # Fall back to HTML parsing if needed
-        if len(events) < self.max_events:
-            logger.info("Falling back to HTML parsing")
-            
-            # Try different selectors to find event cards
-            event_cards = []
-            selectors = [
-                '[data-testid="event-card"]',
-                'div[data-event-id], article[data-event-id]',
-                'div.event-card, div.eds-event-card-content, article.eds-l-pad-all-4',
-                'div.search-event-card-square-image'
-            ]
-            
-            for selector in selectors:
-                event_cards = soup.select(selector)
-                if event_cards:
-                    break
-            
-            logger.info(f"Found {len(event_cards)} potential event cards in HTML")
-            
-            if not event_cards:
-                # If no cards found but we have some events from JSON-LD, return those
-                if events:
-                    return events
-                logger.warning("Could not find event elements. Website structure may have changed.")
-                return []
-            
-            for card in event_cards:
-                try:
-                    event_url = self.extract_event_link(card)
-                    if not event_url:
-                        continue
-                    
-                    event_details = {}
-                    
-                    # Get detailed information from individual event page if enabled
-                    if scrape_individual:
-                        # Add a delay to avoid rate limiting
-                        time.sleep(self.delay)
-                        event_details = self.scrape_individual_event_page(event_url)
-                    
-                    # If individual scraping failed or wasn't enabled, extract from the card
-                    if not event_details:
-                        event_details = self.extract_html_event_details(card, event_url)
-                    
-                    events.append(self.clean_event_details(event_details))
-                    
-                    # Limit the number of events
-                    if len(events) >= self.max_events:
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"Error processing event: {e}\nStandard Error Output: {result.stderr}")
-                    continue
+    Returns:
+        List[Dict[str, str]]: Ordered events
         
+    Raises:
+        ValueError: If the sort order is unknown
+    """
+    if sort in (None, '', 'listing'):
         return events
+    if sort != 'start':
+        raise ValueError(f"Invalid sort order: {sort}")
+    # ISO UTC timestamps sort chronologically as strings
+    return sorted(events, key=lambda event: (not event.get('start'), event.get('start') or ''))
+
+def events_cache_control(key: Tuple) -> str:
+    """
+    Get the Cache-Control of a GET /api/events answer: clients and proxies may
+    reuse the result for as long as the server's cached entry has left.
     
-    def clean_event_details(self, event: Dict[str, str]) -> Dict[str, str]:
-        """
-        Clean event details.
-        
-        Args:
-            event (Dict[str, str]): Event details
-            
-        Returns:
-            Dict[str, str]: Cleaned event details
-        """
-        # Clean location - remove excessive text
-        location = self.clean_text(event.get('location', 'Location not available'))
-        # If location is too long, it's likely containing other content
-        if len(location) > 100:
-            # Try to extract just the first line or sentence
-            if '\n' in location:
-                location = location.split('\n')[0].strip()
-            elif '.' in location:
-                location = location.split('.')[0].strip() + '.'
-            # Last resort - limit to first 80 chars
-            if len(location) > 100:
-                location = location[:80] + '...'
+    Args:
+        key (Tuple): Result cache key of the events
         
-        return {
-            'name': self.clean_text(event.get('name', 'Untitled Event')),
-            'date_time': self.clean_text(event.get('date_time', 'Date not available')),
-            'location': location,
-            'link': event.get('link', ''),
-            'description': self.clean_text(event.get('description', 'No description available')),
-            'image': event.get('image', '')
-        }
-
-def display_events(events: List[Dict[str, str]], include_description: bool = False) -> None:
+    Returns:
+        str: Header value
+    """
+    age = events_cache.age(key)
+    if age is None:
+        # Nothing was cached (no events were found), so the next request scrapes again
+        return 'no-cache'
+    return http_cache.cache_control(events_cache.ttl, events_cache.stale_ttl, age)
+
+def events_response(events: List[Dict[str, str]], key: Tuple, ndjson: bool = False) -> Response:
     """
-    Display events in a clean, formatted way.
+    Answer with events as compressed JSON carrying an ETag, or with 304 if the
+    client's If-None-Match shows it already has them. Answers to GET also
+    carry Cache-Control.
     
     Args:
-        events (List[Dict[str, str]]): List of event dictionaries
-        include_description (bool): Whether to include event descriptions
+        events (List[Dict[str, str]]): Events to send
+        key (Tuple): Result cache key of the events
+        ndjson (bool): Whether to send newline-delimited JSON, as a stream would
+        
+    Returns:
+        Response: 200 or 304 response
     """
-    if not events:
-        print("\n📅 No events found.")
-        print("Suggestions:")
-        print("1. Try a different city format (e.g., 'new-york' instead of 'new york')")
-        print("2. Try a major city like 'san-francisco' or 'london'")
-        return
+    cache_control = events_cache_control(key) if request.method == 'GET' else None
+    if ndjson:
+        body, content_type = http_cache.ndjson_body(events), 'application/x-ndjson'
+    else:
+        body, content_type = http_cache.json_body(events), 'application/json'
+    status, headers, body = http_cache.cached_response(body, content_type, request.headers.get('Accept-Encoding'),
+                                                       request.headers.get('If-None-Match'), cache_control)
+    return Response(body, status=status, headers=headers)
+
+def scrape_cities(cities: List[Tuple[str, int]], max_concurrency: int = 8,
+                  delay: float = DEFAULT_DELAY) -> List[Dict[str, Any]]:
+    """
+    Scrape several cities in parallel under one global budget.
     
-    print(f"\n📅 Found {len(events)} upcoming events:\n")
+    All scrapers share the process-wide per-host rate limiter, one semaphore
+    bounding the number of requests in flight, the pooled HTTP session and a
+    page cache, so an event listed in several cities is fetched once. Fresh
+    results from the result cache are reused.
     
-    for i, event in enumerate(events, 1):
-        print(f"🎟️ EVENT #{i}: {event['name']}")
-        print(f"   📅 When: {event['date_time']}")
-        
-        # Keep location formatting simple and brief
-        location = event['location']
-        print(f"   📍 Where: {location}")
+    Args:
+        cities (List[Tuple[str, int]]): (city, max events) pairs
+        max_concurrency (int): Maximum number of requests in flight across all cities
+        delay (float): Average delay between requests to the same host
         
-        if include_description and event['description'] != 'No description available':
-            # Limit description length
-            desc = event['description']
-            if len(desc) > 150:
-                desc = desc[:147] + "..."
-            print(f"   ℹ️  Info: {desc}")
-            
-        print(f"   🔗 Link: {event['link']}")
-        print()
-
-def main():
-    """Main function to run the event scraper."""
-    print("=== 🎭 Event Finder 🎭 ===")
+    Returns:
+        List[Dict[str, Any]]: One dict per input pair, in input order, with 'city',
+            'maxEvents', 'events', 'error', 'cached' and 'elapsedMs'
+    """
+    max_concurrency = max(1, max_concurrency)
+    rate_limiter = rate_limiter_for(delay)
+    fetch_slots = threading.BoundedSemaphore(max_concurrency)
+    page_cache = ResultCache(ttl=events_cache.ttl, max_entries=max(1, sum(n for _, n in cities)),
+                             name='batch_pages')
     
-    while True:
-        city = input("Enter city name (e.g., bangalore, san-francisco, new-york): ").strip()
-        if not city:
-            print("City name cannot be empty. Please try again.")
-            continue
-        break
+    def scrape_one(pair: Tuple[str, int]) -> Dict[str, Any]:
+        city, max_events = normalize_city(pair[0]), min(max(1, int(pair[1])), MAX_EVENTS)
+        key = (city, max_events)
+        start = time.perf_counter()
+        result = {'city': city, 'maxEvents': max_events, 'events': [], 'error': None,
+                  'cached': events_cache.get(key) is not None}
+        try:
+            result['events'] = events_cache.get_or_compute(
+                key,
+                lambda: event_sources.scrape(city, max_events, delay=delay, rate_limiter=rate_limiter,
+                                             fetch_slots=fetch_slots, page_cache=page_cache)
+            )
+        except Exception as e:
+            logger.error(f"Error scraping {city} in batch: {e}")
+            result['error'] = str(e)
+        result['elapsedMs'] = round((time.perf_counter() - start) * 1000, 1)
+        return result
     
-    print(f"🔍 Searching for events in {city.title()}...")
+    if not cities:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(cities))) as executor:
+        return list(executor.map(scrape_one, cities))
+
+def parse_hot_cities(value: str, max_events: int) -> List[Tuple[str, int]]:
+    """
+    Parse a hot-city list such as "bangalore,new-york:20".
     
-    try:
-        # Get number of events
-        max_events_input = input("Number of events to fetch (default: 5): ").strip()
-        max_events = 5
-        if max_events_input and max_events_input.isdigit():
-            max_events = int(max_events_input)
-            max_events = min(max(1, max_events), 20)  # Limit between 1 and 20
-        
-        # Ask if user wants descriptions
-        show_descriptions = input("Show event descriptions? (y/n, default: n): ").strip().lower() == 'y'
-        
-        # Initialize scraper
-        scraper = EventScraper(city, max_events=max_events)
-        
-        # Scrape events
-        events = scraper.scrape_events(scrape_individual=True)
-        
-        # Display results
-        display_events(events, include_description=show_descriptions)
+    Args:
+        value (str): Comma-separated cities, each optionally followed by ":<max events>"
+        max_events (int): Max events for cities that don't give one
         
-    except KeyboardInterrupt:
-        print("\n\nSearch cancelled by user.")
-    except Exception as e:
-        logger.error(f"Error: {e}")
-        print(f"\n❌ An error occurred: {e}\nStandard Error Output: {result.stderr}")
-        print("Please try again with a different city or check your internet connection.")
+    Returns:
+        List[Tuple[str, int]]: (normalized city, max events) pairs
+    """
+    hot_cities = []
+    for item in value.split(','):
+        city, _, count = item.partition(':')
+        if city.strip():
+            hot_cities.append((normalize_city(city), int(count) if count.strip().isdigit() else max_events))
+    return hot_cities
+
+# Background scrape jobs and pre-warming of popular cities
+scrape_jobs = JobQueue(scrape_city, workers=int(os.environ.get('JOB_WORKERS', 4)))
+prewarm_scheduler = PrewarmScheduler(
+    scrape_jobs,
+    hot_cities=parse_hot_cities(os.environ.get('PREWARM_CITIES', ''),
+                                int(os.environ.get('PREWARM_MAX_EVENTS', 10))),
+    interval=float(os.environ.get('PREWARM_INTERVAL', 240)),
+    top_n=int(os.environ.get('PREWARM_TOP_N', 5)),
+    max_tracked=int(os.environ.get('PREWARM_MAX_TRACKED', 1000))
+)
+
+def record_demand(city: str, max_events: int, events: List[Dict[str, str]]) -> None:
+    """Count a request toward pre-warming if it found events (so junk cities never are)."""
+    if events:
+        prewarm_scheduler.record_request(city, max_events)
+
+@app.before_request
+def start_background_workers():
+    prewarm_scheduler.start()
+
+@app.route('/api/jobs', methods=['POST', 'OPTIONS'])
+def create_job():
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    params = request.json
+    if not params or 'city' not in params or 'maxEvents' not in params:
+        return jsonify({'error': 'Missing required parameters'}), 400
+
+    try:
+        city = normalize_city(params['city'])
+        max_events = min(max(1, int(params['maxEvents'])), MAX_EVENTS)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid parameters'}), 400
 
+    job_id = scrape_jobs.enqueue(city, max_events, refresh=bool(params.get('refresh')),
+                                 on_done=lambda events: record_demand(city, max_events, events))
+    return jsonify({'jobId': job_id, 'status': scrape_jobs.get(job_id)['status']}), 202
 
-   
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = scrape_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
-@app.route('/api/events', methods=['POST', 'OPTIONS'])
+@app.route('/api/events/batch', methods=['POST', 'OPTIONS'])
+def fetch_events_batch():
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    params = request.json
+    if not params or not isinstance(params.get('cities'), list) or not params['cities']:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    if len(params['cities']) > MAX_BATCH_CITIES:
+        return jsonify({'error': f'At most {MAX_BATCH_CITIES} cities per batch'}), 400
+
+    try:
+        cities = [(item['city'], int(item['maxEvents'])) for item in params['cities']]
+        max_concurrency = min(int(params.get('maxConcurrency', 8)), MAX_BATCH_CONCURRENCY)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Invalid parameters'}), 400
+    if not all(isinstance(city, str) and city.strip() for city, _ in cities):
+        return jsonify({'error': 'Invalid parameters'}), 400
+
+    start = time.perf_counter()
+    results = scrape_cities(cities, max_concurrency=max_concurrency)
+    for result in results:
+        record_demand(result['city'], result['maxEvents'], result['events'])
+    return jsonify({'results': results, 'elapsedMs': round((time.perf_counter() - start) * 1000, 1)})
+
+@app.route('/api/events/search', methods=['GET'])
+def search_events():
+    """Query already-scraped events by keyword, city and date window without scraping."""
+    try:
+        city = normalize_city(request.args.get('city', ''))
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = date.fromisoformat(start) if start else None
+        end = date.fromisoformat(end) if end else None
+        limit = min(max(1, int(request.args.get('limit', 20))), MAX_EVENTS)
+    except ValueError:
+        return jsonify({'error': 'Invalid search parameters'}), 400
+    
+    with metrics.timer('search'):
+        total, events = search_index.search(request.args.get('q', ''), city or None, start, end, limit)
+    return jsonify({'total': total, 'events': events})
+
+@app.route('/api/events', methods=['GET', 'POST', 'OPTIONS'])
 def fetch_events():
     if request.method == 'OPTIONS':
         return '', 204
 
     try:
-        params = request.json
+        # GET takes the parameters from the query string, so results can be cached by URL
+        params = request.args.to_dict() if request.method == 'GET' else request.json
         if not params or 'city' not in params or 'maxEvents' not in params:
             return jsonify({'error': 'Missing required parameters'}), 400
 
-        scraper = EventScraper(params['city'], int(params['maxEvents']))
-        events = scraper.scrape_events()
-        return jsonify(events)
+        city = normalize_city(params['city'])
+        max_events = min(max(1, int(params['maxEvents'])), MAX_EVENTS)
+
+        try:
+            start_after, start_before = parse_window(params)
+            sort = params.get('sort')
+            sort_events([], sort)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid startAfter, startBefore or sort'}), 400
+        try:
+            # Query string values are all strings, so "false" must not count as set
+            stream = parse_flag(params.get('stream'))
+        except ValueError:
+            return jsonify({'error': 'Invalid stream'}), 400
+
+        # With `deadlineMs`, whatever has been found when the deadline passes is returned
+        if 'deadlineMs' in params:
+            if 'since' in params or stream:
+                return jsonify({'error': 'deadlineMs cannot be combined with since or stream'}), 400
+            try:
+                deadline = parse_deadline(params['deadlineMs'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid deadlineMs'}), 400
+            events, partial = scrape_city_within(city, max_events, deadline, start_after, start_before)
+            record_demand(city, max_events, events)
+            return jsonify({'events': sort_events(events, sort), 'partial': partial})
+
+        # With `since`, only the changes after that token are returned
+        if 'since' in params:
+            if start_after or start_before:
+                return jsonify({'error': 'since cannot be combined with startAfter or startBefore'}), 400
+            try:
+                since = parse_since(params['since'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid since token'}), 400
+            events = scrape_city(city, max_events)
+            record_demand(city, max_events, events)
+            return jsonify(events_delta(city, max_events, events, since))
+
+        key = events_key(city, max_events, start_after, start_before)
+        if stream or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            # A cached result is complete, so it can be sent whole and revalidated like a JSON one
+            cached = events_cache.get(key, allow_stale=True)
+            if cached is not None:
+                record_demand(city, max_events, cached)
+                return events_response(cached, key, ndjson=True)
+            return Response(stream_with_context(stream_events(city, max_events, start_after, start_before)),
+                            mimetype='application/x-ndjson')
+
+        events = scrape_city(city, max_events, start_after=start_after, start_before=start_before)
+        record_demand(city, max_events, events)
+        return events_response(sort_events(events, sort), key)
     except Exception as e:
         logger.error(f'Error fetching events: {str(e)}')
         return jsonify({'error': 'Failed to fetch events'}), 500
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))  # Render provides the port via an environment variable
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    if workers > 1:
+        # Production mode: several uvicorn worker processes serving the ASGI app,
+        # sharing scrape results and event pages through SQLite
+        import uvicorn
+        os.environ.setdefault('SHARED_CACHE_URL', DEFAULT_SHARED_CACHE_URL)
+        uvicorn.run('asgi:app', host='0.0.0.0', port=port, workers=workers)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
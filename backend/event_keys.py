@@ -0,0 +1,48 @@
+"""
+Keys identifying events across pages, feeds and sources.
+
+Kept apart from event_store so code that only needs the keys doesn't
+import SQLAlchemy.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Mapping
+from urllib.parse import urlsplit, urlunsplit
+
+
+def canonical_event_url(url: str) -> str:
+    """
+    Canonicalize an event URL so the same event always maps to one key.
+
+    Query strings (tracking parameters such as `aff=`), fragments and
+    trailing slashes are dropped and the scheme and host are lowercased.
+
+    Args:
+        url (str): Event URL
+
+    Returns:
+        str: Canonical event URL
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower() or 'https', parts.netloc.lower(), path, '', ''))
+
+
+def event_fingerprint(event: Mapping[str, Any]) -> str:
+    """
+    Fingerprint an event's content so changes can be detected cheaply.
+
+    Args:
+        event (Mapping[str, Any]): Event or card details
+
+    Returns:
+        str: Hex digest that changes whenever any field changes
+    """
+    return hashlib.sha1(json.dumps(dict(event), sort_keys=True).encode('utf-8')).hexdigest()[:20]
+
+
+def feed_key(event: Dict[str, Any]) -> str:
+    """Identify an event within a feed by its canonical URL, or its content if it has none."""
+    if event.get('link'):
+        return canonical_event_url(event['link'])
+    return 'fingerprint:' + event_fingerprint(event)
@@ -0,0 +1,69 @@
+"""
+Compact record for event details extracted from a page.
+
+Card and event page details are held for a while: cards until their
+detail pages arrive, event pages in the shared page cache for the length
+of a batch. EventRecord keeps their fields in `__slots__` instead of a
+per-event dict, and behaves as a read-only mapping of the fields that are
+set, so code reading `details['name']`, `details.get(...)` or
+`dict(details)` works on records and dicts alike.
+"""
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+# Fields an extracted event can have, in the order they are reported
+EVENT_FIELDS = ('name', 'date_time', 'location', 'link', 'description', 'image', 'start')
+
+
+class EventRecord(Mapping):
+    """
+    Event details with a fixed set of optional fields.
+    """
+
+    __slots__ = EVENT_FIELDS
+
+    def __init__(self, name: str, date_time: str, location: str, link: str, description: str,
+                 image: str, start: Optional[str] = None):
+        """
+        Initialize the EventRecord.
+
+        Args:
+            name (str): Event title
+            date_time (str): Date and time as shown on the page
+            location (str): Venue or address
+            link (str): Event URL
+            description (str): Description text
+            image (str): Image URL
+            start (Optional[str]): UTC start timestamp; left unset (absent from the
+                mapping) when not given
+        """
+        self.name = name
+        self.date_time = date_time
+        self.location = location
+        self.link = link
+        self.description = description
+        self.image = image
+        if start is not None:
+            self.start = start
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in EVENT_FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in EVENT_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in EVENT_FIELDS if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"EventRecord({dict(self)!r})"
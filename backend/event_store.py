@@ -0,0 +1,380 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (Boolean, Column, Float, Integer, MetaData, String, Table, Text, create_engine, false, func,
+                        select)
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from event_keys import canonical_event_url, event_fingerprint, feed_key
+
+logger = logging.getLogger('event_scraper')
+
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'event_store.db')}"
+
+# How long a SQLite connection waits for another process's write lock, in milliseconds
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 30000))
+
+metadata = MetaData()
+
+event_pages = Table(
+    'event_pages', metadata,
+    Column('url', String, primary_key=True),
+    Column('details', Text, nullable=False),
+    Column('fetched_at', Float, nullable=False, index=True),
+    Column('etag', String),
+    Column('last_modified', String)
+)
+
+# Fingerprint of each event's listing entry (card) when its page was last stored
+listing_entries = Table(
+    'listing_entries', metadata,
+    Column('url', String, primary_key=True),
+    Column('fingerprint', String, nullable=False),
+    Column('seen_at', Float, nullable=False)
+)
+
+# Latest events of each (city, max events) feed with the version that last changed them
+feed_events = Table(
+    'feed_events', metadata,
+    Column('city', String, primary_key=True),
+    Column('max_events', Integer, primary_key=True),
+    Column('key', String, primary_key=True),
+    Column('event', Text, nullable=False),
+    Column('fingerprint', String, nullable=False),
+    Column('position', Integer, nullable=False),
+    Column('added_version', Integer, nullable=False),
+    Column('version', Integer, nullable=False, index=True),
+    Column('removed', Boolean, nullable=False)
+)
+
+
+def sqlite_engine(db_url: str) -> Engine:
+    """
+    Create a database engine. SQLite databases are put in WAL mode with a
+    busy timeout, so several server processes can share one file: readers
+    don't block the writer and writers wait for each other instead of failing.
+
+    Args:
+        db_url (str): SQLAlchemy database URL
+
+    Returns:
+        Engine: Database engine
+    """
+    engine = create_engine(db_url)
+    if engine.dialect.name == 'sqlite':
+        @sa_event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+            cursor.close()
+    return engine
+
+
+def create_tables(engine: Engine, tables: MetaData, attempts: int = 3) -> None:
+    """
+    Create missing tables. Worker processes starting together may race to
+    create the same table; the loser checks again instead of failing.
+
+    Args:
+        engine (Engine): Database engine
+        tables (MetaData): Tables to create
+        attempts (int): Number of tries
+    """
+    for attempt in range(attempts):
+        try:
+            tables.create_all(engine)
+            return
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+
+
+class EventStore:
+    """
+    A durable store of extracted event page details keyed by canonical event URL.
+    """
+
+    def __init__(self, db_url: str = DEFAULT_DB_URL, max_age: float = 86400.0):
+        """
+        Initialize the EventStore.
+
+        Args:
+            db_url (str): SQLAlchemy database URL
+            max_age (float): Seconds a stored page is considered fresh
+        """
+        self.max_age = max_age
+        self.engine = sqlite_engine(db_url)
+        create_tables(self.engine, metadata)
+        # Serializes the read-modify-write of feed snapshots
+        self.feed_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['EventStore']:
+        """
+        Create a store from EVENT_STORE_URL / EVENT_STORE_MAX_AGE.
+
+        Returns:
+            Optional[EventStore]: Store, or None if EVENT_STORE_URL is set to an empty string
+        """
+        db_url = os.environ.get('EVENT_STORE_URL', DEFAULT_DB_URL)
+        if not db_url:
+            return None
+        try:
+            return cls(db_url, float(os.environ.get('EVENT_STORE_MAX_AGE', 86400)))
+        except Exception as e:
+            logger.error(f"Could not open event store {db_url}: {e}")
+            return None
+
+    def get_many(self, urls: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up fresh details for several event URLs in one query.
+
+        Args:
+            urls (Iterable[str]): Event URLs (canonicalized before lookup)
+            max_age (Optional[float]): Freshness limit in seconds; defaults to the store's max_age
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Details for each fresh URL, keyed by the URL as given
+        """
+        by_key: Dict[str, List[str]] = {}
+        for url in urls:
+            by_key.setdefault(canonical_event_url(url), []).append(url)
+        if not by_key:
+            return {}
+
+        oldest = time.time() - (self.max_age if max_age is None else max_age)
+        query = select(event_pages.c.url, event_pages.c.details).where(
+            event_pages.c.url.in_(list(by_key)),
+            event_pages.c.fetched_at >= oldest
+        )
+
+        found = {}
+        with self.engine.connect() as conn:
+            for key, details in conn.execute(query):
+                for url in by_key[key]:
+                    found[url] = json.loads(details)
+        return found
+
+    def get(self, url: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up fresh details for one event URL.
+
+        Args:
+            url (str): Event URL
+            max_age (Optional[float]): Freshness limit in seconds; defaults to the store's max_age
+
+        Returns:
+            Optional[Dict[str, Any]]: Stored details or None
+        """
+        return self.get_many([url], max_age).get(url)
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Insert or update several event pages in one transaction.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Dicts with 'url' and 'details' and optionally
+                'fetched_at', 'etag' and 'last_modified'
+        """
+        now = time.time()
+        rows = {}
+        for record in records:
+            key = canonical_event_url(record['url'])
+            rows[key] = {
+                'url': key,
+                'details': json.dumps(dict(record['details'])),
+                'fetched_at': record.get('fetched_at', now),
+                'etag': record.get('etag'),
+                'last_modified': record.get('last_modified')
+            }
+        if not rows:
+            return
+
+        statement = sqlite_insert(event_pages)
+        statement = statement.on_conflict_do_update(
+            index_elements=[event_pages.c.url],
+            set_={
+                'details': statement.excluded.details,
+                'fetched_at': statement.excluded.fetched_at,
+                'etag': statement.excluded.etag,
+                'last_modified': statement.excluded.last_modified
+            }
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement, list(rows.values()))
+
+    def put(self, url: str, details: Dict[str, Any], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """
+        Insert or update one event page.
+
+        Args:
+            url (str): Event URL
+            details (Dict[str, Any]): Extracted event details
+            etag (Optional[str]): ETag of the fetched page
+            last_modified (Optional[str]): Last-Modified of the fetched page
+        """
+        self.put_many([{'url': url, 'details': details, 'etag': etag, 'last_modified': last_modified}])
+
+    def get_unchanged(self, fingerprints: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up stored details, whatever their age, for events whose listing
+        entry has not changed since their page was stored.
+
+        Args:
+            fingerprints (Dict[str, str]): Current listing entry fingerprint by event URL
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Details for each unchanged URL, keyed by the URL as given
+        """
+        by_key = {canonical_event_url(url): (url, fingerprint) for url, fingerprint in fingerprints.items()}
+        if not by_key:
+            return {}
+
+        query = select(listing_entries.c.url, listing_entries.c.fingerprint, event_pages.c.details).join(
+            event_pages, event_pages.c.url == listing_entries.c.url
+        ).where(listing_entries.c.url.in_(list(by_key)))
+
+        found = {}
+        with self.engine.connect() as conn:
+            for key, fingerprint, details in conn.execute(query):
+                url, current = by_key[key]
+                if fingerprint == current:
+                    found[url] = json.loads(details)
+        return found
+
+    def put_fingerprints(self, fingerprints: Dict[str, str]) -> None:
+        """
+        Record the listing entry fingerprints of events whose pages are stored.
+
+        Args:
+            fingerprints (Dict[str, str]): Listing entry fingerprint by event URL
+        """
+        now = time.time()
+        rows = {}
+        for url, fingerprint in fingerprints.items():
+            key = canonical_event_url(url)
+            rows[key] = {'url': key, 'fingerprint': fingerprint, 'seen_at': now}
+        if not rows:
+            return
+
+        statement = sqlite_insert(listing_entries)
+        statement = statement.on_conflict_do_update(
+            index_elements=[listing_entries.c.url],
+            set_={'fingerprint': statement.excluded.fingerprint, 'seen_at': statement.excluded.seen_at}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement, list(rows.values()))
+
+    def record_snapshot(self, city: str, max_events: int, events: List[Dict[str, Any]]) -> int:
+        """
+        Record the current events of a feed, bumping its version if anything
+        was added, changed or removed.
+
+        Args:
+            city (str): Normalized city name
+            max_events (int): Maximum number of events of the feed
+            events (List[Dict[str, Any]]): Current events in listing order
+
+        Returns:
+            int: Feed version after recording
+        """
+        feed = (feed_events.c.city == city) & (feed_events.c.max_events == max_events)
+        with self.feed_lock, self.engine.begin() as conn:
+            # Take the write lock before reading, so other server processes
+            # sharing the database can't interleave their own snapshot
+            conn.execute(feed_events.update().where(false()).values(version=feed_events.c.version))
+            previous = {row.key: row for row in conn.execute(
+                select(feed_events.c.key, feed_events.c.fingerprint, feed_events.c.position,
+                       feed_events.c.added_version, feed_events.c.version, feed_events.c.removed).where(feed)
+            )}
+            current = max((row.version for row in previous.values()), default=0)
+            version = current + 1
+
+            rows = {}
+            keys = set()
+            for position, event in enumerate(events):
+                key = feed_key(event)
+                if key in keys:
+                    continue
+                keys.add(key)
+                fingerprint = event_fingerprint(event)
+                row = previous.get(key)
+                if row is None or row.removed:
+                    added_version, row_version = version, version
+                elif row.fingerprint != fingerprint:
+                    added_version, row_version = row.added_version, version
+                elif row.position == position:
+                    continue
+                else:
+                    added_version, row_version = row.added_version, row.version
+                rows[key] = {
+                    'city': city, 'max_events': max_events, 'key': key, 'event': json.dumps(event),
+                    'fingerprint': fingerprint, 'position': position, 'added_version': added_version,
+                    'version': row_version, 'removed': False
+                }
+
+            removed = [key for key, row in previous.items() if not row.removed and key not in keys]
+
+            if not rows and not removed:
+                return current
+
+            if rows:
+                statement = sqlite_insert(feed_events)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[feed_events.c.city, feed_events.c.max_events, feed_events.c.key],
+                    set_={column: statement.excluded[column] for column in
+                          ('event', 'fingerprint', 'position', 'added_version', 'version', 'removed')}
+                )
+                conn.execute(statement, list(rows.values()))
+            if removed:
+                conn.execute(feed_events.update().where(feed & feed_events.c.key.in_(removed)),
+                             {'removed': True, 'version': version})
+
+            changed = removed or any(row['version'] == version for row in rows.values())
+            return version if changed else current
+
+    def changes_since(self, city: str, max_events: int, since: int) -> Dict[str, Any]:
+        """
+        Get the changes of a feed after a version.
+
+        Args:
+            city (str): Normalized city name
+            max_events (int): Maximum number of events of the feed
+            since (int): Version the client has; 0 (or an unknown version) returns the full list
+
+        Returns:
+            Dict[str, Any]: 'token' (current version as a string), 'full' (whether 'added'
+                is the complete list), 'added' and 'changed' events in listing order,
+                and the links of 'removed' events
+        """
+        feed = (feed_events.c.city == city) & (feed_events.c.max_events == max_events)
+        with self.engine.connect() as conn:
+            current = conn.execute(select(func.max(feed_events.c.version)).where(feed)).scalar() or 0
+            full = since <= 0 or since > current
+            query = select(feed_events.c.event, feed_events.c.added_version, feed_events.c.removed).where(feed)
+            if full:
+                query = query.where(feed_events.c.removed.is_(False))
+            else:
+                query = query.where(feed_events.c.version > since)
+            rows = conn.execute(query.order_by(feed_events.c.position)).all()
+
+        changes = {'token': str(current), 'full': full, 'added': [], 'changed': [], 'removed': []}
+        for event, added_version, removed in rows:
+            event = json.loads(event)
+            if full or (added_version > since and not removed):
+                changes['added'].append(event)
+            elif removed:
+                if added_version <= since:
+                    changes['removed'].append(event.get('link', ''))
+            else:
+                changes['changed'].append(event)
+        return changes
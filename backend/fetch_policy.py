@@ -0,0 +1,247 @@
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+import metrics
+
+logger = logging.getLogger('event_scraper')
+
+# Statuses worth retrying; 429 and 503 also mean "slow down"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+
+class CircuitBreaker:
+    """
+    A per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast for `reset_timeout` seconds. Then one trial request
+    is let through (half-open): success closes the circuit, failure opens it
+    again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half-open'."""
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent now."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Record a healthy response, closing the circuit."""
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit once the threshold is reached."""
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Give up a trial request that ended without a verdict on the host's health."""
+        with self.lock:
+            self.trial_in_flight = False
+
+
+class FetchPolicy:
+    """
+    Decides when failed fetches are retried and how long to wait, and keeps
+    a circuit breaker per host.
+
+    Retries use exponential backoff with full jitter, replaced by the
+    server's Retry-After when one is sent on a 429/5xx answer.
+    """
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the FetchPolicy.
+
+        Args:
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): Backoff ceiling for the first retry, in seconds (doubles per retry)
+            backoff_max (float): Longest wait before a retry, in seconds
+            failure_threshold (int): Consecutive failures that open a host's circuit
+            reset_timeout (float): Seconds a host's circuit stays open
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'FetchPolicy':
+        """Create a policy from FETCH_MAX_RETRIES, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX,
+        CIRCUIT_FAILURE_THRESHOLD and CIRCUIT_RESET_TIMEOUT."""
+        return cls(
+            max_retries=int(os.environ.get('FETCH_MAX_RETRIES', 3)),
+            backoff_base=float(os.environ.get('FETCH_BACKOFF_BASE', 0.5)),
+            backoff_max=float(os.environ.get('FETCH_BACKOFF_MAX', 30)),
+            failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+            reset_timeout=float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+        )
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Get (or create) the circuit breaker for a URL's host.
+
+        Args:
+            url (str): Requested URL
+
+        Returns:
+            CircuitBreaker: Breaker for the host
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.breakers[host] = breaker
+            return breaker
+
+    def allow(self, url: str) -> bool:
+        """
+        Check whether a request to the URL's host may be sent.
+
+        Args:
+            url (str): URL about to be requested
+
+        Returns:
+            bool: False while the host's circuit is open
+        """
+        if self.breaker(url).allow():
+            return True
+        logger.warning(f"Circuit open for {urlparse(url).netloc}, skipping {url}")
+        metrics.count_error('circuit_open')
+        return False
+
+    def release(self, url: str) -> None:
+        """
+        Release the host's trial request after a fetch that ended without
+        `after_attempt`, e.g. because it was cancelled or the page was too large.
+
+        Args:
+            url (str): Requested URL
+        """
+        self.breaker(url).release_trial()
+
+    def retry_after(self, headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """
+        Parse a Retry-After header given in seconds or as an HTTP date.
+
+        Args:
+            headers (Optional[Mapping[str, str]]): Response headers
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if absent or invalid
+        """
+        value = headers.get('Retry-After') if headers else None
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def retry_pause(self, headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """
+        Get how long a host asked to be left alone, capped like retry waits.
+
+        Args:
+            headers (Optional[Mapping[str, str]]): Response headers
+
+        Returns:
+            Optional[float]: Seconds, or None without a valid Retry-After
+        """
+        retry_after = self.retry_after(headers)
+        return None if retry_after is None else min(retry_after, self.backoff_max)
+
+    def backoff(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Get the wait before retry number `attempt + 1`.
+
+        Args:
+            attempt (int): 0-based number of the attempt that just failed
+            headers (Optional[Mapping[str, str]]): Response headers of the failed attempt
+
+        Returns:
+            float: Seconds to wait
+        """
+        retry_pause = self.retry_pause(headers)
+        if retry_pause is not None:
+            return retry_pause
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def after_attempt(self, url: str, attempt: int, status: Optional[int],
+                      headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+        """
+        Record the outcome of an attempt and decide whether to retry.
+
+        Args:
+            url (str): Requested URL
+            attempt (int): 0-based attempt number
+            status (Optional[int]): HTTP status, or None if the request raised
+            headers (Optional[Mapping[str, str]]): Response headers
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying, or None to stop
+        """
+        breaker = self.breaker(url)
+        if status is not None and status not in RETRYABLE_STATUSES:
+            # Upstream answered; 404 and friends say nothing about its health
+            breaker.record_success()
+            return None
+
+        breaker.record_failure()
+        if attempt >= self.max_retries or breaker.state == 'open':
+            return None
+        metrics.count_error('retry')
+        return self.backoff(attempt, headers)
+
+
+default_fetch_policy = FetchPolicy.from_env()
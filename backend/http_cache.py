@@ -0,0 +1,189 @@
+"""
+HTTP caching and compression of JSON event results.
+
+Builds the body and headers of a cacheable response, independent of the
+web framework so the Flask and ASGI routes answer alike:
+
+- the body is compressed with brotli (if the `brotli` package is
+  installed) or gzip, as the client's Accept-Encoding allows;
+- a strong ETag is derived from the uncompressed JSON, with a suffix per
+  content coding, and a request whose If-None-Match carries a tag of the
+  same content gets an empty 304;
+- Cache-Control lets clients and proxies reuse the result for as long as
+  the server's cached entry has left to be fresh, and serve it stale while
+  they revalidate for as long as the server would.
+
+Results are sent as one JSON document or, for streaming clients, as
+newline-delimited JSON (one event per line).
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, List, Optional, Tuple
+
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it responses are only gzip-compressed
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the framing would eat the gain
+MIN_COMPRESS_BYTES = 512
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def json_body(data: Any) -> bytes:
+    """Encode data as compact JSON; the same data always gives the same bytes."""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def ndjson_body(items: List[Any]) -> bytes:
+    """Encode items as newline-delimited JSON, one compact document per line."""
+    return b''.join(json_body(item) + b'\n' for item in items)
+
+
+def content_etag(body: bytes) -> str:
+    """Strong entity tag of an uncompressed body (without the quotes)."""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against the tag of the current content.
+
+    Tags are compared weakly, as RFC 9110 requires for If-None-Match, and
+    a tag sent for another content coding of the same content matches too.
+
+    Args:
+        if_none_match (Optional[str]): Header value, e.g. '"abc-gzip", "def"'
+        etag (str): Tag of the current content, without coding suffix or quotes
+
+    Returns:
+        bool: Whether the client already has the current content
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"').split('-')[0] == etag:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding of a response.
+
+    Args:
+        accept_encoding (Optional[str]): Accept-Encoding header, e.g. "gzip, deflate, br"
+
+    Returns:
+        Optional[str]: "br" or "gzip", or None to send the body as is
+    """
+    accepted = {}
+    for item in (accept_encoding or '').lower().split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip()] = quality
+
+    candidates = (['br'] if brotli else []) + ['gzip']
+    wildcard = accepted.get('*', 0.0)
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with "br" or "gzip"."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def cache_control(ttl: float, stale_ttl: float = 0.0, age: float = 0.0) -> str:
+    """
+    Cache-Control value matching what is left of a server cache entry's
+    freshness and stale windows.
+
+    Args:
+        ttl (float): Seconds the server's entries are fresh
+        stale_ttl (float): Extra seconds the server serves expired entries while refreshing them
+        age (float): Seconds since the entry was stored
+
+    Returns:
+        str: Header value, e.g. "public, max-age=120, stale-while-revalidate=600"
+    """
+    value = f"public, max-age={int(max(0.0, ttl - age))}"
+    stale = min(stale_ttl, ttl + stale_ttl - age)
+    if stale > 0:
+        value += f", stale-while-revalidate={int(stale)}"
+    return value
+
+
+def cached_response(body: bytes, content_type: str, accept_encoding: Optional[str], if_none_match: Optional[str],
+                    cache_control_value: Optional[str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """
+    Build a cacheable response.
+
+    Args:
+        body (bytes): Uncompressed body
+        content_type (str): Content-Type header value
+        accept_encoding (Optional[str]): Request's Accept-Encoding header
+        if_none_match (Optional[str]): Request's If-None-Match header
+        cache_control_value (Optional[str]): Cache-Control header value, or None to send none
+
+    Returns:
+        Tuple[int, List[Tuple[str, str]], bytes]: Status (200 or 304), headers and body
+    """
+    etag = content_etag(body)
+    encoding = choose_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    # The JSON or NDJSON form of a result may be chosen by Accept alone
+    headers = [('Vary', 'Accept, Accept-Encoding')]
+    if cache_control_value:
+        headers.append(('Cache-Control', cache_control_value))
+
+    if etag_matches(if_none_match, etag):
+        metrics.count_cache('http_etag', 'not_modified')
+        tag = f'{etag}-{encoding}' if encoding else etag
+        return 304, headers + [('ETag', f'"{tag}"')], b''
+    metrics.count_cache('http_etag', 'modified' if if_none_match else 'unconditional')
+
+    if encoding:
+        body = compress(body, encoding)
+        headers.append(('Content-Encoding', encoding))
+        etag = f'{etag}-{encoding}'
+    metrics.count_bytes('response', len(body))
+    return 200, headers + [('ETag', f'"{etag}"'), ('Content-Type', content_type),
+                           ('Content-Length', str(len(body)))], body
+
+
+def cached_json_response(data: Any, accept_encoding: Optional[str], if_none_match: Optional[str],
+                         cache_control_value: Optional[str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """
+    Build a cacheable JSON response (see cached_response).
+
+    Args:
+        data (Any): JSON-serializable result
+        accept_encoding (Optional[str]): Request's Accept-Encoding header
+        if_none_match (Optional[str]): Request's If-None-Match header
+        cache_control_value (Optional[str]): Cache-Control header value, or None to send none
+
+    Returns:
+        Tuple[int, List[Tuple[str, str]], bytes]: Status (200 or 304), headers and body
+    """
+    return cached_response(json_body(data), 'application/json', accept_encoding, if_none_match, cache_control_value)
@@ -0,0 +1,271 @@
+import os
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Tuple
+
+import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+# Brotli is only negotiated when a decoder is installed, since urllib3
+# cannot decompress "br" bodies otherwise. (Looked up without importing it.)
+if find_spec('brotli') or find_spec('brotlicffi'):
+    ACCEPT_ENCODING = "gzip, deflate, br"
+else:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+POOL_SIZE = int(os.environ.get('SCRAPER_POOL_SIZE', 20))
+VALIDATOR_CACHE_SIZE = int(os.environ.get('SCRAPER_VALIDATOR_CACHE_SIZE', 512))
+# Total size of the bodies kept for revalidation, in characters
+VALIDATOR_CACHE_BYTES = int(os.environ.get('SCRAPER_VALIDATOR_CACHE_BYTES', 64 * 1024 * 1024))
+# Largest response body (after decompression) read from upstream
+MAX_BODY_BYTES = int(os.environ.get('SCRAPER_MAX_BODY_BYTES', 5 * 1024 * 1024))
+READ_CHUNK_SIZE = 64 * 1024
+
+_session: Optional['requests.Session'] = None
+_session_lock = threading.Lock()
+
+
+class ResponseTooLarge(ValueError):
+    """A response body is larger than the maximum the scraper reads."""
+
+
+class ValidatorCache:
+    """
+    Remembers ETag / Last-Modified validators and the body they belong to
+    for recently fetched URLs, so repeat fetches can be revalidated with a
+    conditional request instead of downloading the page again.
+
+    Both the number of URLs and the total size of the stored bodies are
+    bounded; the least recently used entries are dropped first.
+    """
+
+    def __init__(self, max_entries: int = VALIDATOR_CACHE_SIZE, max_bytes: int = VALIDATOR_CACHE_BYTES):
+        """
+        Initialize the ValidatorCache.
+
+        Args:
+            max_entries (int): Maximum number of URLs to remember
+            max_bytes (int): Maximum total size of the stored bodies, in characters
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[Optional[str], Optional[str], str]]" = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """
+        Get the stored (etag, last_modified, text) for a URL.
+
+        Args:
+            url (str): Requested URL
+
+        Returns:
+            Optional[Tuple[Optional[str], Optional[str], str]]: Stored entry or None
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                self.entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], text: str) -> None:
+        """
+        Store validators and body for a URL. Responses without validators,
+        and bodies larger than the whole cache, are not stored.
+
+        Args:
+            url (str): Requested URL
+            etag (Optional[str]): ETag response header
+            last_modified (Optional[str]): Last-Modified response header
+            text (str): Response body
+        """
+        if not etag and not last_modified:
+            return
+        with self.lock:
+            previous = self.entries.pop(url, None)
+            if previous is not None:
+                self.size -= len(previous[2])
+            if len(text) > self.max_bytes:
+                return
+            self.entries[url] = (etag, last_modified, text)
+            self.size += len(text)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+validator_cache = ValidatorCache()
+
+
+def build_session(pool_size: int) -> 'requests.Session':
+    """
+    Build a session with a keep-alive connection pool and compression enabled.
+
+    Args:
+        pool_size (int): Maximum number of kept-alive connections per host
+
+    Returns:
+        requests.Session: New session
+    """
+    # Imported on first use so importing the scraper stays cheap
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Connection": "keep-alive"
+    })
+    return session
+
+
+def configure_session(pool_size: int = POOL_SIZE) -> 'requests.Session':
+    """
+    Replace the process-wide session with one using the given pool size.
+
+    Args:
+        pool_size (int): Maximum number of kept-alive connections per host
+
+    Returns:
+        requests.Session: The new shared session
+    """
+    global _session
+    session = build_session(pool_size)
+    with _session_lock:
+        old, _session = _session, session
+    if old is not None:
+        old.close()
+    return session
+
+
+def get_session() -> 'requests.Session':
+    """Get the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(POOL_SIZE)
+    return _session
+
+
+def check_content_length(url: str, headers: Mapping[str, str], max_bytes: int) -> None:
+    """
+    Reject a response up front when its declared length is over the limit.
+
+    Args:
+        url (str): Requested URL
+        headers (Mapping[str, str]): Response headers
+        max_bytes (int): Maximum body size
+
+    Raises:
+        ResponseTooLarge: If Content-Length exceeds `max_bytes`
+    """
+    length = headers.get('Content-Length', '')
+    if length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"Response from {url} is {length} bytes, over the {max_bytes} byte limit")
+
+
+def decode_body(body: bytes, charset: Optional[str]) -> str:
+    """
+    Decode a response body with the charset from its Content-Type header.
+
+    Args:
+        body (bytes): Raw body
+        charset (Optional[str]): Declared charset; UTF-8 is assumed if it is missing or unknown
+
+    Returns:
+        str: Decoded body
+    """
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def read_body(response: 'requests.Response', max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Read a streamed response body in chunks, stopping as soon as it grows past the limit.
+
+    Args:
+        response (requests.Response): Response opened with `stream=True`
+        max_bytes (int): Maximum body size after decompression
+
+    Returns:
+        str: Decoded body
+
+    Raises:
+        ResponseTooLarge: If the body exceeds `max_bytes`
+    """
+    check_content_length(response.url, response.headers, max_bytes)
+    body = bytearray()
+    for chunk in response.iter_content(READ_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f"Response from {response.url} is over the {max_bytes} byte limit")
+    # Like response.text, but without guessing the charset from the whole body. requests
+    # assumes ISO-8859-1 for text/* without a charset; pages like that are UTF-8 in practice
+    declared = 'charset=' in response.headers.get('Content-Type', '').lower()
+    return decode_body(body, response.encoding if declared else None)
+
+
+def conditional_get(url: str, headers: Dict[str, str], timeout: float = 10,
+                    max_bytes: int = MAX_BODY_BYTES) -> Tuple[int, str, Mapping[str, str]]:
+    """
+    GET a URL through the shared session, revalidating with If-None-Match /
+    If-Modified-Since when validators from an earlier fetch are known.
+
+    A 304 answer is returned as status 200 with the previously stored body.
+    The body is streamed, so an oversized page is abandoned after at most
+    `max_bytes` instead of being read into memory whole.
+
+    Args:
+        url (str): URL to request
+        headers (Dict[str, str]): Extra request headers
+        timeout (float): Request timeout in seconds
+        max_bytes (int): Maximum body size after decompression
+
+    Returns:
+        Tuple[int, str, Mapping[str, str]]: HTTP status code, response body and response headers
+
+    Raises:
+        ResponseTooLarge: If the body exceeds `max_bytes`
+    """
+    request_headers = dict(headers)
+    cached = validator_cache.get(url)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            request_headers['If-None-Match'] = etag
+        if last_modified:
+            request_headers['If-Modified-Since'] = last_modified
+
+    with get_session().get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and cached:
+            metrics.count_cache('http_validators', 'revalidated')
+            return 200, cached[2], response.headers
+        text = read_body(response, max_bytes)
+
+    if response.status_code == 200:
+        validator_cache.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), text)
+
+    return response.status_code, text, response.headers
+
+
+def cached_body(url: str) -> Optional[str]:
+    """
+    Get the last stored body for a URL, e.g. to serve while upstream is unhealthy.
+
+    Args:
+        url (str): Requested URL
+
+    Returns:
+        Optional[str]: Stored body or None
+    """
+    cached = validator_cache.get(url)
+    return cached[2] if cached else None
@@ -0,0 +1,201 @@
+"""
+Lightweight in-process metrics exposed in the Prometheus text format.
+
+Set METRICS_ENABLED=0 to turn instrumentation off; `timed` then returns the
+wrapped function unchanged and `timer` returns a shared no-op context, so
+the hot path pays nothing beyond a flag check.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Sequence, Tuple
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no', '')
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """Format a label set such as {stage="fetch",le="0.5"}."""
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """
+    A monotonically increasing counter with labels.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        """
+        Initialize the Counter.
+
+        Args:
+            name (str): Metric name
+            help_text (str): Description shown in the HELP line
+            label_names (Sequence[str]): Label names, in order
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add `amount` to the counter for a label set."""
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """
+    A cumulative histogram with labels and fixed bucket bounds.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the Histogram.
+
+        Args:
+            name (str): Metric name
+            help_text (str): Description shown in the HELP line
+            label_names (Sequence[str]): Label names, in order
+            buckets (Sequence[float]): Upper bounds of the buckets, ascending
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label set -> [per-bucket counts (+Inf last), sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for a label set."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram('scraper_stage_seconds', 'Time spent in each scraping stage.', ('stage',))
+stage_bytes = Counter('scraper_bytes_total', 'Bytes processed by each scraping stage.', ('stage',))
+stage_errors = Counter('scraper_errors_total', 'Errors raised or reported by each scraping stage.', ('stage',))
+cache_requests = Counter('scraper_cache_requests_total', 'Cache lookups by cache and result.', ('cache', 'result'))
+
+REGISTRY = [stage_seconds, stage_bytes, stage_errors, cache_requests]
+
+
+class _StageTimer:
+    """Context manager recording the duration of a stage and counting its exceptions."""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> '_StageTimer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        stage_seconds.observe(time.perf_counter() - self.start, self.stage)
+        if exc_type is not None:
+            stage_errors.inc(self.stage)
+        return False
+
+
+def timer(stage: str):
+    """
+    Time a block of code as a stage.
+
+    Args:
+        stage (str): Stage name
+
+    Returns:
+        A context manager (a shared no-op one when metrics are disabled)
+    """
+    if not ENABLED:
+        return _NULL_CONTEXT
+    return _StageTimer(stage)
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function so every call is timed as a stage.
+
+    The function is returned unchanged when metrics are disabled.
+
+    Args:
+        stage (str): Stage name
+    """
+    def decorator(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _StageTimer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_bytes(stage: str, amount: int) -> None:
+    """Add to the byte counter of a stage."""
+    if ENABLED:
+        stage_bytes.inc(stage, amount=amount)
+
+
+def count_error(stage: str) -> None:
+    """Count a handled error in a stage."""
+    if ENABLED:
+        stage_errors.inc(stage)
+
+
+def count_cache(cache: str, result: str, amount: int = 1) -> None:
+    """Count cache lookups, e.g. count_cache('events', 'hit')."""
+    if ENABLED and amount:
+        cache_requests.inc(cache, result, amount=amount)
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
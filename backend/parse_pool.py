@@ -0,0 +1,193 @@
+"""
+Optional process pool for the CPU-bound parsing stage.
+
+Building BeautifulSoup trees and extracting fields holds the GIL, so with
+many concurrent requests parse time rather than network time limits
+throughput. With PARSE_WORKERS set, fetched pages are handed to worker
+processes that send back only the small extracted dicts. With PARSE_WORKERS
+unset or 0, or if the pool cannot be used, parsing runs in-process as before.
+
+Stage timings recorded inside workers stay in the workers; the parent
+records the round trip as the `parse_pool` stage.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import metrics
+from event_record import EventRecord
+
+logger = logging.getLogger('event_scraper')
+
+# Scrapers used inside worker processes, keyed by base URL
+_worker_scrapers: Dict[str, Any] = {}
+
+
+def _worker_scraper(base_url: str) -> Any:
+    """Get the scraper a worker process uses for extraction."""
+    scraper = _worker_scrapers.get(base_url)
+    if scraper is None:
+        # Imported here so the parent's import of this module stays cheap
+        from scraper import EventScraper
+        scraper = EventScraper('parser', delay=0, base_url=base_url)
+        _worker_scrapers[base_url] = scraper
+    return scraper
+
+
+def event_page_task(html: str, url: str, base_url: str) -> EventRecord:
+    """Worker task: EventScraper.extract_event_page."""
+    return _worker_scraper(base_url).extract_event_page(html, url)
+
+
+def listing_page_task(html: str, base_url: str, seen: Set[str], limit: int,
+                      warn_if_empty: bool) -> Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]:
+    """Worker task: EventScraper.parse_listing_page."""
+    return _worker_scraper(base_url).parse_listing_page(html, seen, limit, warn_if_empty)
+
+
+class ParsePool:
+    """
+    A lazily started process pool for parse tasks with in-process fallback.
+
+    A broken pool (e.g. a worker killed by the OOM killer) is discarded and
+    the task is parsed in-process; the next task starts a fresh pool. An
+    exception raised by the task itself propagates and the pool is kept.
+    """
+
+    def __init__(self, workers: int = 0):
+        """
+        Initialize the ParsePool.
+
+        Args:
+            workers (int): Number of worker processes; 0 parses in-process
+        """
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'ParsePool':
+        """Create a pool from PARSE_WORKERS (a number, or "auto" for one per CPU)."""
+        value = os.environ.get('PARSE_WORKERS', '0').strip().lower()
+        workers = (os.cpu_count() or 1) if value == 'auto' else int(value or 0)
+        return cls(workers)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether tasks are sent to worker processes."""
+        return self.workers > 0
+
+    def get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Get the process pool, starting it on first use; None if disabled or unavailable."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            if self.executor is None:
+                try:
+                    # Forking a process with live request threads can copy held locks
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                        mp_context=multiprocessing.get_context('spawn'))
+                    logger.info(f"Started parse pool with {self.workers} workers")
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.error(f"Could not start parse pool, parsing in-process: {e}")
+                    self.workers = 0
+            return self.executor
+
+    def discard(self, executor: ProcessPoolExecutor, error: Exception) -> None:
+        """Drop a broken pool so the next task starts a new one."""
+        logger.error(f"Parse pool failed, parsing in-process: {error}")
+        metrics.count_error('parse_pool')
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, executor: ProcessPoolExecutor, task: Callable, args: Tuple) -> Optional[Future]:
+        """
+        Submit a task to the pool, discarding the pool if it no longer accepts work.
+
+        Args:
+            executor (ProcessPoolExecutor): Pool from `get_executor`
+            task (Callable): Module-level worker function
+            args (Tuple): Picklable arguments for the task
+
+        Returns:
+            Optional[Future]: Future of the task, or None if the pool is broken or shut down
+        """
+        try:
+            return executor.submit(task, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # RuntimeError here means the pool was shut down, not that the task failed
+            self.discard(executor, e)
+            return None
+
+    def run(self, task: Callable, args: Tuple, local: Callable[[], Any]) -> Any:
+        """
+        Run a parse task in a worker process, or `local` in-process if the pool is off or broken.
+
+        Args:
+            task (Callable): Module-level worker function
+            args (Tuple): Picklable arguments for the task
+            local (Callable[[], Any]): Equivalent in-process computation
+
+        Returns:
+            Any: Task result
+
+        Raises:
+            Exception: Whatever the task raises
+        """
+        executor = self.get_executor()
+        if executor is None:
+            return local()
+        with metrics.timer('parse_pool'):
+            future = self.submit(executor, task, args)
+            if future is None:
+                return local()
+            try:
+                return future.result()
+            except BrokenProcessPool as e:
+                self.discard(executor, e)
+        return local()
+
+    async def run_async(self, task: Callable, args: Tuple, local: Callable[[], Any]) -> Any:
+        """
+        Like `run`, but waits for the worker without blocking the event loop.
+
+        Args:
+            task (Callable): Module-level worker function
+            args (Tuple): Picklable arguments for the task
+            local (Callable[[], Any]): Equivalent in-process computation
+
+        Returns:
+            Any: Task result
+
+        Raises:
+            Exception: Whatever the task raises
+        """
+        executor = self.get_executor()
+        if executor is None:
+            return local()
+        with metrics.timer('parse_pool'):
+            future = self.submit(executor, task, args)
+            if future is None:
+                return local()
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool as e:
+                self.discard(executor, e)
+        return local()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+default_parse_pool = ParsePool.from_env()
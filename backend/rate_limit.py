@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Average delay between requests to the same host
+DEFAULT_DELAY = float(os.environ.get('SCRAPER_DELAY', 1.0))
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`.
+    Callers that find the bucket empty reserve a future token and sleep
+    until it becomes available, so waiting threads are served in order.
+
+    The rate adapts to throttling: `slow_down` halves it (down to
+    `min_rate_factor` of the configured rate) and `speed_up` gives back a
+    tenth of the configured rate per call (additive increase,
+    multiplicative decrease). `pause` holds every caller back for a while,
+    e.g. for the duration of a Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate_factor: float = 0.1):
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum number of tokens the bucket can hold
+            min_rate_factor (float): Lowest fraction of `rate` that throttling can reduce it to
+        """
+        self.base_rate = rate
+        self.min_rate = rate * min_rate_factor
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if none are available.
+
+        Returns:
+            float: Seconds the caller must wait before using the token
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def slow_down(self) -> None:
+        """Halve the refill rate after the server signalled throttling."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self) -> None:
+        """Move the refill rate back toward the configured rate after a success."""
+        with self.lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out no token for the next `seconds`; later callers stay spaced out after that.
+
+        Args:
+            seconds (float): Length of the pause
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(0.0, self.tokens + (now - self.updated) * self.rate)
+            # Refilling from a point in the future puts the bucket in debt until then
+            self.updated = max(now, self.updated) + seconds
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Keeps one token bucket per host so concurrent requests to the same
+    site share a single request budget.
+    """
+
+    def __init__(self, delay: float = 1.0, burst: float = 1.0):
+        """
+        Initialize the HostRateLimiter.
+
+        Args:
+            delay (float): Minimum average spacing between requests to one host, in seconds
+            burst (float): Number of requests allowed back to back before spacing applies
+        """
+        self.delay = delay
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, host: str) -> Optional[TokenBucket]:
+        """
+        Get (or create) the bucket for a host.
+
+        Args:
+            host (str): Host name, e.g. "www.eventbrite.com"
+
+        Returns:
+            Optional[TokenBucket]: Bucket for the host, or None if limiting is disabled
+        """
+        if self.delay <= 0:
+            return None
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(1.0 / self.delay, self.burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def adapt(self, url: str, throttled: bool, pause: Optional[float] = None) -> None:
+        """
+        Adjust the request rate for the URL's host after a response.
+
+        Args:
+            url (str): Requested URL
+            throttled (bool): Whether the server answered 429/503
+            pause (Optional[float]): Seconds the server asked to be left alone (Retry-After)
+        """
+        bucket = self.get_bucket(urlparse(url).netloc)
+        if bucket:
+            if throttled:
+                bucket.slow_down()
+            else:
+                bucket.speed_up()
+            if pause:
+                bucket.pause(pause)
+
+    def acquire(self, url: str) -> None:
+        """
+        Block until a request to the URL's host is allowed.
+
+        Args:
+            url (str): URL about to be requested
+        """
+        bucket = self.get_bucket(urlparse(url).netloc)
+        if bucket:
+            bucket.acquire()
+
+    async def acquire_async(self, url: str) -> None:
+        """
+        Wait without blocking the event loop until a request to the URL's host is allowed.
+
+        Args:
+            url (str): URL about to be requested
+        """
+        bucket = self.get_bucket(urlparse(url).netloc)
+        if bucket:
+            await bucket.acquire_async()
+
+
+# Limiter of scrapers that aren't given one, so per-host spacing, throttling
+# slow-downs and Retry-After pauses apply across all requests of the process
+default_rate_limiter = HostRateLimiter(DEFAULT_DELAY)
+
+
+def rate_limiter_for(delay: float) -> HostRateLimiter:
+    """
+    Get the limiter for scrapes spacing requests by `delay`.
+
+    Args:
+        delay (float): Average delay between requests to the same host
+
+    Returns:
+        HostRateLimiter: The process-wide limiter if it uses `delay`, else a new one
+    """
+    if delay == default_rate_limiter.delay:
+        return default_rate_limiter
+    return HostRateLimiter(delay)
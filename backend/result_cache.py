@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger('event_scraper')
+
+
+class ResultCache:
+    """
+    An in-process TTL + LRU cache for scrape results.
+
+    Concurrent misses for the same key are coalesced onto one in-flight
+    computation (single-flight). With a non-zero `stale_ttl`, entries that
+    have expired but are younger than `ttl + stale_ttl` are served
+    immediately while a background refresh runs (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256, stale_ttl: float = 0.0,
+                 name: str = 'result', on_store: Optional[Callable[[Hashable, Any], None]] = None):
+        """
+        Initialize the ResultCache.
+
+        Args:
+            ttl (float): Seconds an entry is considered fresh
+            max_entries (int): Maximum number of entries (least recently used are evicted)
+            stale_ttl (float): Extra seconds an expired entry may be served while it is refreshed
+            name (str): Cache name used in hit/miss metrics
+            on_store (Optional[Callable[[Hashable, Any], None]]): Called with each key and
+                value stored, e.g. to keep an index of cached results up to date
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.on_store = on_store
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.in_flight: Dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Get a cached value without computing it.
+
+        Args:
+            key (Hashable): Cache key
+            allow_stale (bool): Whether to return an expired entry still inside the stale window
+
+        Returns:
+            Optional[Any]: Cached value or None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            limit = self.ttl + (self.stale_ttl if allow_stale else 0)
+            if age > limit:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """
+        Get how long ago the entry of a key was stored.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Optional[float]: Age in seconds, or None if the key has no entry
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+        """
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        if self.on_store:
+            try:
+                self.on_store(key, value)
+            except Exception as e:
+                logger.error(f"Error handling stored result for {key}: {e}")
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], cache_empty: bool = False) -> Any:
+        """
+        Return the cached value for a key, computing it at most once across
+        concurrent callers when it is missing.
+
+        Args:
+            key (Hashable): Cache key
+            compute (Callable[[], Any]): Function producing the value
+            cache_empty (bool): Whether to store empty (falsy) results
+
+        Returns:
+            Any: Cached or freshly computed value
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= self.ttl:
+                    self.entries.move_to_end(key)
+                    metrics.count_cache(self.name, 'hit')
+                    return entry[1]
+                if age <= self.ttl + self.stale_ttl:
+                    self.entries.move_to_end(key)
+                    metrics.count_cache(self.name, 'stale')
+                    if key not in self.in_flight:
+                        future = Future()
+                        self.in_flight[key] = future
+                        threading.Thread(target=self._run, args=(key, compute, future, cache_empty),
+                                         daemon=True).start()
+                    return entry[1]
+
+            future = self.in_flight.get(key)
+            owner = future is None
+            metrics.count_cache(self.name, 'miss' if owner else 'coalesced')
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+
+        if owner:
+            self._run(key, compute, future, cache_empty)
+        return future.result()
+
+    def refresh(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Recompute a value even if a fresh one is cached, and store it if non-empty.
+
+        Args:
+            key (Hashable): Cache key
+            compute (Callable[[], Any]): Function producing the value
+
+        Returns:
+            Any: Computed value
+        """
+        value = compute()
+        if value:
+            self.put(key, value)
+        return value
+
+    async def compute_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Compute a value on the event loop and store it if non-empty.
+
+        Callers coalesce concurrent computations of a key themselves; this is
+        the hook where a shared cache makes other processes wait their turn.
+
+        Args:
+            key (Hashable): Cache key
+            compute (Callable[[], Awaitable[Any]]): Coroutine function producing the value
+
+        Returns:
+            Any: Computed value
+        """
+        value = await compute()
+        if value:
+            self.put(key, value)
+        return value
+
+    def _run(self, key: Hashable, compute: Callable[[], Any], future: Future, cache_empty: bool) -> None:
+        """Run a computation for a key and publish its result to waiting callers."""
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            logger.error(f"Error computing cached result for {key}: {e}")
+            future.set_exception(e)
+            return
+
+        if value or cache_empty:
+            self.put(key, value)
+        with self.lock:
+            self.in_flight.pop(key, None)
+        future.set_result(value)
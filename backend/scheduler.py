@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('event_scraper')
+
+# (normalized city, max events)
+ScrapeKey = Tuple[str, int]
+
+
+class JobQueue:
+    """
+    Runs city scrapes on a background worker pool and keeps their status
+    and results so clients can poll for them by job id.
+    """
+
+    def __init__(self, run: Callable[[str, int, bool], Any], workers: int = 4, max_jobs: int = 1000):
+        """
+        Initialize the JobQueue.
+
+        Args:
+            run (Callable[[str, int, bool], Any]): Function scraping (city, max_events, refresh)
+                and returning the result
+            workers (int): Number of worker threads
+            max_jobs (int): Number of finished jobs to remember (oldest are dropped)
+        """
+        self.run = run
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scrape-job')
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.active: Dict[ScrapeKey, str] = {}
+        self.lock = threading.Lock()
+
+    def enqueue(self, city: str, max_events: int, refresh: bool = False,
+                on_done: Optional[Callable[[Any], None]] = None) -> str:
+        """
+        Queue a scrape. If the same scrape is already queued or running its job id is returned.
+
+        Args:
+            city (str): Normalized city name
+            max_events (int): Maximum number of events
+            refresh (bool): Whether to scrape even if a cached result is available
+            on_done (Optional[Callable[[Any], None]]): Called with the result if a new job
+                is queued and succeeds
+
+        Returns:
+            str: Job id
+        """
+        key = (city, max_events)
+        with self.lock:
+            if key in self.active:
+                return self.active[key]
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'id': job_id,
+                'city': city,
+                'maxEvents': max_events,
+                'status': 'queued',
+                'createdAt': time.time(),
+                'finishedAt': None,
+                'result': None,
+                'error': None
+            }
+            self.active[key] = job_id
+            self._trim()
+        self.executor.submit(self._run_job, job_id, key, refresh, on_done)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a snapshot of a job.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Dict[str, Any]]: Job status dict or None if unknown
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run_job(self, job_id: str, key: ScrapeKey, refresh: bool,
+                 on_done: Optional[Callable[[Any], None]] = None) -> None:
+        """Run one job and record its outcome."""
+        self._update(job_id, status='running')
+        try:
+            result = self.run(key[0], key[1], refresh)
+            self._update(job_id, status='done', result=result, finishedAt=time.time())
+            if on_done:
+                on_done(result)
+        except Exception as e:
+            logger.error(f"Scrape job {job_id} for {key} failed: {e}")
+            self._update(job_id, status='failed', error=str(e), finishedAt=time.time())
+        finally:
+            with self.lock:
+                if self.active.get(key) == job_id:
+                    del self.active[key]
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        """Update fields of a job if it is still remembered."""
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _trim(self) -> None:
+        """Drop the oldest finished jobs beyond max_jobs; the caller must hold the lock."""
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id]['status'] in ('done', 'failed'):
+                del self.jobs[job_id]
+                excess -= 1
+
+
+class PrewarmScheduler:
+    """
+    Periodically refreshes popular cities in the background so user
+    requests are answered from the result cache.
+
+    The refreshed set is the configured hot-city list plus the most
+    requested (city, max events) pairs observed from traffic. Request
+    counts are halved every round, so pairs no longer asked for drop out,
+    and at most `max_tracked` pairs are counted at a time.
+    """
+
+    def __init__(self, jobs: JobQueue, hot_cities: Optional[List[ScrapeKey]] = None,
+                 interval: float = 240.0, top_n: int = 5, max_tracked: int = 1000):
+        """
+        Initialize the PrewarmScheduler.
+
+        Args:
+            jobs (JobQueue): Queue the refresh scrapes are submitted to
+            hot_cities (Optional[List[ScrapeKey]]): (city, max events) pairs always refreshed
+            interval (float): Seconds between refresh rounds
+            top_n (int): Number of most-requested pairs from traffic to refresh
+            max_tracked (int): Maximum number of (city, max events) pairs counted
+        """
+        self.jobs = jobs
+        self.hot_cities = list(hot_cities or [])
+        self.interval = interval
+        self.top_n = top_n
+        self.max_tracked = max(top_n, max_tracked)
+        self.requests: Counter = Counter()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+
+    def record_request(self, city: str, max_events: int) -> None:
+        """
+        Count a user request so popular cities are pre-warmed. Only requests
+        that found events should be counted, so unknown cities are never refreshed.
+
+        Args:
+            city (str): Normalized city name
+            max_events (int): Maximum number of events requested
+        """
+        with self.lock:
+            self.requests[(city, max_events)] += 1
+            if len(self.requests) > self.max_tracked:
+                # Keep the busiest half of the pairs
+                self.requests = Counter(dict(self.requests.most_common(self.max_tracked // 2)))
+
+    def targets(self) -> List[ScrapeKey]:
+        """Get the (city, max events) pairs to refresh this round, and decay the request counts."""
+        with self.lock:
+            popular = [key for key, _ in self.requests.most_common(self.top_n)]
+            self.requests = Counter({key: count // 2 for key, count in self.requests.items() if count > 1})
+        return list(dict.fromkeys(self.hot_cities + popular))
+
+    def refresh(self) -> List[str]:
+        """
+        Queue a refresh for every target.
+
+        Returns:
+            List[str]: Ids of the queued jobs
+        """
+        targets = self.targets()
+        if targets:
+            logger.info(f"Pre-warming {len(targets)} cities: {', '.join(city for city, _ in targets)}")
+        return [self.jobs.enqueue(city, max_events, refresh=True) for city, max_events in targets]
+
+    def start(self) -> None:
+        """Start the background refresh loop (does nothing if already running or disabled)."""
+        if self.thread is not None or self.interval <= 0:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._loop, name='prewarm-scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh loop."""
+        self.stopped.set()
+
+    def _loop(self) -> None:
+        """Refresh targets every interval until stopped."""
+        while not self.stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error pre-warming cities: {e}")
+            self.stopped.wait(self.interval)
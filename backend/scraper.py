@@ -0,0 +1,993 @@
+"""
+Scraping core shared by the web server and the batch CLI.
+
+Holds EventScraper and its configuration. Only what every scrape needs is
+imported up front; BeautifulSoup and the HTML extraction plans are
+imported the first time a page has to be parsed as HTML, and the event
+store is passed in by callers that use one.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import http_session
+import metrics
+from event_dates import date_parser, has_zone, parse_timestamp, to_utc_iso
+from event_keys import canonical_event_url, event_fingerprint
+from event_record import EventRecord
+from fetch_policy import RETRYABLE_STATUSES, THROTTLE_STATUSES, FetchPolicy, default_fetch_policy
+from http_session import ResponseTooLarge, conditional_get
+from parse_pool import default_parse_pool, event_page_task, listing_page_task
+from rate_limit import DEFAULT_DELAY, HostRateLimiter, rate_limiter_for
+from result_cache import ResultCache
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+    from event_store import EventStore
+
+logger = logging.getLogger('event_scraper')
+
+# Site to scrape; overridable so benchmarks can point the scraper at a local stand-in server
+BASE_URL = os.environ.get('EVENTBRITE_BASE_URL', "https://www.eventbrite.com")
+
+# Eventbrite shows about 20 events per listing page
+LISTING_PAGE_SIZE = 20
+# Upper bounds on how far a single scrape may go
+MAX_LISTING_PAGES = 50
+MAX_EVENTS = 500
+# Furthest a local time shown without a zone can be from the same time in UTC
+ZONELESS_SLACK = timedelta(hours=14)
+
+# HTML trees under construction or in use at once, across all scrapes in the
+# process. A tree takes many times the memory of its page, and building one
+# holds the GIL, so more parallel parses add memory but no throughput.
+HTML_PARSE_SLOTS = threading.BoundedSemaphore(int(os.environ.get('SCRAPER_PARSE_CONCURRENCY', 2)))
+
+# Matches <script type="application/ld+json"> blocks so their payloads can be
+# read straight from the page text without building a DOM
+JSON_LD_SCRIPT_RE = re.compile(
+    r'<script\b[^>]*?\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# User agents to rotate for avoiding rate limiting
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+]
+
+def normalize_city(city: str) -> str:
+    """
+    Normalize a city name the way Eventbrite URLs spell it.
+    
+    Args:
+        city (str): City name as entered by the user
+        
+    Returns:
+        str: Normalized city slug, e.g. "new-york"
+    """
+    return '-'.join(city.lower().split())
+
+class EventScraper:
+    """
+    A class to scrape event details from Eventbrite.
+    """
+    
+    def __init__(self, city: str, max_events: int = 10, delay: float = DEFAULT_DELAY,
+                 max_workers: int = 4, rate_limiter: Optional[HostRateLimiter] = None,
+                 event_store: Optional['EventStore'] = None, max_pages: Optional[int] = None,
+                 fetch_slots: Optional[threading.Semaphore] = None, page_cache: Optional[ResultCache] = None,
+                 fetch_policy: Optional[FetchPolicy] = None, start_after: Optional[datetime] = None,
+                 start_before: Optional[datetime] = None, base_url: Optional[str] = None,
+                 on_progress: Optional[Callable[[List[Dict[str, str]], bool], None]] = None):
+        """
+        Initialize the EventScraper.
+        
+        Args:
+            city (str): City name to search for events
+            max_events (int): Maximum number of events to scrape
+            delay (float): Average delay between requests to the same host to avoid rate limiting
+            max_workers (int): Number of event pages fetched concurrently
+            rate_limiter (Optional[HostRateLimiter]): Limiter to share with other scrapers;
+                by default the process-wide limiter, or a private one if `delay` differs from it
+            event_store (Optional[EventStore]): Persistent store consulted before fetching event pages
+            max_pages (Optional[int]): Maximum number of listing pages to crawl; by default
+                enough pages for `max_events` plus one spare
+            fetch_slots (Optional[threading.Semaphore]): Semaphore bounding concurrent requests,
+                shared between scrapers to enforce a global concurrency budget
+            page_cache (Optional[ResultCache]): Cache of event page details keyed by canonical URL,
+                shared between scrapers so a page is fetched once
+            fetch_policy (Optional[FetchPolicy]): Retry and circuit breaker policy; defaults to
+                the process-wide policy
+            start_after (Optional[datetime]): Only produce events starting at or after this time
+            start_before (Optional[datetime]): Only produce events starting before this time
+            base_url (Optional[str]): Site to scrape; EVENTBRITE_BASE_URL by default
+            on_progress (Optional[Callable[[List[Dict[str, str]], bool], None]]): Called with
+                events as they become known: each finished event (final=True), and card-level
+                stand-ins for events whose detail pages are being fetched (final=False)
+        """
+        self.city = normalize_city(city)
+        self.max_events = max_events
+        self.delay = delay
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or rate_limiter_for(delay)
+        self.event_store = event_store
+        self.fetch_slots = fetch_slots or nullcontext()
+        self.page_cache = page_cache
+        self.fetch_policy = fetch_policy or default_fetch_policy
+        self.start_after = start_after
+        self.start_before = start_before
+        if max_pages is None:
+            max_pages = -(-max_events // LISTING_PAGE_SIZE) + 1
+        self.max_pages = max(1, min(max_pages, MAX_LISTING_PAGES))
+        self.base_url = (base_url or BASE_URL).rstrip('/')
+        self.on_progress = on_progress
+        
+    def get_headers(self) -> Dict[str, str]:
+        """Get request headers with a random user agent."""
+        return {
+            "User-Agent": random.choice(USER_AGENTS),
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+        }
+    
+    def fetch_page(self, url: str) -> Optional[str]:
+        """
+        Make an HTTP request through the shared pooled session and return the page text.
+        
+        Throttled and failed requests are retried with backoff according to the
+        fetch policy, and the host's request rate is adapted to throttling. While
+        the host's circuit is open, the last stored copy of the page is returned
+        if there is one.
+        
+        Args:
+            url (str): URL to request
+            
+        Returns:
+            Optional[str]: Page HTML or None if request failed
+        """
+        if not self.fetch_policy.allow(url):
+            return http_session.cached_body(url)
+        
+        try:
+            for attempt in range(self.fetch_policy.max_retries + 1):
+                status_code, text, headers = None, None, None
+                try:
+                    self.rate_limiter.acquire(url)
+                    with self.fetch_slots, metrics.timer('fetch'):
+                        status_code, text, headers = conditional_get(url, self.get_headers(), timeout=10)
+                except ResponseTooLarge as e:
+                    # Fetching it again would only hit the same limit
+                    logger.error(f"Skipping {url}: {e}")
+                    metrics.count_error('fetch_too_large')
+                    self.fetch_policy.release(url)
+                    return None
+                except Exception as e:
+                    logger.error(f"Error making request to {url}: {e}")
+                
+                if status_code == 200:
+                    self.fetch_policy.after_attempt(url, attempt, status_code)
+                    self.rate_limiter.adapt(url, throttled=False)
+                    metrics.count_bytes('fetch', len(text))
+                    return text
+                
+                if status_code is not None:
+                    logger.error(f"Failed to retrieve page. Status code: {status_code} for URL: {url}")
+                    metrics.count_error('fetch')
+                    if status_code in THROTTLE_STATUSES:
+                        # Hold back every request to the host, not just this retry, for a Retry-After
+                        self.rate_limiter.adapt(url, throttled=True, pause=self.fetch_policy.retry_pause(headers))
+                
+                wait = self.fetch_policy.after_attempt(url, attempt, status_code, headers)
+                if wait is None:
+                    break
+                logger.info(f"Retrying {url} in {wait:.1f}s")
+                time.sleep(wait)
+        except BaseException:
+            # A cancelled or interrupted fetch must not keep the host's circuit waiting on its trial
+            self.fetch_policy.release(url)
+            raise
+        
+        if status_code is None or status_code in RETRYABLE_STATUSES:
+            # Upstream is struggling; fall back to the last good copy if we have one
+            return http_session.cached_body(url)
+        return None
+    
+    def make_request(self, url: str) -> Optional['BeautifulSoup']:
+        """
+        Make an HTTP request and return BeautifulSoup object.
+        
+        Args:
+            url (str): URL to request
+            
+        Returns:
+            Optional[BeautifulSoup]: BeautifulSoup object or None if request failed
+        """
+        html = self.fetch_page(url)
+        if html is None:
+            return None
+        return self.parse_html(html)
+    
+    @metrics.timed('html_parse')
+    def parse_html(self, html: str) -> 'BeautifulSoup':
+        """
+        Build a BeautifulSoup tree for a page.
+        
+        Args:
+            html (str): Page HTML
+            
+        Returns:
+            BeautifulSoup: Parsed document
+        """
+        # Imported on first use: JSON-LD pages and the batch CLI never need a DOM
+        from bs4 import BeautifulSoup
+        metrics.count_bytes('html_parse', len(html))
+        return BeautifulSoup(html, 'html.parser')
+    
+    @contextmanager
+    def parsed_html(self, html: str) -> Iterator['BeautifulSoup']:
+        """
+        Build a BeautifulSoup tree for a page and free it when the block ends.
+        
+        Waits for one of the process's HTML parse slots, and decomposes the
+        tree on exit so its memory is released at once rather than whenever
+        the garbage collector gets to its reference cycles. Nothing taken
+        from the tree may be kept except plain strings.
+        
+        Args:
+            html (str): Page HTML
+            
+        Yields:
+            BeautifulSoup: Parsed document
+        """
+        with HTML_PARSE_SLOTS:
+            soup = self.parse_html(html)
+            try:
+                yield soup
+            finally:
+                soup.decompose()
+    
+    def filter_json_ld_events(self, payloads: List[str]) -> List[Dict[str, Any]]:
+        """
+        Decode JSON-LD payloads and keep the Event objects.
+        
+        Args:
+            payloads (List[str]): Raw contents of JSON-LD script tags
+            
+        Returns:
+            List[Dict[str, Any]]: List of event data dictionaries
+        """
+        json_events = []
+        
+        for payload in payloads:
+            try:
+                data = json.loads(payload)
+                if isinstance(data, list):
+                    for item in data:
+                        if item.get('@type') == 'Event':
+                            json_events.append(item)
+                elif isinstance(data, dict) and data.get('@type') == 'Event':
+                    json_events.append(data)
+            except Exception as e:
+                logger.debug(f"Error parsing JSON-LD: {e}")
+                continue
+                
+        return json_events
+    
+    @metrics.timed('json_ld_extract')
+    def extract_json_ld_events(self, soup: 'BeautifulSoup') -> List[Dict[str, Any]]:
+        """
+        Extract event data from JSON-LD script tags.
+        
+        Args:
+            soup (BeautifulSoup): BeautifulSoup object of the page
+            
+        Returns:
+            List[Dict[str, Any]]: List of event data dictionaries
+        """
+        script_tags = soup.find_all('script', {'type': 'application/ld+json'})
+        return self.filter_json_ld_events([script.string for script in script_tags])
+    
+    @metrics.timed('json_ld_extract')
+    def extract_json_ld_events_from_html(self, html: str) -> List[Dict[str, Any]]:
+        """
+        Extract event data from JSON-LD script tags straight from the page text,
+        without building a BeautifulSoup tree.
+        
+        Args:
+            html (str): Page HTML
+            
+        Returns:
+            List[Dict[str, Any]]: List of event data dictionaries
+        """
+        return self.filter_json_ld_events(JSON_LD_SCRIPT_RE.findall(html))
+    
+    def extract_json_ld_event_details(self, event_data: Dict[str, Any]) -> EventRecord:
+        """
+        Extract event details from JSON-LD data.
+        
+        Args:
+            event_data (Dict[str, Any]): JSON-LD event data
+            
+        Returns:
+            EventRecord: Extracted event details
+        """
+        name = event_data.get('name', 'No Title')
+        
+        # Handle date/time
+        start_date = event_data.get('startDate', 'No Date')
+        start = None
+        try:
+            if isinstance(start_date, str) and start_date != 'No Date':
+                # Try to parse and format the date
+                dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+                start = to_utc_iso(dt)
+                start_date = dt.strftime('%A, %B %d, %Y at %I:%M %p')
+        except Exception:
+            # Keep the original string if parsing fails
+            pass
+        
+        # Handle location - extract just the essential location info
+        location = 'No Location'
+        location_data = event_data.get('location', {})
+        if isinstance(location_data, dict):
+            # First try just the venue name if available
+            if location_data.get('name'):
+                location = location_data.get('name')
+            # If no name, try to construct a clean address
+            elif location_data.get('address'):
+                addr = location_data.get('address')
+                if isinstance(addr, dict):
+                    # Only include key address components
+                    # Prefer street address + locality format
+                    if addr.get('streetAddress') and addr.get('addressLocality'):
+                        location = f"{addr.get('streetAddress')}, {addr.get('addressLocality')}"
+                        if addr.get('addressRegion'):
+                            location += f", {addr.get('addressRegion')}"
+                    # Fallback to just locality + region
+                    elif addr.get('addressLocality'):
+                        location = addr.get('addressLocality')
+                        if addr.get('addressRegion'):
+                            location += f", {addr.get('addressRegion')}"
+        
+        # Get URL
+        url = event_data.get('url', '')
+        
+        # Get description - limit length to avoid overly long descriptions
+        description = event_data.get('description', 'No description available')
+        if description and len(description) > 300:
+            description = description[:297] + "..."
+        
+        # Get image
+        image = event_data.get('image', '')
+        if isinstance(image, list) and image:
+            image = image[0]
+        
+        return EventRecord(
+            name=name,
+            date_time=start_date,
+            location=location,
+            link=url,
+            description=description,
+            image=image,
+            start=start
+        )
+    
+    @metrics.timed('card_extract')
+    def extract_html_event_details(self, card: 'BeautifulSoup', event_url: str) -> EventRecord:
+        """
+        Extract event details from HTML.
+        
+        Args:
+            card (BeautifulSoup): Event card element
+            event_url (str): Event URL
+            
+        Returns:
+            EventRecord: Extracted event details
+        """
+        from card_extractor import CARD_PLAN
+        fields = CARD_PLAN.extract(card)
+        return EventRecord(
+            name=fields['name'],
+            date_time=fields['date_time'],
+            location=fields['location'],
+            link=event_url,
+            description=fields['description'],
+            image=fields['image']
+        )
+    
+    def scrape_individual_event_page(self, url: str) -> Dict[str, str]:
+        """
+        Scrape details from an individual event page.
+        
+        Args:
+            url (str): Event URL
+            
+        Returns:
+            Dict[str, str]: Event details
+        """
+        logger.info(f"Scraping individual page: {url}")
+        html = self.fetch_page(url)
+        
+        if not html:
+            return {}
+        
+        return default_parse_pool.run(event_page_task, (html, url, self.base_url),
+                                      lambda: self.extract_event_page(html, url))
+    
+    def extract_event_page(self, html: str, url: str) -> EventRecord:
+        """
+        Extract event details from the HTML of an individual event page.
+        
+        Args:
+            html (str): Event page HTML
+            url (str): Event URL
+            
+        Returns:
+            EventRecord: Event details
+        """
+        # Try to extract from JSON-LD (most reliable)
+        json_events = self.extract_json_ld_events_from_html(html)
+        
+        if json_events:
+            return self.extract_json_ld_event_details(json_events[0])
+        
+        # Fall back to HTML parsing
+        from card_extractor import PAGE_PLAN
+        with self.parsed_html(html) as soup:
+            fields = PAGE_PLAN.extract(soup)
+        return EventRecord(
+            name=fields['name'],
+            date_time=fields['date_time'],
+            location=fields['location'],
+            link=url,
+            description=fields['description'],
+            image=fields['image']
+        )
+    
+    def iter_event_pages(self, urls: List[str],
+                         fingerprints: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        """
+        Yield details for several event pages in input order, serving stored
+        pages from the event store and fetching the rest concurrently.
+        
+        Each result is yielded as soon as it and all earlier ones are ready.
+        Closing the generator early cancels fetches that have not started.
+        
+        Args:
+            urls (List[str]): Event URLs
+            fingerprints (Optional[Dict[str, str]]): Listing entry fingerprints by URL; events
+                whose entry is unchanged reuse their stored page whatever its age
+            
+        Yields:
+            Dict[str, str]: Event details (an empty dict where scraping failed)
+        """
+        stored = self.lookup_event_pages(urls, fingerprints)
+        
+        # The rate limiter keeps requests to each host spaced out
+        missing = [url for url in urls if url not in stored]
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) if missing else None
+        futures = {url: executor.submit(self.scrape_individual_event_page_safe, url) for url in missing}
+        fetched = {}
+        try:
+            for url in urls:
+                if url in stored:
+                    yield stored[url]
+                else:
+                    fetched[url] = futures[url].result()
+                    yield fetched[url]
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.save_event_pages(fetched, stored, fingerprints)
+    
+    def lookup_event_pages(self, urls: List[str],
+                           fingerprints: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Find event pages that need not be fetched: recently stored ones, and
+        older ones whose listing entry is unchanged since they were stored.
+        
+        Args:
+            urls (List[str]): Event URLs
+            fingerprints (Optional[Dict[str, str]]): Listing entry fingerprints by URL
+            
+        Returns:
+            Dict[str, Dict[str, str]]: Stored details keyed by URL
+        """
+        if not self.event_store:
+            return {}
+        
+        stored = {}
+        unchanged = 0
+        try:
+            stored = self.event_store.get_many(urls)
+            if fingerprints:
+                older = {url: fingerprint for url, fingerprint in fingerprints.items() if url not in stored}
+                found = self.event_store.get_unchanged(older)
+                unchanged = len(found)
+                stored.update(found)
+        except Exception as e:
+            logger.error(f"Error reading event store: {e}")
+        metrics.count_cache('event_store', 'hit', len(stored) - unchanged)
+        metrics.count_cache('event_store', 'unchanged', unchanged)
+        metrics.count_cache('event_store', 'miss', len(urls) - len(stored))
+        if stored:
+            logger.info(f"Serving {len(stored)} of {len(urls)} event pages from the event store "
+                        f"({unchanged} unchanged since last scrape)")
+        return stored
+    
+    def scrape_event_pages(self, urls: List[str]) -> List[Dict[str, str]]:
+        """
+        Get details for several event pages (see iter_event_pages).
+        
+        Args:
+            urls (List[str]): Event URLs
+            
+        Returns:
+            List[Dict[str, str]]: Event details in the same order as `urls`
+                (an empty dict where scraping failed)
+        """
+        return list(self.iter_event_pages(urls))
+    
+    def save_event_pages(self, pages: Dict[str, Dict[str, str]], stored: Optional[Dict[str, Dict[str, str]]] = None,
+                         fingerprints: Optional[Dict[str, str]] = None) -> None:
+        """
+        Write freshly scraped event pages to the event store in one bulk upsert,
+        along with the listing entry fingerprints of all pages now stored.
+        
+        Args:
+            pages (Dict[str, Dict[str, str]]): Event details keyed by event URL
+            stored (Optional[Dict[str, Dict[str, str]]]): Pages served from the store
+            fingerprints (Optional[Dict[str, str]]): Listing entry fingerprints by URL
+        """
+        if not self.event_store:
+            return
+        
+        records = []
+        for url, details in pages.items():
+            if not details:
+                continue
+            validators = http_session.validator_cache.get(url)
+            records.append({
+                'url': url,
+                'details': details,
+                'etag': validators[0] if validators else None,
+                'last_modified': validators[1] if validators else None
+            })
+        try:
+            self.event_store.put_many(records)
+            if fingerprints:
+                saved = {record['url'] for record in records} | set(stored or ())
+                self.event_store.put_fingerprints({url: fingerprint for url, fingerprint in fingerprints.items()
+                                                   if url in saved})
+        except Exception as e:
+            logger.error(f"Error writing event store: {e}")
+    
+    def scrape_individual_event_page_safe(self, url: str) -> Dict[str, str]:
+        """
+        Scrape an individual event page, returning an empty dict on any error.
+        
+        Args:
+            url (str): Event URL
+            
+        Returns:
+            Dict[str, str]: Event details or an empty dict
+        """
+        try:
+            if self.page_cache:
+                return self.page_cache.get_or_compute(canonical_event_url(url),
+                                                      lambda: self.scrape_individual_event_page(url))
+            return self.scrape_individual_event_page(url)
+        except Exception as e:
+            logger.error(f"Error scraping event page {url}: {e}")
+            return {}
+    
+    def clean_text(self, text: str) -> str:
+        """
+        Clean text by removing extra whitespace and newlines.
+        
+        Args:
+            text (str): Text to clean
+            
+        Returns:
+            str: Cleaned text
+        """
+        if not text:
+            return ""
+        return " ".join(text.split())
+    
+    def extract_event_link(self, card: 'BeautifulSoup') -> Optional[str]:
+        """
+        Extract event link from card.
+        
+        Args:
+            card (BeautifulSoup): Event card element
+            
+        Returns:
+            Optional[str]: Event URL or None if not found
+        """
+        # Find any link that looks like an Eventbrite event link
+        link_element = card.find('a', href=lambda href: href and ('/e/' in href or 'eventbrite.com/e/' in href))
+        
+        if not link_element:
+            # Try any link
+            link_element = card.find('a')
+            
+        if not link_element or not link_element.get('href'):
+            return None
+            
+        event_url = link_element.get('href')
+        
+        # Check if URL is valid
+        if not (event_url.startswith('http') or event_url.startswith('/')):
+            return None
+            
+        # Add base URL if needed
+        if not event_url.startswith('http'):
+            event_url = f"{self.base_url}{event_url}"
+            
+        return event_url
+    
+    @metrics.timed('scrape_events')
+    def scrape_events(self, scrape_individual: bool = True) -> List[Dict[str, str]]:
+        """
+        Scrape events from Eventbrite.
+        
+        Args:
+            scrape_individual (bool): Whether to scrape individual event pages
+            
+        Returns:
+            List[Dict[str, str]]: List of event dictionaries
+        """
+        return list(self.iter_events(scrape_individual))
+    
+    def iter_events(self, scrape_individual: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        Scrape events from Eventbrite, yielding each cleaned event as soon as it is ready.
+        
+        Listing pages are crawled in order (later pages fetched concurrently in
+        batches) and events are deduplicated by canonical URL across pages and
+        across the JSON-LD and HTML card paths. Stops fetching as soon as
+        `max_events` events have been produced or the generator is closed.
+        
+        Args:
+            scrape_individual (bool): Whether to scrape individual event pages
+            
+        Yields:
+            Dict[str, str]: Cleaned event dictionaries
+        """
+        seen = set()
+        count = 0
+        
+        pages = self.iter_listing_pages()
+        try:
+            for page_number, html in enumerate(pages, 1):
+                page_count = 0
+                seen_before = len(seen)
+                page_events = self.iter_listing_events(html, scrape_individual, seen, self.page_limit(count),
+                                                       warn_if_empty=page_number == 1)
+                del html
+                try:
+                    for event in page_events:
+                        if self.on_progress:
+                            self.on_progress([event], True)
+                        yield event
+                        count += 1
+                        page_count += 1
+                        if count >= self.max_events:
+                            return
+                finally:
+                    page_events.close()
+                
+                # A page with nothing new means we've run past the end of the listing
+                if not page_count and len(seen) == seen_before:
+                    return
+        finally:
+            pages.close()
+    
+    def has_window(self) -> bool:
+        """Whether only events in a time window are wanted."""
+        return self.start_after is not None or self.start_before is not None
+    
+    def in_window(self, event: Dict[str, Any], approximate: bool = False) -> bool:
+        """
+        Check an event against the time window (`start_after` inclusive,
+        `start_before` exclusive); with a window, events without a known start never match.
+        
+        Args:
+            event (Dict[str, Any]): Event or card details with a 'start' timestamp
+            approximate (bool): Whether the start was parsed from display text; unless that
+                names a zone, the window is widened by ZONELESS_SLACK on both sides
+            
+        Returns:
+            bool: Whether the event should be produced
+        """
+        if not self.has_window():
+            return True
+        if not event.get('start'):
+            return False
+        start = parse_timestamp(event['start'])
+        slack = ZONELESS_SLACK if approximate and not has_zone(event.get('date_time', '')) else timedelta(0)
+        return ((self.start_after is None or start + slack >= self.start_after)
+                and (self.start_before is None or start - slack < self.start_before))
+    
+    def may_be_in_window(self, card_details: Dict[str, Any]) -> bool:
+        """Whether a card's event could be in the window; its detail page may still tell."""
+        return not card_details.get('start') or self.in_window(card_details, approximate=True)
+    
+    def card_event_in_window(self, event: Dict[str, Any], event_details: Dict[str, Any]) -> bool:
+        """Check a finished card event against the window; only a detail page's JSON-LD start is exact."""
+        return self.in_window(event, approximate=not event_details.get('start'))
+    
+    def page_limit(self, count: int) -> int:
+        """Maximum number of events to take from the next listing page after `count` were produced."""
+        # With a window some events are dropped after parsing, so take the whole page
+        return MAX_EVENTS if self.has_window() else self.max_events - count
+    
+    def get_listing_url(self, page: int = 1) -> str:
+        """
+        Get the URL of a city listing page.
+        
+        Args:
+            page (int): 1-based page number
+            
+        Returns:
+            str: Listing page URL
+        """
+        url = f"{self.base_url}/d/{self.city}/all-events/"
+        if page > 1:
+            url += f"?page={page}"
+        return url
+    
+    def iter_listing_pages(self) -> Iterator[str]:
+        """
+        Fetch listing pages in order, yielding each page's HTML.
+        
+        Page 1 is fetched alone; later pages are fetched `max_workers` at a time
+        and only once the consumer asks for them. Stops at the first page that
+        fails to load or after `max_pages`.
+        
+        Yields:
+            str: Listing page HTML
+        """
+        url = self.get_listing_url(1)
+        logger.info(f"Fetching events from {url}")
+        html = self.fetch_page(url)
+        if not html:
+            return
+        yield html
+        
+        page = 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while page <= self.max_pages:
+                batch = [self.get_listing_url(n) for n in range(page, min(page + self.max_workers, self.max_pages + 1))]
+                page += len(batch)
+                logger.info(f"Fetching {len(batch)} more listing pages from {batch[0]}")
+                for html in executor.map(self.fetch_page, batch):
+                    if not html:
+                        return
+                    yield html
+    
+    def iter_listing_events(self, html: str, scrape_individual: bool, seen: set, limit: int,
+                            warn_if_empty: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        Extract events from one listing page, skipping any already in `seen`.
+        
+        Args:
+            html (str): Listing page HTML
+            scrape_individual (bool): Whether to scrape individual event pages
+            seen (set): Canonical URLs of events already produced; updated in place
+            limit (int): Maximum number of events to produce from this page
+            warn_if_empty (bool): Whether to log a warning if the page has no event elements
+            
+        Yields:
+            Dict[str, str]: Cleaned event dictionaries
+        """
+        json_ld_events, card_links = self.extract_listing_page(html, seen, limit, warn_if_empty)
+        # Don't keep the page text alive while the detail pages are fetched
+        del html
+        yield from (event for event in json_ld_events if self.in_window(event))
+        
+        # Skip detail pages of events the card already places outside the window
+        card_links = [link for link in card_links if self.may_be_in_window(link[0])]
+        
+        # Get detailed information from individual event pages if enabled
+        if scrape_individual and card_links:
+            self.report_pending(card_links)
+            page_details = self.iter_event_pages([event_url for _, event_url in card_links],
+                                                 self.card_fingerprints(card_links))
+        else:
+            page_details = ({} for _ in card_links)
+        
+        try:
+            for (card_details, event_url), event_details in zip(card_links, page_details):
+                event = self.finish_card_event(card_details, event_url, event_details)
+                if event and self.card_event_in_window(event, event_details):
+                    yield event
+        finally:
+            page_details.close()
+    
+    def extract_listing_page(self, html: str, seen: set, limit: int,
+                             warn_if_empty: bool = True) -> Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]:
+        """
+        Parse one listing page (in a parse worker process if enabled) and
+        record the events it produced in `seen` (see parse_listing_page).
+        
+        Args:
+            html (str): Listing page HTML
+            seen (set): Canonical URLs of events already produced; updated in place
+            limit (int): Maximum number of events to take from this page
+            warn_if_empty (bool): Whether to log a warning if the page has no event elements
+            
+        Returns:
+            Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]: Cleaned JSON-LD events
+                and (card details, event URL) pairs
+        """
+        events, card_links = default_parse_pool.run(
+            listing_page_task, (html, self.base_url, seen, limit, warn_if_empty),
+            lambda: self.parse_listing_page(html, seen, limit, warn_if_empty))
+        self.mark_seen(seen, events, card_links)
+        return events, card_links
+    
+    def mark_seen(self, seen: set, events: List[Dict[str, str]],
+                  card_links: List[Tuple[EventRecord, str]]) -> None:
+        """Add the canonical URLs of a parsed listing page's events to `seen`."""
+        seen.update(canonical_event_url(event['link']) for event in events if event['link'])
+        seen.update(canonical_event_url(event_url) for _, event_url in card_links)
+    
+    def parse_listing_page(self, html: str, seen: set, limit: int,
+                           warn_if_empty: bool = True) -> Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]:
+        """
+        Parse one listing page into finished JSON-LD events and the event cards
+        that still need their detail pages, skipping events already in `seen`.
+        
+        Card fields are extracted here so only plain records leave this method;
+        they are used when an event's detail page cannot be scraped, and the
+        HTML tree is freed before returning.
+        
+        Args:
+            html (str): Listing page HTML
+            seen (set): Canonical URLs of events already produced (not modified)
+            limit (int): Maximum number of events to take from this page
+            warn_if_empty (bool): Whether to log a warning if the page has no event elements
+            
+        Returns:
+            Tuple[List[Dict[str, str]], List[Tuple[EventRecord, str]]]: Cleaned JSON-LD events
+                and (card details, event URL) pairs
+        """
+        events = []
+        page_seen = set()
+        
+        # Try to extract from JSON-LD first
+        json_events = self.extract_json_ld_events_from_html(html)
+        logger.info(f"Found {len(json_events)} events in JSON-LD data")
+        
+        for event_data in json_events:
+            event_details = self.extract_json_ld_event_details(event_data)
+            if event_details['link']:
+                key = canonical_event_url(event_details['link'])
+                if key in seen or key in page_seen:
+                    continue
+                page_seen.add(key)
+            events.append(self.clean_event_details(event_details))
+            
+            if len(events) >= limit:
+                return events, []
+        
+        # Fall back to HTML parsing if needed
+        logger.info("Falling back to HTML parsing")
+        with self.parsed_html(html) as soup:
+            # Try different selectors to find event cards, starting with the one that worked last
+            from card_extractor import EVENT_CARD_SELECTORS
+            event_cards = EVENT_CARD_SELECTORS.select(soup)
+            
+            logger.info(f"Found {len(event_cards)} potential event cards in HTML")
+            
+            if not event_cards:
+                # If no cards found but we have some events from JSON-LD, those are all we have
+                if not events and warn_if_empty:
+                    logger.warning("Could not find event elements. Website structure may have changed.")
+                return events, []
+            
+            # Collect links first so the event pages can be fetched concurrently
+            card_links = []
+            for card in event_cards:
+                try:
+                    event_url = self.extract_event_link(card)
+                    if not event_url:
+                        continue
+                    key = canonical_event_url(event_url)
+                    if key in seen or key in page_seen:
+                        continue
+                    card_links.append((self.extract_html_event_details(card, event_url), event_url))
+                    page_seen.add(key)
+                except Exception as e:
+                    logger.error(f"Error processing event: {e}")
+                    continue
+                if len(events) + len(card_links) >= limit:
+                    break
+        
+        # Parse all card dates of the page in one batch
+        starts = date_parser.parse_many(card_details['date_time'] for card_details, _ in card_links)
+        for (card_details, _), start in zip(card_links, starts):
+            card_details['start'] = start
+        
+        return events, card_links
+    
+    def report_pending(self, card_links: List[Tuple[EventRecord, str]]) -> None:
+        """Report the cards of events whose detail pages are about to be fetched to on_progress."""
+        if not self.on_progress:
+            return
+        events = [self.finish_card_event(card_details, event_url, {}) for card_details, event_url in card_links]
+        self.on_progress([event for event in events if event and self.in_window(event, approximate=True)], False)
+    
+    def card_fingerprints(self, card_links: List[Tuple[EventRecord, str]]) -> Dict[str, str]:
+        """Fingerprint each card so unchanged events can skip their detail page."""
+        # Only the card's own text counts: the start parsed from "Tomorrow at 7 PM" changes every day
+        return {event_url: event_fingerprint({field: card_details[field] for field in card_details if field != 'start'})
+                for card_details, event_url in card_links}
+    
+    def finish_card_event(self, card_details: Dict[str, str], event_url: str,
+                          event_details: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Turn an event card and its (possibly empty) detail page result into a cleaned event.
+        
+        Args:
+            card_details (Dict[str, str]): Details extracted from the event card
+            event_url (str): Event URL
+            event_details (Dict[str, str]): Details from the event page, or an empty dict
+            
+        Returns:
+            Optional[Dict[str, str]]: Cleaned event details or None if processing failed
+        """
+        try:
+            # If individual scraping failed or wasn't enabled, use the card
+            return self.clean_event_details(event_details or card_details)
+        except Exception as e:
+            logger.error(f"Error processing event: {e}")
+            return None
+    
+    @metrics.timed('clean')
+    def clean_event_details(self, event: Dict[str, str]) -> Dict[str, str]:
+        """
+        Clean event details.
+        
+        Args:
+            event (Dict[str, str]): Event details
+            
+        Returns:
+            Dict[str, str]: Cleaned event details
+        """
+        # Clean location - remove excessive text
+        location = self.clean_text(event.get('location', 'Location not available'))
+        # If location is too long, it's likely containing other content
+        if len(location) > 100:
+            # Try to extract just the first line or sentence
+            if '\n' in location:
+                location = location.split('\n')[0].strip()
+            elif '.' in location:
+                location = location.split('.')[0].strip() + '.'
+            # Last resort - limit to first 80 chars
+            if len(location) > 100:
+                location = location[:80] + '...'
+        
+        return {
+            'name': self.clean_text(event.get('name', 'Untitled Event')),
+            'date_time': self.clean_text(event.get('date_time', 'Date not available')),
+            'location': location,
+            'link': event.get('link', ''),
+            'description': self.clean_text(event.get('description', 'No description available')),
+            'image': event.get('image', ''),
+            'start': event.get('start') or date_parser.parse_one(event.get('date_time', ''))
+        }
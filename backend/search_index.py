@@ -0,0 +1,210 @@
+"""
+In-memory inverted index over scraped events.
+
+Results land in the index as scrapes are stored in the result cache, so
+keyword, city and date-window queries are answered from memory without
+fetching anything from Eventbrite.
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from event_dates import date_parser, parse_timestamp
+from event_keys import feed_key
+
+# Indexed fields and how much a match in each counts towards the score
+FIELD_WEIGHTS = {'name': 3.0, 'location': 1.5, 'description': 1.0}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[str]: Terms of two or more characters
+    """
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def event_date(event: Dict[str, Any]) -> Optional[date]:
+    """
+    Get the calendar date (UTC) an event starts on.
+
+    Args:
+        event (Dict[str, Any]): Cleaned event; its `date_time` text is parsed if
+            it has no `start` timestamp, e.g. when stored by an older version
+
+    Returns:
+        Optional[date]: Event date or None if it is not known
+    """
+    start = event.get('start') or date_parser.parse_one(event.get('date_time', ''))
+    return parse_timestamp(start).date() if start else None
+
+
+class SearchIndex:
+    """
+    A thread-safe inverted index over the `name`, `description` and
+    `location` fields of scraped events, ranked with BM25.
+
+    Results are added per cache key (normalized city, max events); storing
+    a new result for a key replaces the previous one, and the least recently
+    updated keys are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 256):
+        """
+        Initialize the SearchIndex.
+
+        Args:
+            max_keys (int): Maximum number of results (cache keys) kept in the index
+        """
+        self.max_keys = max_keys
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.terms: Dict[str, Dict[str, float]] = {}
+        self.lengths: Dict[str, float] = {}
+        self.dates: Dict[str, Optional[date]] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.key_docs: "OrderedDict[Hashable, Set[str]]" = OrderedDict()
+        self.doc_cities: Dict[str, Counter] = {}
+        self.total_length = 0.0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of indexed events."""
+        return len(self.events)
+
+    def update(self, key: Tuple[str, int], events: List[Dict[str, Any]]) -> None:
+        """
+        Replace the events indexed for a cache key.
+
+        Args:
+            key (Tuple[str, int]): (normalized city, max events)
+            events (List[Dict[str, Any]]): Cleaned events
+        """
+        city = key[0]
+        with self.lock:
+            docs = set()
+            for event in events:
+                doc = feed_key(event)
+                docs.add(doc)
+                if self.events.get(doc) != event:
+                    self._remove_doc(doc)
+                    self._add_doc(doc, event)
+
+            old = self.key_docs.pop(key, set())
+            for doc in docs - old:
+                self.doc_cities.setdefault(doc, Counter())[city] += 1
+            self._release(old - docs, city)
+            self.key_docs[key] = docs
+
+            while len(self.key_docs) > self.max_keys:
+                evicted_key, evicted = self.key_docs.popitem(last=False)
+                self._release(evicted, evicted_key[0])
+
+    def remove(self, key: Tuple[str, int]) -> None:
+        """Drop the events indexed for a cache key."""
+        with self.lock:
+            self._release(self.key_docs.pop(key, set()), key[0])
+
+    def _release(self, docs: Set[str], city: str) -> None:
+        """Remove a city from events, dropping events no longer in any result."""
+        for doc in docs:
+            cities = self.doc_cities.get(doc)
+            if cities is None:
+                continue
+            cities[city] -= 1
+            if cities[city] <= 0:
+                del cities[city]
+            if not cities:
+                del self.doc_cities[doc]
+                self._remove_doc(doc)
+
+    def _add_doc(self, doc: str, event: Dict[str, Any]) -> None:
+        """Index one event."""
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(str(event.get(field) or '')):
+                terms[token] = terms.get(token, 0.0) + weight
+        for token, frequency in terms.items():
+            self.postings.setdefault(token, {})[doc] = frequency
+        length = sum(terms.values())
+        self.events[doc] = event
+        self.terms[doc] = terms
+        self.lengths[doc] = length
+        self.dates[doc] = event_date(event)
+        self.total_length += length
+
+    def _remove_doc(self, doc: str) -> None:
+        """Remove one event from the postings."""
+        terms = self.terms.pop(doc, None)
+        if terms is None:
+            return
+        for token in terms:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc, None)
+                if not posting:
+                    del self.postings[token]
+        self.total_length -= self.lengths.pop(doc, 0.0)
+        self.events.pop(doc, None)
+        self.dates.pop(doc, None)
+
+    def search(self, query: str = '', city: Optional[str] = None, start: Optional[date] = None,
+               end: Optional[date] = None, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Find events matching all query terms, optionally within a city and date window.
+
+        Args:
+            query (str): Keywords; empty matches every event
+            city (Optional[str]): Normalized city name
+            start (Optional[date]): Earliest event date (inclusive)
+            end (Optional[date]): Latest event date (inclusive)
+            limit (int): Maximum number of events returned
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: Number of matching events and the best
+                `limit` of them, best first (soonest first without keywords)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self.lock:
+            if terms:
+                postings = [self.postings.get(term, {}) for term in terms]
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for posting in postings[1:]:
+                    candidates &= posting.keys()
+            else:
+                candidates = set(self.events)
+
+            if city:
+                candidates = {doc for doc in candidates if city in self.doc_cities.get(doc, ())}
+            if start or end:
+                candidates = {doc for doc in candidates if self.dates[doc] is not None
+                              and (not start or self.dates[doc] >= start)
+                              and (not end or self.dates[doc] <= end)}
+
+            count = len(self.events)
+            average_length = self.total_length / count if count else 0.0
+            scored = []
+            for doc in candidates:
+                score = 0.0
+                for term in terms:
+                    frequency = self.terms[doc][term]
+                    matching = len(self.postings[term])
+                    idf = math.log(1 + (count - matching + 0.5) / (matching + 0.5))
+                    norm = 1 - B + B * (self.lengths[doc] / average_length if average_length else 0.0)
+                    score += idf * frequency * (K1 + 1) / (frequency + K1 * norm)
+                scored.append((-score, self.dates[doc] or date.max, doc))
+            scored.sort()
+            return len(scored), [self.events[doc] for _, _, doc in scored[:limit]]
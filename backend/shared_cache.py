@@ -0,0 +1,251 @@
+"""
+Result cache shared by the server's worker processes through SQLite.
+
+Each worker keeps its in-process ResultCache as a first level and writes
+every stored result to a SQLite database in WAL mode, where the other
+workers find it. A scrape is guarded by a lease row per key, so while one
+worker scrapes a city the others wait for its result instead of scraping
+it too. A lease expires after `lease_ttl` seconds, so a worker that dies
+mid-scrape only holds the others up until then.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import metrics
+from event_store import create_tables, sqlite_engine
+from result_cache import ResultCache
+
+logger = logging.getLogger('event_scraper')
+
+DEFAULT_SHARED_CACHE_URL = f"sqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shared_cache.db')}"
+
+metadata = MetaData()
+
+shared_results = Table(
+    'shared_results', metadata,
+    Column('key', String, primary_key=True),
+    Column('value', Text, nullable=False),
+    Column('stored_at', Float, nullable=False, index=True)
+)
+
+# Which process is computing a key, and until when its claim holds
+leases = Table(
+    'leases', metadata,
+    Column('key', String, primary_key=True),
+    Column('owner', String, nullable=False),
+    Column('expires_at', Float, nullable=False)
+)
+
+
+def encode_key(key: Hashable) -> str:
+    """Serialize a cache key (a string or a tuple of JSON values) for the database."""
+    return json.dumps(key)
+
+
+class SharedResultCache(ResultCache):
+    """
+    A ResultCache whose entries are shared with other processes through
+    SQLite, with cross-process single-flight.
+    """
+
+    def __init__(self, db_url: str = DEFAULT_SHARED_CACHE_URL, ttl: float = 300.0, max_entries: int = 256,
+                 stale_ttl: float = 0.0, name: str = 'result',
+                 on_store: Optional[Callable[[Hashable, Any], None]] = None,
+                 lease_ttl: float = 120.0, poll_interval: float = 0.25):
+        """
+        Initialize the SharedResultCache.
+
+        Args:
+            db_url (str): SQLAlchemy URL of the SQLite database shared by the workers
+            ttl (float): Seconds an entry is considered fresh
+            max_entries (int): Maximum number of entries kept in this process
+            stale_ttl (float): Extra seconds an expired entry may be served while it is refreshed
+            name (str): Cache name used in hit/miss metrics
+            on_store (Optional[Callable[[Hashable, Any], None]]): Called with each key and value
+                stored in or loaded into this process
+            lease_ttl (float): Seconds a worker may compute a key before others take over
+            poll_interval (float): Seconds between checks while waiting for another worker
+        """
+        super().__init__(ttl=ttl, max_entries=max_entries, stale_ttl=stale_ttl, name=name, on_store=on_store)
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{id(self):x}"
+        self.engine = sqlite_engine(db_url)
+        create_tables(self.engine, metadata)
+        # Values just loaded from the database, which must not be written back by put()
+        self.loaded: Dict[Hashable, Any] = {}
+        self.loaded_lock = threading.Lock()
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        value = super().get(key, allow_stale)
+        if value is None:
+            value = self._load(key, allow_stale=allow_stale)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        super().put(key, value)
+        with self.loaded_lock:
+            from_store = self.loaded.get(key) is value
+            self.loaded.pop(key, None)
+        if not from_store:
+            self._save(key, value)
+        self._release(key)
+
+    def invalidate(self, key: Hashable) -> None:
+        super().invalidate(key)
+        with self.engine.begin() as conn:
+            conn.execute(delete(shared_results).where(shared_results.c.key == encode_key(key)))
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], cache_empty: bool = False) -> Any:
+        if super().get(key, allow_stale=True) is None:
+            # Bring in a result another worker stored, so it is served (or refreshed) like a local one
+            self._load(key, allow_stale=True)
+        return super().get_or_compute(key, lambda: self._compute_once(key, compute), cache_empty)
+
+    def refresh(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # Every worker runs the pre-warm rounds; only one refresh per half TTL goes upstream
+        value = self._load(key, newer_than=time.time() - self.ttl / 2)
+        if value is not None:
+            metrics.count_cache(self.name, 'shared_recent')
+            return value
+        value = self._compute_once(key, compute)
+        if value:
+            self.put(key, value)
+        return value
+
+    async def compute_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.time()
+        while True:
+            claimed = await asyncio.to_thread(self._claim, key)
+            value = await asyncio.to_thread(self._load, key, False, started)
+            if value is not None:
+                if claimed:
+                    await asyncio.to_thread(self._release, key)
+                metrics.count_cache(self.name, 'shared_wait')
+                return value
+            if claimed:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            value = await compute()
+        except BaseException:
+            await asyncio.to_thread(self._release, key)
+            raise
+        if value:
+            self.put(key, value)
+        else:
+            await asyncio.to_thread(self._release, key)
+        return value
+
+    def _compute_once(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Compute a value unless another process is already doing so, in which
+        case wait for its result. The lease taken here is released by put(),
+        once the result is in the database.
+        """
+        started = time.time()
+        while True:
+            claimed = self._claim(key)
+            # Check after claiming too: the previous holder may have just stored its result
+            value = self._load(key, newer_than=started)
+            if value is not None:
+                if claimed:
+                    self._release(key)
+                metrics.count_cache(self.name, 'shared_wait')
+                with self.loaded_lock:
+                    self.loaded[key] = value
+                return value
+            if claimed:
+                break
+            time.sleep(self.poll_interval)
+
+        try:
+            value = compute()
+        except BaseException:
+            self._release(key)
+            raise
+        if not value:
+            # Empty results aren't stored, so nothing else will release the lease
+            self._release(key)
+        return value
+
+    def _load(self, key: Hashable, allow_stale: bool = False, newer_than: Optional[float] = None) -> Optional[Any]:
+        """
+        Read a result from the database into this process.
+
+        Args:
+            key (Hashable): Cache key
+            allow_stale (bool): Whether to accept an entry inside the stale window
+            newer_than (Optional[float]): Only accept an entry stored after this time
+
+        Returns:
+            Optional[Any]: Stored value or None
+        """
+        with self.engine.connect() as conn:
+            row = conn.execute(select(shared_results.c.value, shared_results.c.stored_at)
+                               .where(shared_results.c.key == encode_key(key))).first()
+        if row is None or (newer_than is not None and row.stored_at < newer_than):
+            return None
+        age = max(0.0, time.time() - row.stored_at)
+        if age > self.ttl + (self.stale_ttl if allow_stale else 0):
+            return None
+
+        value = json.loads(row.value)
+        with self.lock:
+            # Keep the age of the stored entry so it expires in every worker at once
+            self.entries[key] = (time.monotonic() - age, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if self.on_store:
+            try:
+                self.on_store(key, value)
+            except Exception as e:
+                logger.error(f"Error handling stored result for {key}: {e}")
+        return value
+
+    def _save(self, key: Hashable, value: Any) -> None:
+        """Write a result to the database and drop entries too old to be served."""
+        now = time.time()
+        statement = sqlite_insert(shared_results).values(key=encode_key(key), value=json.dumps(value),
+                                                         stored_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[shared_results.c.key],
+            set_={'value': statement.excluded.value, 'stored_at': statement.excluded.stored_at}
+        )
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(statement)
+                conn.execute(delete(shared_results).where(
+                    shared_results.c.stored_at < now - self.ttl - self.stale_ttl))
+        except Exception as e:
+            # Other workers will scrape it themselves; this one still has it in memory
+            logger.error(f"Error sharing cached result for {key}: {e}")
+            metrics.count_error('shared_cache')
+
+    def _claim(self, key: Hashable) -> bool:
+        """Take the lease on a key unless another process holds an unexpired one."""
+        now = time.time()
+        statement = sqlite_insert(leases).values(key=encode_key(key), owner=self.owner,
+                                                 expires_at=now + self.lease_ttl)
+        statement = statement.on_conflict_do_update(
+            index_elements=[leases.c.key],
+            set_={'owner': statement.excluded.owner, 'expires_at': statement.excluded.expires_at},
+            where=leases.c.expires_at < now
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(statement).rowcount == 1
+
+    def _release(self, key: Hashable) -> None:
+        """Give up this process's lease on a key, if it holds one."""
+        with self.engine.begin() as conn:
+            conn.execute(delete(leases).where((leases.c.key == encode_key(key)) & (leases.c.owner == self.owner)))
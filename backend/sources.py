@@ -0,0 +1,341 @@
+"""
+Event source adapters and the fan-out that merges them.
+
+Each source turns a city into a list of event dicts shaped like
+EventScraper.clean_event_details, tagged with the source's name. The
+fan-out queries all enabled sources concurrently, drops cross-listed
+events (same canonical URL, or same title and start time) keeping the copy
+from the source listed first, and interleaves the rest so every source is
+represented. With a deadline, sources that have not answered in time are
+left out of the result.
+
+Sources are configured with EVENT_SOURCES, a comma-separated list of
+entries "eventbrite", "eventbrite=<base url>" or "<name>=<listing URL>",
+where the listing URL contains "{city}" and the page lists its events as
+schema.org JSON-LD, e.g.:
+
+    EVENT_SOURCES="eventbrite,citylist=https://events.example.com/{city}/"
+"""
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import zip_longest
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import metrics
+from event_keys import canonical_event_url
+from scraper import EventScraper
+
+logger = logging.getLogger('event_scraper')
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class ScrapeProgress:
+    """
+    The events a running scrape has found so far, so a caller can answer
+    with them before the scrape finishes.
+
+    Finished events replace the card-level stand-ins reported for them
+    while their detail pages were being fetched, keeping their position.
+    """
+
+    def __init__(self, max_events: int):
+        """
+        Initialize the ScrapeProgress.
+
+        Args:
+            max_events (int): Maximum number of events the scrape produces
+        """
+        self.max_events = max_events
+        self.events: "OrderedDict[Any, Dict[str, str]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, events: Iterable[Dict[str, str]], final: bool = True) -> None:
+        """
+        Record events.
+
+        Args:
+            events (Iterable[Dict[str, str]]): Cleaned events
+            final (bool): False for stand-ins, which never replace an event already recorded
+        """
+        with self.lock:
+            for event in events:
+                key = canonical_event_url(event['link']) if event.get('link') else len(self.events)
+                if final or key not in self.events:
+                    self.events[key] = event
+
+    def snapshot(self) -> List[Dict[str, str]]:
+        """Events found so far, in the order they were first reported."""
+        with self.lock:
+            return list(self.events.values())[:self.max_events]
+
+
+class EventSource(ABC):
+    """
+    Interface of an event source.
+    """
+
+    name = 'source'
+
+    @abstractmethod
+    def scrape(self, city: str, max_events: int, **options: Any) -> List[Dict[str, str]]:
+        """
+        Get events for a city.
+
+        Args:
+            city (str): City name
+            max_events (int): Maximum number of events
+            **options: EventScraper keyword arguments such as `start_after`,
+                `rate_limiter` or `fetch_slots`, `scrape_individual` (False to
+                skip event detail pages where a source fetches them) and
+                `progress` (a ScrapeProgress to report events to as they are found)
+
+        Returns:
+            List[Dict[str, str]]: Cleaned events, each with a 'source' field
+        """
+
+    def iter_events(self, city: str, max_events: int, **options: Any) -> Iterator[Dict[str, str]]:
+        """Yield events for a city as they are ready (all at once unless the source can stream)."""
+        yield from self.scrape(city, max_events, **options)
+
+    def tag(self, events: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Mark events as coming from this source."""
+        return [dict(event, source=self.name) for event in events]
+
+    def reporter(self, progress: Optional[ScrapeProgress]) -> Optional[Callable[[List[Dict[str, str]], bool], None]]:
+        """An EventScraper `on_progress` callback recording this source's events in `progress`."""
+        if progress is None:
+            return None
+        return lambda events, final: progress.add(self.tag(events), final)
+
+
+class EventbriteSource(EventSource):
+    """
+    Eventbrite listing and event pages, scraped with EventScraper.
+    """
+
+    name = 'eventbrite'
+
+    def __init__(self, base_url: Optional[str] = None, event_store: Any = None):
+        """
+        Initialize the EventbriteSource.
+
+        Args:
+            base_url (Optional[str]): Site to scrape; EVENTBRITE_BASE_URL by default
+            event_store (Any): EventStore consulted before fetching event pages
+        """
+        self.base_url = base_url
+        self.event_store = event_store
+
+    def scrape(self, city: str, max_events: int, scrape_individual: bool = True,
+               progress: Optional[ScrapeProgress] = None, **options: Any) -> List[Dict[str, str]]:
+        scraper = EventScraper(city, max_events, base_url=self.base_url, event_store=self.event_store,
+                               on_progress=self.reporter(progress), **options)
+        return self.tag(scraper.scrape_events(scrape_individual))
+
+    def iter_events(self, city: str, max_events: int, scrape_individual: bool = True,
+                    progress: Optional[ScrapeProgress] = None, **options: Any) -> Iterator[Dict[str, str]]:
+        scraper = EventScraper(city, max_events, base_url=self.base_url, event_store=self.event_store,
+                               on_progress=self.reporter(progress), **options)
+        for event in scraper.iter_events(scrape_individual):
+            yield dict(event, source=self.name)
+
+
+class SchemaOrgSource(EventSource):
+    """
+    A site whose city listing page embeds its events as schema.org JSON-LD.
+    """
+
+    def __init__(self, name: str, listing_url: str):
+        """
+        Initialize the SchemaOrgSource.
+
+        Args:
+            name (str): Source name reported in the events' 'source' field
+            listing_url (str): Listing page URL with a "{city}" placeholder
+        """
+        if '{city}' not in listing_url:
+            raise ValueError(f"Listing URL of source {name} has no {{city}} placeholder: {listing_url}")
+        self.name = name
+        self.listing_url = listing_url
+        parts = urlsplit(listing_url)
+        self.base_url = f"{parts.scheme}://{parts.netloc}"
+
+    def scrape(self, city: str, max_events: int, scrape_individual: bool = True,
+               progress: Optional[ScrapeProgress] = None, **options: Any) -> List[Dict[str, str]]:
+        # Everything comes from the listing page, so there are no detail pages to skip
+        scraper = EventScraper(city, max_events, base_url=self.base_url, **options)
+        html = scraper.fetch_page(self.listing_url.format(city=scraper.city))
+        if not html:
+            return []
+
+        events = []
+        seen = set()
+        for event_data in scraper.extract_json_ld_events_from_html(html):
+            event = scraper.clean_event_details(scraper.extract_json_ld_event_details(event_data))
+            # Linkless events are told apart by title and start, as in the fan-out merge
+            keys = duplicate_keys(event)
+            if any(key in seen for key in keys) or not scraper.in_window(event):
+                continue
+            seen.update(keys)
+            events.append(event)
+            if len(events) >= max_events:
+                break
+        events = self.tag(events)
+        if progress:
+            progress.add(events)
+        return events
+
+
+def parse_sources(value: str, event_store: Any = None) -> List[EventSource]:
+    """
+    Parse an EVENT_SOURCES list.
+
+    Args:
+        value (str): Comma-separated "<name>" or "<name>=<url>" entries
+        event_store (Any): EventStore for the Eventbrite source
+
+    Returns:
+        List[EventSource]: Sources in priority order
+
+    Raises:
+        ValueError: If an entry other than eventbrite has no listing URL
+    """
+    sources = []
+    for item in value.split(','):
+        name, _, url = item.partition('=')
+        name, url = name.strip().lower(), url.strip()
+        if not name:
+            continue
+        if name == 'eventbrite':
+            sources.append(EventbriteSource(url or None, event_store=event_store))
+        elif url:
+            sources.append(SchemaOrgSource(name, url))
+        else:
+            raise ValueError(f"Event source {name} needs a listing URL")
+    return sources
+
+
+def duplicate_keys(event: Dict[str, str]) -> List[Any]:
+    """Keys under which two listings count as the same event."""
+    keys = []
+    if event.get('link'):
+        keys.append(canonical_event_url(event['link']))
+    title = ' '.join(WORD_RE.findall(event.get('name', '').lower()))
+    when = event.get('start') or event.get('date_time')
+    if title and title != 'untitled event' and when and when != 'Date not available':
+        keys.append((title, when))
+    return keys
+
+
+def merge_events(results: List[List[Dict[str, str]]], max_events: int) -> List[Dict[str, str]]:
+    """
+    Merge per-source results, dropping cross-listed duplicates.
+
+    Args:
+        results (List[List[Dict[str, str]]]): Events of each source, in priority order
+        max_events (int): Maximum number of events returned
+
+    Returns:
+        List[Dict[str, str]]: Events taken from each source in turn
+    """
+    seen = set()
+    unique = []
+    for events in results:
+        kept = []
+        for event in events:
+            keys = duplicate_keys(event)
+            if any(key in seen for key in keys):
+                continue
+            seen.update(keys)
+            kept.append(event)
+        unique.append(kept)
+
+    merged = [event for group in zip_longest(*unique) for event in group if event is not None]
+    return merged[:max_events]
+
+
+class FanOut:
+    """
+    Queries several event sources concurrently and merges their events.
+    """
+
+    def __init__(self, sources: List[EventSource], deadline: Optional[float] = None):
+        """
+        Initialize the FanOut.
+
+        Args:
+            sources (List[EventSource]): Sources in priority order
+            deadline (Optional[float]): Seconds to wait for sources; None waits for all
+        """
+        self.sources = sources
+        self.deadline = deadline
+
+    @classmethod
+    def from_env(cls, event_store: Any = None) -> 'FanOut':
+        """Create a fan-out from EVENT_SOURCES and SOURCE_DEADLINE (seconds, 0 for none)."""
+        deadline = float(os.environ.get('SOURCE_DEADLINE', 0))
+        sources = parse_sources(os.environ.get('EVENT_SOURCES', 'eventbrite'), event_store)
+        return cls(sources or [EventbriteSource(event_store=event_store)], deadline=deadline or None)
+
+    @property
+    def fans_out(self) -> bool:
+        """Whether more than one source is queried."""
+        return len(self.sources) > 1
+
+    def scrape_source(self, source: EventSource, city: str, max_events: int,
+                      **options: Any) -> List[Dict[str, str]]:
+        """Scrape one source, logging and counting failures instead of raising."""
+        try:
+            with metrics.timer(f'source_{source.name}'):
+                return source.scrape(city, max_events, **options)
+        except Exception as e:
+            logger.error(f"Error scraping {city} from {source.name}: {e}")
+            metrics.count_error(f'source_{source.name}')
+            return []
+
+    def iter_events(self, city: str, max_events: int, **options: Any) -> Iterator[Dict[str, str]]:
+        """Yield events for a city, streaming them as scraped when there is a single source."""
+        if self.fans_out or self.deadline is not None:
+            yield from self.scrape(city, max_events, **options)
+        else:
+            yield from self.sources[0].iter_events(city, max_events, **options)
+
+    def scrape(self, city: str, max_events: int, **options: Any) -> List[Dict[str, str]]:
+        """
+        Get events for a city from all sources.
+
+        Args:
+            city (str): City name
+            max_events (int): Maximum number of events
+            **options: EventScraper keyword arguments passed to every source
+
+        Returns:
+            List[Dict[str, str]]: Merged events of the sources that answered in time
+        """
+        if len(self.sources) == 1 and self.deadline is None:
+            # Let errors reach the caller as they did before sources existed
+            return self.sources[0].scrape(city, max_events, **options)
+
+        executor = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix='source')
+        futures = [executor.submit(self.scrape_source, source, city, max_events, **options)
+                   for source in self.sources]
+        wait(futures, timeout=self.deadline)
+        # Late sources keep running in the background; their results are dropped
+        executor.shutdown(wait=False)
+
+        results = []
+        for source, future in zip(self.sources, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                logger.warning(f"Source {source.name} missed the {self.deadline}s deadline for {city}")
+                metrics.count_error(f'source_{source.name}_deadline')
+                results.append([])
+        return merge_events(results, max_events)
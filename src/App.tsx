@@ -1,11 +1,14 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { MapPin } from 'lucide-react';
 import SearchForm from './components/SearchForm';
 import EventList from './components/EventList';
 import LoadingState from './components/LoadingState';
 import ErrorState from './components/ErrorState';
 import { Event, SearchParams } from './types/Event';
-import { searchEvents } from './services/eventsApi';
+import { applyEventChanges, fetchEventChanges, streamEvents } from './services/eventsApi';
+
+// How often results on screen are refreshed with what changed since the last poll
+const REFRESH_INTERVAL_MS = 5 * 60 * 1000;
 
 function App() {
   const [events, setEvents] = useState<Event[]>([]);
@@ -14,17 +17,47 @@ function App() {
   const [searchPerformed, setSearchPerformed] = useState(false);
   const [currentCity, setCurrentCity] = useState('');
   const [showDescriptions, setShowDescriptions] = useState(false);
+  // Parameters of the search whose results are on screen and kept up to date
+  const [refreshParams, setRefreshParams] = useState<SearchParams | null>(null);
+
+  useEffect(() => {
+    if (!refreshParams) return;
+    let token: string | null = null;
+    let cancelled = false;
+    const timer = window.setInterval(async () => {
+      try {
+        // The first poll gets the full list and a token; later polls only the changes
+        const changes = await fetchEventChanges(refreshParams, token);
+        if (cancelled) return;
+        token = changes.token;
+        setEvents((current) => applyEventChanges(current, changes));
+      } catch {
+        // Keep showing the current results; the next poll tries again
+      }
+    }, REFRESH_INTERVAL_MS);
+    return () => {
+      cancelled = true;
+      window.clearInterval(timer);
+    };
+  }, [refreshParams]);
 
   const handleSearch = async (params: SearchParams) => {
     setLoading(true);
     setError(null);
+    setRefreshParams(null);
     setCurrentCity(params.city);
     setShowDescriptions(params.showDescriptions);
+    setEvents([]);
     
     try {
-      const results = await searchEvents(params);
-      setEvents(results);
+      // Show events as they stream in instead of waiting for the full list
+      await streamEvents(params, (event) => {
+        setEvents((current) => [...current, event]);
+        setSearchPerformed(true);
+        setLoading(false);
+      });
       setSearchPerformed(true);
+      setRefreshParams(params);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An unexpected error occurred');
     } finally {
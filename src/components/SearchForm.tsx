@@ -93,7 +93,7 @@ const SearchForm: React.FC<SearchFormProps> = ({ onSearch, isLoading }) => {
               className="w-full py-3 px-4 border border-gray-300 rounded-lg focus:ring-2 focus:ring-purple-500 focus:border-purple-500 transition-all"
               disabled={isLoading}
             >
-              {[5, 10, 15, 20].map(num => (
+              {[5, 10, 15, 20, 50, 100].map(num => (
                 <option key={num} value={num}>{num} events</option>
               ))}
             </select>
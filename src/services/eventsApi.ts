@@ -1,17 +1,74 @@
-import { Event, SearchParams } from '../types/Event';
+import { Event, EventChanges, SearchParams } from '../types/Event';
 
 // In a real application, this would make an API call to your backend
 // that runs the Python script. For this demo, we'll simulate the API call.
 const apiUrl = import.meta.env.VITE_API_URL || 'https://default-url.com';
 
 
-export const searchEvents = async (params: SearchParams): Promise<Event[]> => {
+// Streams events as newline-delimited JSON, calling onEvent as each one
+// arrives so results can be shown before the whole scrape has finished.
+// Uses GET so the browser (and any proxy) can cache results by URL: once the
+// server has the result cached, repeat searches are served from the HTTP
+// cache or revalidated with a 304.
+export const streamEvents = async (
+  params: SearchParams,
+  onEvent: (event: Event) => void
+): Promise<Event[]> => {
+  const query = new URLSearchParams({
+    city: params.city,
+    maxEvents: String(params.maxEvents),
+    stream: 'true',
+  });
+  const response = await fetch(`${apiUrl}?${query}`, {
+    headers: {
+      Accept: 'application/x-ndjson',
+    },
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('Error fetching events');
+  }
+
+  const events: Event[] = [];
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const handleLine = (line: string) => {
+    if (!line.trim()) return;
+    const data = JSON.parse(line);
+    if (data.error) {
+      throw new Error(data.error);
+    }
+    events.push(data);
+    onEvent(data);
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer + decoder.decode());
+
+  return events;
+};
+
+// Returns only the events added, changed or removed since `since` (a token
+// from a previous call; omit it for the full list), for cheap polling.
+export const fetchEventChanges = async (
+  params: SearchParams,
+  since?: string | null
+): Promise<EventChanges> => {
   const response = await fetch(apiUrl, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
     },
-    body: JSON.stringify(params),
+    body: JSON.stringify({ ...params, since: since ?? '' }),
   });
 
   if (!response.ok) {
@@ -19,4 +76,17 @@ export const searchEvents = async (params: SearchParams): Promise<Event[]> => {
   }
 
   return response.json();
-};
\ No newline at end of file
+};
+
+// Applies a set of changes to a previously fetched list of events.
+export const applyEventChanges = (events: Event[], changes: EventChanges): Event[] => {
+  if (changes.full) {
+    return changes.added;
+  }
+  const removed = new Set(changes.removed);
+  const changed = new Map(changes.changed.map((event) => [event.link, event]));
+  return events
+    .filter((event) => !removed.has(event.link))
+    .map((event) => changed.get(event.link) ?? event)
+    .concat(changes.added);
+};
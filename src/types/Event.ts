@@ -5,10 +5,24 @@ export interface Event {
   link: string;
   description: string;
   image: string;
+  // Start as an ISO 8601 UTC timestamp; null if the date could not be read
+  start?: string | null;
+  // Site the event was scraped from, e.g. "eventbrite"
+  source?: string;
 }
 
 export interface SearchParams {
   city: string;
   maxEvents: number;
   showDescriptions: boolean;
-}
\ No newline at end of file
+}
+export interface EventChanges {
+  // Pass back as `since` to get the next changes; null if the server keeps no history
+  token: string | null;
+  // Whether `added` is the complete list rather than a delta
+  full: boolean;
+  added: Event[];
+  changed: Event[];
+  // Links of events no longer listed
+  removed: string[];
+}